@@ -0,0 +1,126 @@
+"""Клиент талд тоглогдох уралдааны анимаци - бүх фрэймтэй нэг Plotly зураг"""
+
+import numpy as np
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from charts import trace
+from paths import MAP_ZOOM
+from store import has_values
+
+
+def replay_times(max_time, step):
+    """0-ээс төгсгөл хүртэлх алхмууд (төгсгөл үргэлж орно)"""
+    times = np.arange(0, int(max_time) + 1, int(step))
+    if len(times) == 0 or times[-1] != max_time:
+        times = np.append(times, int(max_time))
+    return times
+
+
+def _gather(frame, column, rows):
+    """(цаг, морь) байрлалын матрицаас баганын утгууд, өгөгдөлгүй нүдэнд NaN"""
+    values = frame[column].to_numpy(dtype=float)[np.maximum(rows, 0)]
+    values[rows < 0] = np.nan
+    return values
+
+
+def _clock(t):
+    return f"{int(t) // 60}:{int(t) % 60:02d}"
+
+
+def build_replay_figure(live_index, path_trace, step=30, frame_ms=500, zoom=MAP_ZOOM):
+    """Байрлал, газрын зураг, хурд/зүрхний цохилтын самбар бүхий анимацитай зураг.
+
+    Цаг бүрийн төлөвийг searchsorted-оор нэг дор авна; фрэйм бүр зөвхөн баганан
+    диаграм, газрын зургийн тэмдэгт болон x тэнхлэгийн мужийг шинэчилнэ.
+    """
+    frame = live_index.frame
+    horses = np.asarray(live_index.horse_ids, dtype=object)
+    times = replay_times(live_index.max_time, step)
+    rows = live_index.latest_rows(times)
+
+    distance = _gather(frame, 'distance_covered_km', rows)
+    position = _gather(frame, 'position', rows)
+    speed = _gather(frame, 'current_speed_kmh', rows)
+    lat = _gather(frame, 'latitude', rows)
+    lon = _gather(frame, 'longitude', rows)
+
+    # Зүрхний цохилтгүй (зөвхөн GPS) бол хурдны самбар доод мөрийг бүтнээр эзэлнэ
+    heart = has_values(frame, 'heart_rate')
+    bottom = [{'type': 'xy'}, {'type': 'xy'}] if heart else [{'type': 'xy', 'colspan': 2}, None]
+    titles = ("🏁 Одоогийн Байрлал", "🗺️ Замд Морьдын Байрлал", "🚀 Цаг Хугацаагаар Хурд")
+    fig = make_subplots(
+        rows=2, cols=2,
+        specs=[[{'type': 'xy'}, {'type': 'mapbox'}], bottom],
+        subplot_titles=titles + (("💓 Цаг Хугацаагаар Зүрхний Цохилт",) if heart else ()),
+        vertical_spacing=0.12, horizontal_spacing=0.08
+    )
+    time_axes = ('xaxis2', 'xaxis3') if heart else ('xaxis2',)
+
+    def bar(i):
+        return go.Bar(x=horses, y=distance[i], marker=dict(color=position[i], coloraxis='coloraxis'),
+                      name="Туулсан Зай (км)", showlegend=False)
+
+    def markers(i):
+        return go.Scattermapbox(lat=lat[i], lon=lon[i], mode='markers', text=horses,
+                                marker=dict(size=np.nan_to_num(speed[i] / 3, nan=5) + 5,
+                                            color=position[i], coloraxis='coloraxis'),
+                                hovertemplate="%{text}<extra></extra>", showlegend=False)
+
+    # Анимацид шинэчлэгдэх trace-үүд эхэндээ: 0 - баганан диаграм, 1 - газрын зургийн тэмдэгт
+    fig.add_trace(bar(0), row=1, col=1)
+    fig.add_trace(markers(0), row=1, col=2)
+    fig.add_trace(path_trace, row=1, col=2)
+
+    # Хурд, зүрхний цохилтын бүтэн шугам; фрэйм бүр x тэнхлэгийг t хүртэл нээнэ.
+    # Бүтэн нарийвчлалтай телеметр тул олон цэгтэй бол WebGL-ээр зурна.
+    points = 2 * len(frame)
+    for code, horse_id in enumerate(horses):
+        history = frame.iloc[live_index.starts[code]:live_index.stops[code]]
+        fig.add_trace(trace(history['timestamp_seconds'], history['current_speed_kmh'], points,
+                            mode='lines', name=horse_id, legendgroup=horse_id),
+                      row=2, col=1)
+        if heart:
+            fig.add_trace(trace(history['timestamp_seconds'], history['heart_rate'], points,
+                                mode='lines', name=horse_id, legendgroup=horse_id, showlegend=False),
+                          row=2, col=2)
+
+    def visible(t):
+        return [0, max(int(t), int(step))]
+
+    fig.frames = [
+        go.Frame(
+            name=str(t),
+            data=[bar(i), markers(i)],
+            traces=[0, 1],
+            layout={**{axis: {'range': visible(t)} for axis in time_axes},
+                    'title': {'text': f"📼 Уралдааны Цаг: {_clock(t)}"}}
+        )
+        for i, t in enumerate(times)
+    ]
+
+    play = {'frame': {'duration': frame_ms, 'redraw': True}, 'fromcurrent': True,
+            'transition': {'duration': 0}, 'mode': 'immediate'}
+    pause = {'frame': {'duration': 0, 'redraw': False}, 'transition': {'duration': 0},
+             'mode': 'immediate'}
+    fig.update_layout(
+        height=800,
+        title_text=f"📼 Уралдааны Цаг: {_clock(times[0])}",
+        coloraxis=dict(colorscale='RdYlBu', showscale=False),
+        mapbox=dict(style='open-street-map', zoom=zoom,
+                    center=dict(lat=float(np.nanmean(lat)), lon=float(np.nanmean(lon)))),
+        **{axis: dict(range=visible(times[0]), title_text="Цаг (секунд)") for axis in time_axes},
+        yaxis=dict(range=[0, float(np.nanmax(distance)) * 1.05], title_text="Туулсан Зай (км)"),
+        updatemenus=[dict(
+            type='buttons', direction='left', showactive=False,
+            x=0, y=-0.08, xanchor='left', yanchor='top',
+            buttons=[dict(label="▶️ Тоглуулах", method='animate', args=[None, play]),
+                     dict(label="⏸️ Зогсоох", method='animate', args=[[None], pause])]
+        )],
+        sliders=[dict(
+            x=0.2, y=-0.08, len=0.8, xanchor='left', yanchor='top',
+            currentvalue=dict(prefix="Цаг (секунд): "),
+            steps=[dict(label=str(t), method='animate', args=[[str(t)], pause]) for t in times]
+        )]
+    )
+    return fig
@@ -0,0 +1,173 @@
+"""Самбаруудын хөтөчгүй гүйцэтгэлийн хэмжилт (benchmark)
+
+Самбар бүрийг streamlit-ийн bare горимд шууд дуудаж, өгөгдлийн 1x, 10x, 100x, 1000x
+хэмжээнд хугацаа, санах ойн оргил (RSS), диаграмын тоо болон сериалчилсан хэмжээг хэмжинэ.
+
+Ажиллуулах: python bench.py [--scales 1 10 100] [--repeat 3] [--output bench_results.json]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.join("data", "bench")
+SCALES = [1, 10, 100, 1000]
+# Самбар -> аргументууд ('records', 'live' нь каталогийн эхний уралдааны хуваалт,
+# 'all_records' нь бүх уралдааны бичлэг)
+DASHBOARDS = {
+    'overview_dashboard': ('horses', 'trainers', 'races'),
+    'race_record_dashboard': ('records', 'horses', 'all_records'),
+    'live_race_simulation': ('live', 'records'),
+    'horse_trainer_profile': ('horses', 'trainers', 'all_records'),
+    'geospatial_dashboard': ('live', 'records'),
+}
+
+# 1x хэмжээ нь үзүүлэлтийн өгөгдөлтэй ижил
+BASE_SIZE = {'n_horses': 300, 'n_trainers': 50, 'n_racers': 50, 'n_tracked': 5}
+
+
+def fixture_dir(scale):
+    return os.path.join(BENCH_DIR, f"x{scale}")
+
+
+def _write_fixture(path, scale, duration_s, sample_rate_hz):
+    from generate import write_store
+
+    sizes = {key: value * scale for key, value in BASE_SIZE.items()}
+    write_store(path, duration_s=duration_s, sample_rate_hz=sample_rate_hz, **sizes)
+
+
+def ensure_fixture(scale, duration_s, sample_rate_hz):
+    """Тухайн хэмжээний өгөгдлийг (байхгүй бол) үүсгэх"""
+    path = fixture_dir(scale)
+    if not os.path.exists(os.path.join(path, "races.parquet")):
+        # Тусдаа процесст үүсгэнэ: эс тэгвээс хүү процессууд эцгийн RSS оргилыг өвлөнө
+        ctx = multiprocessing.get_context('spawn')
+        process = ctx.Process(target=_write_fixture, args=(path, scale, duration_s, sample_rate_hz))
+        process.start()
+        process.join()
+    return path
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux дээр KB, macOS дээр байтаар илэрхийлэгдэнэ
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_dashboard(name, scale, repeat, results):
+    """Тусдаа процесст нэг самбарыг ажиллуулж хэмжих"""
+    import streamlit as st
+    from streamlit import config, logger
+
+    # bare горимын ScriptRunContext анхааруулгуудыг нуух (тохиргоо уншигдсаны дараа)
+    config.get_option('logger.level')
+    logger.set_log_level('error')
+    import dash
+    from store import open_store
+
+    payload = {'figures': 0, 'bytes': 0, 'seconds': 0.0}
+    plotly_chart = st.plotly_chart
+
+    def measured_plotly_chart(fig, *args, **kwargs):
+        start = time.perf_counter()
+        payload['figures'] += 1
+        payload['bytes'] += len(fig.to_json())
+        payload['seconds'] += time.perf_counter() - start
+        return plotly_chart(fig, *args, **kwargs)
+
+    st.plotly_chart = measured_plotly_chart
+    # bare горимд st.fragment огт ажилладаггүй тул нэг удаа шууд дуудна
+    st.fragment = lambda func=None, **kwargs: func if func is not None else (lambda f: f)
+
+    start = time.perf_counter()
+    horses, trainers, races = open_store(data_dir=fixture_dir(scale), store_dir=fixture_dir(scale))
+    records, live = races.race(races.race_ids[0])
+    tables = {'horses': horses, 'trainers': trainers, 'races': races, 'records': records,
+              'live': live, 'all_records': races.records}
+    load_seconds = time.perf_counter() - start
+    args = [tables[arg] for arg in DASHBOARDS[name]]
+
+    for run in range(repeat):
+        payload.update(figures=0, bytes=0, seconds=0.0)
+        start = time.perf_counter()
+        getattr(dash, name)(*args)
+        elapsed = time.perf_counter() - start - payload['seconds']
+        results.append({
+            'dashboard': name,
+            'scale': scale,
+            'run': run,
+            'cold': run == 0,
+            'rows': {key: len(table) for key, table in tables.items()},
+            'load_seconds': load_seconds,
+            'wall_seconds': elapsed,
+            'peak_rss_mb': _peak_rss_mb(),
+            'figures': payload['figures'],
+            'figure_bytes': payload['bytes'],
+        })
+
+
+def measure(name, scale, repeat):
+    ctx = multiprocessing.get_context('spawn')
+    with ctx.Manager() as manager:
+        results = manager.list()
+        process = ctx.Process(target=run_dashboard, args=(name, scale, repeat, results))
+        process.start()
+        process.join()
+        if process.exitcode != 0:
+            return [{'dashboard': name, 'scale': scale, 'error': f"exit code {process.exitcode}"}]
+        return list(results)
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Самбаруудын гүйцэтгэлийн хэмжилт")
+    parser.add_argument("--scales", type=int, nargs='+', default=SCALES)
+    parser.add_argument("--dashboards", nargs='+', default=list(DASHBOARDS), choices=list(DASHBOARDS))
+    parser.add_argument("--repeat", type=int, default=3, help="Нэг самбарыг дахин зурах тоо")
+    parser.add_argument("--duration", type=int, default=1800)
+    parser.add_argument("--rate", type=float, default=1 / 60)
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args()
+
+    results = []
+    for scale in args.scales:
+        ensure_fixture(scale, args.duration, args.rate)
+        for name in args.dashboards:
+            for row in measure(name, scale, args.repeat):
+                results.append(row)
+                if 'error' in row:
+                    print(f"{name:<24} x{scale:<5} {row['error']}")
+                else:
+                    print(f"{name:<24} x{scale:<5} run {row['run']}  {row['wall_seconds']*1000:9.1f} ms  "
+                          f"{row['peak_rss_mb']:8.1f} MB  {row['figures']:3d} fig  "
+                          f"{row['figure_bytes']/1024:10.1f} KB")
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'revision': _git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': {'duration_s': args.duration, 'sample_rate_hz': args.rate, 'repeat': args.repeat},
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"→ {args.output}")
+
+
+if __name__ == "__main__":
+    main()
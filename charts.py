@@ -0,0 +1,115 @@
+"""Диаграм бүтээх давхарга - нэг загвар (template), нийтлэг шошго, олон цэгтэй үед WebGL
+
+Гарчиг, тэнхлэгийн шошго, өнгөний хуваарийг CHARTS-д диаграм бүрээр нэг удаа
+тодорхойлно; дуудагч зөвхөн өгөгдөл болон баганаа өгнө. Цэгийн тоо WEBGL_POINTS-оос
+давбал шугам, цэгэн диаграм SVG-ийн оронд WebGL (Scattergl)-ээр зурагдаж, бүтэн
+нарийвчлалтай телеметр ч хөтөч дээр гацахгүй.
+"""
+
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+
+# Үүнээс олон цэгтэй диаграмыг WebGL-ээр зурна (SVG хэдэн мянган цэгээс удааширна)
+WEBGL_POINTS = 2000
+
+TEMPLATE = 'naadam'
+pio.templates[TEMPLATE] = go.layout.Template(layout=dict(
+    title=dict(x=0.02, xanchor='left'),
+    margin=dict(l=50, r=20, t=60, b=40),
+    hoverlabel=dict(namelength=-1),
+    legend=dict(itemsizing='constant'),
+))
+# plotly-ийн үндсэн загвар дээр давхарлана (go.Figure, анимаци ч мөн адил)
+pio.templates.default = f"plotly+{TEMPLATE}"
+
+# Багана -> шошго (бүх диаграмд нийтлэг; диаграмын labels давуу)
+LABELS = {
+    'horse_id': 'Морь',
+    'timestamp_seconds': 'Цаг (секунд)',
+    'current_speed_kmh': 'Хурд (км/ц)',
+    'heart_rate': 'Зүрхний Цохилт (мин-д)',
+    'distance_covered_km': 'Туулсан Зай (км)',
+    'elevation_m': 'Өндөр (м)',
+    'final_position': 'Эцсийн Байрлал',
+    'average_speed_kmh': 'Дундаж Хурд (км/ц)',
+    'total_time': 'Барианы Цаг (минут)',
+    'prize_money_tugrik': 'Шагналын Мөнгө (₮)',
+    'provincial__achievement': 'Аймгийн Амжилт',
+    'national_achievement': 'Үндэсний Амжилт',
+    'aimgiin_airag': 'Аймгийн Шагнал',
+    'ulsiin_airag': 'Үндэсний Шагнал',
+    'racing_group': 'Насны Ангилал',
+}
+
+# Диаграм бүрийн төрөл (plotly.express функц), гарчиг, шошго, өнгөний хуваарь
+CHARTS = {
+    'age': dict(kind='bar', title="🐎 Насны Ангиллаар Морьд",
+                labels={'x': 'Нас (Жил)', 'y': 'Морины Тоо'}, color_continuous_scale='viridis'),
+    'aimag': dict(kind='pie', title="🗺️ Аймгаар Морины Тархалт"),
+    'trainers': dict(kind='scatter', title="🏆 Уяачийн Амжилт"),
+    'colors': dict(kind='bar', title="🎨 Морины Өнгөний Тархалт",
+                   labels={'x': 'Морины Тоо', 'y': 'Өнгө'}, color_continuous_scale='rainbow'),
+    'races': dict(kind='bar', title="🏁 Уралдаан Бүрийн Дундаж Хурд", labels={'color': 'Он'}),
+    'position_speed': dict(kind='scatter', title="🏃 Байрлал ба Хурдны Шинжилгээ",
+                           color_continuous_scale='RdYlBu_r'),
+    'finish_time': dict(kind='histogram', title="⏱️ Барианы Цагийн Тархалт",
+                        labels={'count': 'Морины Тоо'}, color_discrete_sequence=['#FF6B35']),
+    'heart_rate': dict(title="💓 Байрлалаар Зүрхний Цохилт",
+                       labels={'x': 'Эцсийн Байрлал', 'y': 'Зүрхний Цохилт (мин-д)'}),
+    'prize': dict(kind='bar', title="💰 Шагналын Мөнгө (Эхний 10)",
+                  labels={'final_position': 'Байрлал'}, color_continuous_scale='Viridis'),
+    'position': dict(kind='bar', labels={'distance_covered_km': 'Туулсан Зай (км)'},
+                     color_continuous_scale='RdYlBu'),
+    'live_map': dict(kind='scatter_mapbox', title="Замд Морьдын Байрлал", mapbox_style='open-street-map'),
+    'live_speed': dict(kind='line', title="🚀 Цаг Хугацаагаар Хурд"),
+    'live_heart_rate': dict(kind='line', title="💓 Цаг Хугацаагаар Зүрхний Цохилт"),
+    'trainer_ages': dict(kind='bar', title="Сургасан Морьдын Насны Тархалт",
+                         labels={'x': 'Нас (Жил)', 'y': 'Морины Тоо'}),
+    'achievements': dict(kind='scatter', title="Морьдын Амжилт"),
+    'map': dict(kind='scatter_mapbox', title="Морьдын Хөдөлгөөнтэй Уралдааны Зам", height=600),
+    'hex_map': dict(kind='choropleth_mapbox', color_continuous_scale='Viridis', opacity=0.6, height=600),
+    'density_map': dict(kind='density_mapbox', radius=20, height=600),
+    'speed': dict(kind='line', title="Цаг Хугацаагаар Хурд"),
+    'elevation': dict(kind='line', title="Өндрийн Профайл", labels={'distance_covered_km': 'Зай (км)'}),
+}
+
+# render_mode сонголттой plotly.express функцууд
+RENDER_MODES = ('line', 'scatter')
+
+
+def webgl(points):
+    return points > WEBGL_POINTS
+
+
+def chart(name, data_frame=None, **kwargs):
+    """CHARTS[name]-ийн тохиргоогоор plotly.express диаграм бүтээх.
+
+    kwargs нь тохиргоог дарна (labels нь нийлнэ). Шугам, цэгэн диаграм мөрийн тоо
+    WEBGL_POINTS-оос их бол WebGL-ээр зурагдана.
+    """
+    spec = {**CHARTS[name], **kwargs}
+    kind = spec.pop('kind')
+    spec['labels'] = {**LABELS, **CHARTS[name].get('labels', {}), **kwargs.get('labels', {})}
+    if kind in RENDER_MODES and 'render_mode' not in spec:
+        points = len(data_frame) if data_frame is not None else len(spec.get('x', ()))
+        spec['render_mode'] = 'webgl' if webgl(points) else 'svg'
+    return getattr(px, kind)(data_frame, **spec)
+
+
+def figure(name, traces=()):
+    """go trace-үүдээс CHARTS[name]-ийн гарчиг, тэнхлэгийн шошготой зураг"""
+    spec = CHARTS[name]
+    labels = spec.get('labels', {})
+    fig = go.Figure(list(traces))
+    fig.update_layout(title=spec.get('title'), xaxis_title=labels.get('x'), yaxis_title=labels.get('y'))
+    return fig
+
+
+def trace(x, y, points=None, **kwargs):
+    """Scatter эсвэл (points, эс бөгөөс x-ийн урт WEBGL_POINTS-оос их бол) Scattergl trace.
+
+    Олон trace-тэй зурагт points-д бүх trace-ийн нийт цэгийг өгч нэг горимоор зурна.
+    """
+    cls = go.Scattergl if webgl(len(x) if points is None else points) else go.Scatter
+    return cls(x=x, y=y, **kwargs)
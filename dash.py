@@ -1,12 +1,28 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+import plotly.io as pio
 import numpy as np
-import time
 from datetime import datetime, timedelta
 import base64
+import functools
+
+from animation import build_replay_figure, replay_times
+from charts import chart, figure, trace
+from export import FORMATS, MIME_TYPES, export_frame
+from generate import AGE_GROUPS, generate
+from live_feed import FileTailSource, LiveFeed
+from live_index import LiveIndex
+from paths import MAP_ZOOM, PathCache, combined_path_trace, frame_path_trace
+from playback import PlaybackClock
+from positions import Course, PositionEngine
+from profiling import Metrics, active_profile, label, profile_run, span, timed
+from registry import EntityIndex
+from replay_cache import FrameCache
+from results import ALL, POSITION_FILTERS, ResultsQuery
+from rolling import RollingStats
+from search import SearchIndex
+from spatial import POINT_LIMIT, aggregate_cells, cells_geojson
+from store import CodeBook, DataStore, FrameCatalog, FrameTable, data_version, has_values
 
 # Page config
 st.set_page_config(
@@ -75,218 +91,304 @@ def load_css():
 def generate_demo_data():
     """CSV файлууд байхгүй үед үзүүлэлтийн өгөгдөл үүсгэх"""
     
-    # Морины өгөгдөл үүсгэх
-    np.random.seed(42)
-    aimags = ['Улаанбаатар', 'Дархан-Уул', 'Орхон', 'Сэлэнгэ', 'Төв', 'Архангай']
-    sums = ['Төв', 'Хойд', 'Урд', 'Зүүн', 'Баруун']
-    colors = ['Хээр', 'Шар', 'Хар', 'Саарал', 'Бор', 'Алаг']
-    
-    horses_data = []
-    for i in range(300):
-        age_group = (i // 50) + 2  # 2-7 нас
-        horses_data.append({
-            'horse_id': f'М{str(i+1).zfill(3)}',
-            'color': np.random.choice(colors),
-            'age': age_group,
-            'trainer': f'Сургагч_{np.random.randint(1, 51)}',
-            'trainer_id': f'С{str(np.random.randint(1, 51)).zfill(3)}',
-            'aimag': np.random.choice(aimags),
-            'sum': np.random.choice(sums),
-            'rider_name': f'Унаач_{i+1}',
-            'rider_age': np.random.randint(8, 16),
-            'aimgiin_airag': np.random.randint(0, 5),
-            'ulsiin_airag': np.random.randint(0, 10),
-            'aimgiin_turuu': np.random.randint(0, 3),
-            'ulsiin_turuu': np.random.randint(0, 8),
-            'racing_group': f'Нас_{age_group}',
-            'total_achievement': np.random.randint(0, 20)
-        })
-    
-    horses_df = pd.DataFrame(horses_data)
-    
-    # Сургагчийн өгөгдөл үүсгэх
-    trainers_data = []
-    for i in range(50):
-        trainers_data.append({
-            'trainer_id': f'С{str(i+1).zfill(3)}',
-            'trainer_name': f'Сургагч_{i+1}',
-            'aimag': np.random.choice(aimags),
-            'sum': np.random.choice(sums),
-            'national_achievement': np.random.randint(0, 15),
-            'provincial__achievement': np.random.randint(0, 25),
-            'total_trained_horses': np.random.randint(1, 10),
-            'phone_number': f'+976-{np.random.randint(80000000, 99999999)}'
-        })
-    
-    trainers_df = pd.DataFrame(trainers_data)
-    
-    # Уралдааны бичлэгийн өгөгдөл (Даага - 2 настай)
-    daaga_horses = horses_df[horses_df['age'] == 2].head(50)
-    record_data = []
-    
-    for i, horse in enumerate(daaga_horses.itertuples()):
-        finish_time_minutes = np.random.randint(25, 35)
-        finish_time_seconds = np.random.randint(0, 60)
-        distance_km = 15.0
-        
-        record_data.append({
-            'horse_id': horse.horse_id,
-            'racing_group': 'Даага',
-            'final_position': i + 1,
-            'finish_time_minutes': finish_time_minutes,
-            'finish_time_seconds': finish_time_seconds,
-            'average_speed_kmh': distance_km / ((finish_time_minutes + finish_time_seconds/60) / 60),
-            'max_speed_kmh': np.random.uniform(35, 55),
-            'stride_length_m': np.random.uniform(4.5, 6.5),
-            'heart_rate_start': np.random.randint(60, 80),
-            'heart_rate_end': np.random.randint(120, 180),
-            'weight_kg': np.random.uniform(280, 350),
-            'rider_weight_kg': np.random.uniform(25, 40),
-            'race_name': 'Наадам 2025 - даага',
-            'date': '2025-07-11',
-            'distance_km': distance_km,
-            'weather': np.random.choice(['Нартай', 'Үүлэрхэг', 'Салхитай']),
-            'temperature_celsius': np.random.randint(20, 30),
-            'wind_speed_kmh': np.random.randint(0, 20),
-            'humidity_percent': np.random.randint(30, 70),
-            'track_condition': np.random.choice(['Сайн', 'Зөөлөн', 'Хатуу']),
-            'prize_money_tugrik': max(0, 10000000 - (i * 200000)),
-            'injury': np.random.choice(['Байхгүй', 'Бага зэрэг', 'Байхгүй', 'Байхгүй', 'Байхгүй']),
-            'fatigue_level': np.random.choice(['Бага', 'Дунд', 'Өндөр']),
-            'rider_experience_years': np.random.randint(1, 8)
-        })
-    
-    record_df = pd.DataFrame(record_data)
-    
-    # Шилдэг 5 морьдын шууд өгөгдөл үүсгэх
-    top_5_horses = record_df.head(5)['horse_id'].tolist()
-    live_data = []
-    
-    # Монголын тал нутгийн координат
-    base_lat, base_lon = 47.9184, 106.9177
-    
-    for timestamp in range(0, 1800, 60):  # 30 минут, 60 секунд тутамд
-        for i, horse_id in enumerate(top_5_horses):
-            progress = timestamp / 1800  # Уралдааны явц (0-с 1 хүртэл)
-            
-            live_data.append({
-                'id': len(live_data),
-                'timestamp_seconds': timestamp,
-                'horse_id': horse_id,
-                'distance_covered_km': progress * 15 + np.random.uniform(-0.5, 0.5),
-                'current_speed_kmh': 30 + np.random.uniform(-10, 15) + (5 * np.sin(progress * np.pi)),
-                'heart_rate': 80 + int(progress * 60) + np.random.randint(-10, 10),
-                'position': i + 1 + np.random.randint(-1, 2) if timestamp > 300 else i + 1,
-                'gap_to_leader_seconds': i * 5 + np.random.randint(0, 10) if i > 0 else 0,
-                'cumulative_time_seconds': timestamp + (i * 2),
-                'latitude': base_lat + (progress * 0.1) + np.random.uniform(-0.01, 0.01),
-                'longitude': base_lon + (progress * 0.15) + np.random.uniform(-0.01, 0.01),
-                'elevation_m': 1350 + np.random.randint(-50, 100),
-                'stride_frequency': 2.2 + np.random.uniform(-0.3, 0.3),
-                'energy_level': max(20, 100 - int(progress * 60) + np.random.randint(-10, 10)),
-                'rider_commands': np.random.choice(['Тогтвортой', 'Түлхэх', 'Барих', 'Гүйлт', 'Амрах'])
-            })
-    
-    live_df = pd.DataFrame(live_data)
-    
-    return horses_df, trainers_df, record_df, live_df
+    # 300 морь, 50 уяач, 2 жилийн 6 насны ангиллын уралдаан (тус бүр 50 оролцогч),
+    # уралдаан бүрийн шилдэг 5 морины шууд өгөгдөл
+    return generate(n_horses=300, n_trainers=50, n_racers=50, n_tracked=5,
+                    duration_s=1800, sample_rate_hz=1 / 60, seed=42,
+                    years=(2024, 2025), groups=tuple(AGE_GROUPS.values()))
 
-@st.cache_data
+@st.cache_resource
+def load_store():
+    """Эх CSV файлуудыг ажиглах өгөгдлийн менежер - процесс даяар нэг"""
+    return DataStore()
+
+@st.cache_resource
+def load_demo_tables():
+    horses_df, trainers_df, record_df, live_df = generate_demo_data()
+    codes = CodeBook.build([horses_df, trainers_df, record_df, live_df])
+    return FrameTable('horses', horses_df, codes=codes), FrameTable('trainers', trainers_df, codes=codes), \
+        FrameCatalog(record_df, live_df, codes)
+
+@timed()
 def load_data():
-    """CSV файлаас өгөгдөл ачаалах эсвэл үзүүлэлтийн өгөгдөл үүсгэх"""
+    """Бүртгэлүүд, уралдааны каталог - өөрчлөгдсөн эх файлыг л дахин ачаална"""
     try:
-        horses_df = pd.read_csv(r"data/horse.csv")
-        trainers_df = pd.read_csv(r"data/trainer.csv")
-        record_df = pd.read_csv(r"data/record.csv")
-        live_df = pd.read_csv(r"data/live.csv")
-        return horses_df, trainers_df, record_df, live_df
+        store = load_store()
     except FileNotFoundError:
         st.info("📁 CSV файлууд олдсонгүй. Үзүүлэлтийн өгөгдлийг ашиглаж байна.")
-        return generate_demo_data()
+        return load_demo_tables(), None
+    return store.refresh(), store
+
+@st.cache_resource
+def load_metrics():
+    """Процесс даяарх гүйцэтгэлийн хэмжилт (NAADAM_METRICS_LOG / NAADAM_METRICS_PROM)"""
+    return Metrics.from_env()
+
+def profiled(view):
+    """Дахин зуралт (эсвэл фрагментийн шинэчлэл) бүрийг нэг хэмжилт болгон бичих декоратор"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with profile_run(view, load_metrics(), payload=st.session_state.get('debug_panel', False)):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def plotly_chart(fig, name, **kwargs):
+    """st.plotly_chart-ийг хэмжилттэй дуудах - сериалчлал, илгээлтийн хугацаа.
+
+    Диаграмын хэмжээг зөвхөн хэмжилтийн самбар нээлттэй үед (нэмэлт сериалчлал) хэмжинэ.
+    """
+    current = active_profile()
+    size = len(fig.to_json()) if current is not None and current.payload else None
+    with span(f"chart:{name}") as item:
+        item.bytes = size
+        st.plotly_chart(fig, **kwargs)
+
+@timed()
+@st.cache_resource(max_entries=4)
+def load_live_index(version, _live):
+    """Уралдааны шууд өгөгдлийн цагийн индексийг хуваалтын хувилбар тутамд нэг удаа бүтээх"""
+    return LiveIndex(_live.select([
+        'timestamp_seconds', 'horse_id', 'distance_covered_km', 'current_speed_kmh',
+        'heart_rate', 'position', 'latitude', 'longitude', 'elevation_m', 'energy_level'
+    ]))
+
+@timed()
+@st.cache_resource(max_entries=4)
+def load_course(version, _live):
+    """Бичигдсэн трекээс гаргасан замын шугам (шууд дамжуулалын GPS-ийг наахад)"""
+    fixes = _live.select(['horse_id', 'timestamp_seconds', 'latitude', 'longitude'])
+    try:
+        return Course.from_fixes(fixes['horse_id'], fixes['timestamp_seconds'],
+                                 fixes['latitude'], fixes['longitude'])
+    except ValueError:
+        # Морьд хөдлөөгүй бол шугам гаргах боломжгүй
+        return None
+
+@timed()
+@st.cache_data(max_entries=16, show_spinner=False)
+def load_hex_cells(version, horses, zoom, _live_index):
+    """Сонгосон морьдын цэгүүдийг томруулалтад тохирсон зургаан өнцөгт нүдээр нэгтгэх"""
+    scale = np.cos(np.radians(_live_index.mean('latitude')))
+    cells, size = aggregate_cells(_live_index.horses_frame(list(horses)), zoom, scale)
+    return cells, cells_geojson(cells, size, scale)
+
+@timed()
+@st.cache_resource(max_entries=4)
+def load_path_cache(version, _live_index):
+    """Хялбарчилсан GPS замын процесс даяар хуваалцах кэш"""
+    return PathCache(_live_index)
+
+@timed()
+@st.cache_resource(max_entries=4)
+def load_entity_index(version, _horses, _trainers, _records):
+    """Морь, уяач, бичлэгийн хэш индексийг өгөгдлийн хувилбар тутамд нэг удаа бүтээх"""
+    return EntityIndex(
+        _horses.select(),
+        _trainers.select(),
+        _records.select(['horse_id', 'race_name', 'date', 'final_position', 'average_speed_kmh',
+                         'max_speed_kmh', 'prize_money_tugrik'])
+    )
+
+@timed()
+@st.cache_resource(max_entries=4)
+def load_search_indexes(version, _entities):
+    """Морь болон уяачийн хайлтын индексийг өгөгдлийн хувилбар тутамд нэг удаа бүтээх"""
+    return (SearchIndex.from_frame(_entities.horses, 'horses'),
+            SearchIndex.from_frame(_entities.trainers, 'trainers'))
+
+PICKER_PAGE_SIZE = 20
+
+def search_picker(label, search_index, format_func, key):
+    """Сервер талын хайлтаар хязгаарлагдмал сонголтын жагсаалттай сонгогч"""
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        query = st.text_input(f"{label} Хайх", key=f"{key}_query",
+                              placeholder="ID, нэр, уяач, аймаг, сум...")
+    found = search_index.match(query)
+    total = search_index.count(found)
+    n_pages = max(1, -(-total // PICKER_PAGE_SIZE))
+    with col2:
+        page = st.selectbox("Хуудас", range(1, n_pages + 1), key=f"{key}_page_{query}")
+    options = search_index.page(found, page - 1, PICKER_PAGE_SIZE)
+    st.caption(f"{total} илэрц")
+    return st.selectbox(f"{label} Сонгох", options, format_func=format_func, key=f"{key}_select")
+
+RESULT_COLUMNS = ['race_id', 'race_name', 'final_position', 'horse_id', 'finish_time_minutes',
+                  'finish_time_seconds', 'average_speed_kmh', 'max_speed_kmh', 'weather',
+                  'prize_money_tugrik']
+
+@timed()
+@st.cache_resource(max_entries=8)
+def load_results_query(version, _records):
+    """Үр дүнгийн хүснэгтийн шүүлт/эрэмбэлэлтийн хөдөлгүүр - хувилбар тутамд нэг удаа"""
+    return ResultsQuery(_records.select(RESULT_COLUMNS))
+
+@timed()
+@st.cache_resource(max_entries=8)
+def load_sql_results(version, race, _sql):
+    """SQL хадгалалттай үед үр дүнгийн асуулга - шүүлт, хуудас бүр индекстэй SQL асуулга"""
+    return _sql.results(race, RESULT_COLUMNS)
+
+@timed()
+@st.cache_resource(max_entries=4)
+def load_sql_entities(version, _sql):
+    """SQL хадгалалттай үед морь, уяач, бичлэгийн хайлт (бичлэгийг санах ойд ачаалахгүй)"""
+    return _sql.entities()
+
+@timed()
+@st.cache_resource(max_entries=4)
+def load_sql_live(version, race, _sql):
+    """SQL хадгалалттай үед уралдааны телеметрийн асуулга (сонгосон морьдын мөрийг л авна)"""
+    return _sql.live(race)
+
+@timed()
+@st.cache_resource(max_entries=4)
+def load_frame_cache(version, race_km, _live_index):
+    """Дахин тоглуулалтын фрэймийн кэш - бүх сесс хуваалцана"""
+    return FrameCache(_live_index, version, figure_builder=build_position_figure,
+                      tracker=RollingStats(race_km))
+
+@timed()
+@st.cache_data(max_entries=8, show_spinner=False)
+def replay_animation(version, step, frame_ms, _live_index, _path_cache):
+    """Бүх уралдааны анимацитай зураг (JSON) - үзэгч бүрт дахин бүтээгдэхгүй"""
+    path_trace = combined_path_trace(_path_cache, _live_index.horse_ids, showlegend=False)
+    return build_replay_figure(_live_index, path_trace, step, frame_ms).to_json()
 
 # Dashboard functions
-def overview_dashboard(horses_df, trainers_df, record_df):
+@timed()
+@st.cache_data(max_entries=8, show_spinner=False)
+def overview_aggregates(version, _horses, _trainers, _races):
+    """Ерөнхий самбарын бүлэглэлт болон диаграмын JSON-ийг өгөгдлийн хувилбар тутамд нэг удаа тооцоолох"""
+    
+    horses_df = _horses.select(['age', 'aimag', 'color'])
+    trainers_df = _trainers.select(['trainer_name', 'aimag', 'national_achievement',
+                                    'provincial__achievement', 'total_trained_horses'])
+    # Уралдаан хоорондын үзүүлэлтийг каталогийн хураангуйгаас (телеметр уншихгүй)
+    races_df = _races.summaries
+    
+    # Насны ангиллаар морьд
+    age_dist = horses_df['age'].value_counts().sort_index()
+    fig_age = chart('age', x=age_dist.index, y=age_dist.values, color=age_dist.values)
+    fig_age.update_layout(showlegend=False)
+    
+    # Аймгаар морьдын тархалт
+    # Кодын хүснэгт уяачийн аймгуудыг ч агуулна - тоо нь 0 ангиллыг хасна
+    aimag_dist = horses_df['aimag'].value_counts().loc[lambda counts: counts > 0]
+    fig_aimag = chart('aimag', values=aimag_dist.values, names=aimag_dist.index)
+    fig_aimag.update_traces(textposition='inside', textinfo='percent+label')
+    
+    # Сургагчийн амжилт
+    fig_trainers = chart(
+        'trainers',
+        trainers_df,
+        x='provincial__achievement',
+        y='national_achievement',
+        size='total_trained_horses',
+        color='aimag',
+        hover_data=['trainer_name']
+    )
+    
+    # Морины өнгөний тархалт
+    color_dist = horses_df['color'].value_counts().loc[lambda counts: counts > 0]
+    fig_colors = chart('colors', x=color_dist.values, y=color_dist.index, orientation='h',
+                       color=color_dist.values)
+    
+    # Уралдаан бүрийн дундаж хурд
+    fig_races = chart(
+        'races',
+        races_df,
+        x='racing_group',
+        y='average_speed_kmh',
+        color=races_df['year'].astype(str),
+        barmode='group',
+        hover_data=['race_name', 'racers', 'winner_id', 'distance_km']
+    )
+    
+    years = sorted(races_df['year'].unique())
+    return {
+        'total_horses': len(_horses),
+        'total_trainers': len(_trainers),
+        'total_races': len(races_df),
+        'years': f"{years[0]}–{years[-1]}" if len(years) > 1 else "".join(map(str, years)),
+        'total_prize': float(races_df['prize_total'].sum()),
+        'figures': {
+            'age': fig_age.to_json(),
+            'aimag': fig_aimag.to_json(),
+            'trainers': fig_trainers.to_json(),
+            'colors': fig_colors.to_json(),
+            'races': fig_races.to_json(),
+        },
+    }
+
+@timed()
+@st.cache_data(max_entries=8, show_spinner=False)
+def data_summary(version, _horses, _trainers, _records):
+    """Хажуугийн самбарын тоон хураангуйг өгөгдлийн хувилбар тутамд нэг удаа тооцоолох"""
+    return {
+        'horses': len(_horses),
+        'trainers': len(_trainers),
+        'records': len(_records),
+    }
+
+def overview_dashboard(horses, trainers, races):
     """Ерөнхий самбар - гол үзүүлэлт болон тархалт"""
     
+    # Телеметр нэмэгдэхэд бус, бичлэг өөрчлөгдөхөд л дахин тооцоолно
+    aggregates = overview_aggregates(data_version(horses, trainers, races.records), horses, trainers, races)
+    figures = aggregates['figures']
+    
     st.markdown('<h2 class="sub-header">🏇 Уралдааны Ерөнхий Мэдээлэл</h2>', unsafe_allow_html=True)
     
     # Гол үзүүлэлтүүд
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Нийт Морь", len(horses_df), delta="Идэвхтэй")
+        st.metric("Нийт Морь", aggregates['total_horses'], delta="Идэвхтэй")
     with col2:
-        st.metric("Нийт Уяач", len(trainers_df), delta="Бүртгэлтэй")
+        st.metric("Нийт Уяач", aggregates['total_trainers'], delta="Бүртгэлтэй")
     with col3:
-        st.metric("Дууссан Уралдаан", 1, delta="Наадам 2025")
+        st.metric("Дууссан Уралдаан", aggregates['total_races'], delta=aggregates['years'])
     with col4:
-        total_prize = record_df['prize_money_tugrik'].sum()
-        st.metric("Нийт Шагналын Мөнгө", f"₮{total_prize:,.0f}", delta="Хуваарилсан")
+        st.metric("Нийт Шагналын Мөнгө", f"₮{aggregates['total_prize']:,.0f}", delta="Хуваарилсан")
     
     # Диаграмууд 1-р эгнээ
     col1, col2 = st.columns(2)
     
     with col1:
-        # Насны ангиллаар морьд
-        age_dist = horses_df['age'].value_counts().sort_index()
-        fig_age = px.bar(
-            x=age_dist.index,
-            y=age_dist.values,
-            title="🐎 Насны Ангиллаар Морьд",
-            labels={'x': 'Нас (Жил)', 'y': 'Морины Тоо'},
-            color=age_dist.values,
-            color_continuous_scale='viridis'
-        )
-        fig_age.update_layout(showlegend=False)
-        st.plotly_chart(fig_age, use_container_width=True)
-    
+        plotly_chart(pio.from_json(figures['age']), 'age', use_container_width=True)
     with col2:
-        # Аймгаар морьдын тархалт
-        aimag_dist = horses_df['aimag'].value_counts()
-        fig_aimag = px.pie(
-            values=aimag_dist.values,
-            names=aimag_dist.index,
-            title="🗺️ Аймгаар Морины Тархалт"
-        )
-        fig_aimag.update_traces(textposition='inside', textinfo='percent+label')
-        st.plotly_chart(fig_aimag, use_container_width=True)
+        plotly_chart(pio.from_json(figures['aimag']), 'aimag', use_container_width=True)
     
     # Диаграмууд 2-р эгнээ
     col1, col2 = st.columns(2)
     
     with col1:
-        # Сургагчийн амжилт
-        fig_trainers = px.scatter(
-            trainers_df,
-            x='provincial__achievement',
-            y='national_achievement',
-            size='total_trained_horses',
-            color='aimag',
-            title="🏆 Уяачийн Амжилт",
-            labels={'provincial__achievement': 'Аймгийн Амжилт', 
-                   'national_achievement': 'Үндэсний Амжилт'},
-            hover_data=['trainer_name']
-        )
-        st.plotly_chart(fig_trainers, use_container_width=True)
-    
+        plotly_chart(pio.from_json(figures['trainers']), 'trainers', use_container_width=True)
     with col2:
-        # Морины өнгөний тархалт
-        color_dist = horses_df['color'].value_counts()
-        fig_colors = px.bar(
-            x=color_dist.values,
-            y=color_dist.index,
-            orientation='h',
-            title="🎨 Морины Өнгөний Тархалт",
-            labels={'x': 'Морины Тоо', 'y': 'Өнгө'},
-            color=color_dist.values,
-            color_continuous_scale='rainbow'
-        )
-        st.plotly_chart(fig_colors, use_container_width=True)
+        plotly_chart(pio.from_json(figures['colors']), 'colors', use_container_width=True)
+    
+    # Уралдаан хоорондын харьцуулалт
+    plotly_chart(pio.from_json(figures['races']), 'races', use_container_width=True)
+
+def race_record_dashboard(records, horses, all_records=None, sql=None, race=None):
+    """Уралдааны рэкордын самбар - дэлгэрэнгүй шинжилгээ.
 
-def race_record_dashboard(record_df, horses_df):
-    """Уралдааны рэкордын самбар - дэлгэрэнгүй шинжилгээ"""
+    sql (SqlStore) өгвөл үр дүнгийн хүснэгтийн шүүлт, хуудаслалтыг SQL асуулгаар хийнэ.
+    """
+    
+    with span("select_records") as item:
+        record_df = records.select([
+            'horse_id', 'final_position', 'finish_time_minutes', 'finish_time_seconds',
+            'average_speed_kmh', 'max_speed_kmh', 'heart_rate_start', 'heart_rate_end',
+            'distance_km', 'weather', 'prize_money_tugrik', 'race_name', 'total_time'
+        ])
+        item.rows = len(record_df)
+    race_name = record_df['race_name'].iloc[0] if len(record_df) else ""
     
-    st.markdown('<h2 class="sub-header">🏁 Уралдааны Рэкордын Шинжилгээ - Наадам 2025 Даага</h2>', unsafe_allow_html=True)
+    st.markdown(f'<h2 class="sub-header">🏁 Уралдааны Рэкордын Шинжилгээ - {race_name}</h2>', unsafe_allow_html=True)
     
     # Уралдааны хураангуй
     col1, col2, col3, col4 = st.columns(4)
@@ -307,271 +409,416 @@ def race_record_dashboard(record_df, horses_df):
     
     with col1:
         # Эцсийн байрлал ба хурд
-        fig_pos = px.scatter(
+        fig_pos = chart(
+            'position_speed',
             record_df,
             x='final_position',
             y='average_speed_kmh',
             size='max_speed_kmh',
             color='final_position',
-            title="🏃 Байрлал ба Хурдны Шинжилгээ",
-            labels={'final_position': 'Эцсийн Байрлал', 'average_speed_kmh': 'Дундаж Хурд (км/ц)'},
-            hover_data=['horse_id', 'finish_time_minutes', 'finish_time_seconds'],
-            color_continuous_scale='RdYlBu_r'
+            hover_data=['horse_id', 'finish_time_minutes', 'finish_time_seconds']
         )
-        st.plotly_chart(fig_pos, use_container_width=True)
+        plotly_chart(fig_pos, 'position_speed', use_container_width=True)
     
     with col2:
         # Барианы цагийн тархалт
-        record_df['total_time'] = record_df['finish_time_minutes'] + record_df['finish_time_seconds']/60
-        fig_time = px.histogram(
-            record_df,
-            x='total_time',
-            nbins=20,
-            title="⏱️ Барианы Цагийн Тархалт",
-            labels={'total_time': 'Барианы Цаг (минут)', 'count': 'Морины Тоо'},
-            color_discrete_sequence=['#FF6B35']
-        )
-        st.plotly_chart(fig_time, use_container_width=True)
+        fig_time = chart('finish_time', record_df, x='total_time', nbins=20)
+        plotly_chart(fig_time, 'finish_time', use_container_width=True)
     
     # Зүрхний цохилт болон унаачийн шинжилгээ
     col1, col2 = st.columns(2)
     
     with col1:
         # Зүрхний цохилтын шинжилгээ
-        fig_hr = go.Figure()
-        fig_hr.add_trace(go.Scatter(
-            x=record_df['final_position'],
-            y=record_df['heart_rate_start'],
-            mode='markers',
-            name='Эхлэлийн Зц',
-            marker=dict(color='blue', size=8)
-        ))
-        fig_hr.add_trace(go.Scatter(
-            x=record_df['final_position'],
-            y=record_df['heart_rate_end'],
-            mode='markers',
-            name='Төгсгөлийн Зц',
-            marker=dict(color='red', size=8)
-        ))
-        fig_hr.update_layout(
-            title="💓 Байрлалаар Зүрхний Цохилт",
-            xaxis_title="Эцсийн Байрлал",
-            yaxis_title="Зүрхний Цохилт (мин-д)"
-        )
-        st.plotly_chart(fig_hr, use_container_width=True)
+        points = 2 * len(record_df)
+        fig_hr = figure('heart_rate', [
+            trace(record_df['final_position'], record_df['heart_rate_start'], points,
+                  mode='markers', name='Эхлэлийн Зц', marker=dict(color='blue', size=8)),
+            trace(record_df['final_position'], record_df['heart_rate_end'], points,
+                  mode='markers', name='Төгсгөлийн Зц', marker=dict(color='red', size=8)),
+        ])
+        plotly_chart(fig_hr, 'heart_rate', use_container_width=True)
     
     with col2:
         # Шагналын мөнгөний тархалт
-        fig_prize = px.bar(
-            record_df.head(10),
-            x='final_position',
-            y='prize_money_tugrik',
-            title="💰 Шагналын Мөнгө (Эхний 10)",
-            labels={'final_position': 'Байрлал', 'prize_money_tugrik': 'Шагналын Мөнгө (₮)'},
-            color='prize_money_tugrik',
-            color_continuous_scale='Viridis'
-        )
-        st.plotly_chart(fig_prize, use_container_width=True)
+        fig_prize = chart('prize', record_df.head(10), x='final_position', y='prize_money_tugrik',
+                          color='prize_money_tugrik')
+        plotly_chart(fig_prize, 'prize', use_container_width=True)
     
     # Дэлгэрэнгүй уралдааны үр дүнгийн хүснэгт
     st.markdown("### 📊 Дэлгэрэнгүй Уралдааны Үр Дүн")
     
+    # Бүх уралдааны үр дүнг хамтад нь шүүж болно
+    source = records
+    if all_records is not None and st.checkbox("🌐 Бүх уралдааны үр дүн"):
+        source = all_records
+    if sql is not None:
+        query = load_sql_results(source.version, None if source is all_records else race, sql)
+    else:
+        query = load_results_query(source.version, source)
+    
     # Шүүлтүүр нэмэх
+    speed_min, speed_max = query.speed_range()
     col1, col2, col3 = st.columns(3)
     with col1:
-        position_filter = st.selectbox("Байрлалаар Шүүх", 
-                                     ["Бүгд", "Эхний 10", "Эхний 20", "Сүүлийн 10"])
+        position_filter = st.selectbox("Байрлалаар Шүүх", POSITION_FILTERS)
     with col2:
         speed_filter = st.slider("Хамгийн Багадаа Дундаж Хурд (км/ц)", 
-                               float(record_df['average_speed_kmh'].min()),
-                               float(record_df['average_speed_kmh'].max()),
-                               float(record_df['average_speed_kmh'].min()))
+                               speed_min,
+                               speed_max,
+                               speed_min)
     with col3:
         weather_filter = st.selectbox("Цаг Агаарын Нөхцөл", 
-                                    ["Бүгд"] + list(record_df['weather'].unique()))
+                                    [ALL] + query.weathers())
+    
+    # Эрэмбэлэлт болон хуудаслалт
+    sort_labels = {
+        'final_position': "Байрлал",
+        'average_speed_kmh': "Дундаж Хурд",
+        'max_speed_kmh': "Хамгийн Өндөр Хурд",
+        'prize_money_tugrik': "Шагнал",
+        'horse_id': "Морь",
+    }
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        sort_by = st.selectbox("Эрэмбэлэх", list(sort_labels), format_func=sort_labels.get)
+    with col2:
+        ascending = st.toggle("Өсөхөөр", value=True)
+    with col3:
+        page_size = st.selectbox("Хуудасны Хэмжээ", [25, 50, 100, 200], index=1)
+    
+    # Шүүлтүүрүүдийг нэг маск болгон хэрэглэж, зөвхөн нэг хуудсыг авна
+    with span("filter_results", rows=len(query)):
+        mask = query.mask(position_filter, speed_filter, weather_filter)
+        total = query.count(mask)
+    pages = max(1, -(-total // page_size))
+    # Шүүлтүүр өөрчлөгдөхөд эхний хуудас руу буцна
+    page = st.number_input(
+        "Хуудас", min_value=1, max_value=pages, value=1,
+        key=f"results_page_{source.version}_{position_filter}_{speed_filter}_{weather_filter}_{page_size}"
+    ) - 1
+    with span("page_results", rows=total):
+        window, total = query.window(mask, sort_by, ascending, page, page_size)
+    st.caption(f"Нийт {total:,} илэрц · {page + 1}/{pages} хуудас")
     
-    # Шүүлтүүр хэрэглэх
-    filtered_df = record_df.copy()
+    # Үр дүнг харуулах
+    display_cols = ['final_position', 'horse_id', 'finish_time_minutes', 'finish_time_seconds', 
+                   'average_speed_kmh', 'max_speed_kmh', 'prize_money_tugrik']
+    if source is all_records:
+        display_cols.insert(0, 'race_name')
+    
+    # Форматлалтыг зөвхөн харагдах хуудсанд хийнэ
+    window = window.assign(prize_money_tugrik=window['prize_money_tugrik'].map('₮{:,.0f}'.format))
+    
+    with span("table:results", rows=len(window)):
+        st.dataframe(
+            window[display_cols],
+            column_config={
+                'race_name': st.column_config.TextColumn("Уралдаан"),
+                'final_position': st.column_config.NumberColumn("Байрлал"),
+                'horse_id': st.column_config.TextColumn("Морь"),
+                'finish_time_minutes': st.column_config.NumberColumn("Минут"),
+                'finish_time_seconds': st.column_config.NumberColumn("Секунд"),
+                'average_speed_kmh': st.column_config.NumberColumn("Дундаж Хурд (км/ц)", format="%.2f"),
+                'max_speed_kmh': st.column_config.NumberColumn("Хамгийн Өндөр Хурд (км/ц)", format="%.2f"),
+                'prize_money_tugrik': st.column_config.TextColumn("Шагнал"),
+            },
+            hide_index=True,
+            use_container_width=True
+        )
+
+@timed("figure:position")
+def build_position_figure(current_data, current_time):
+    """Байрлалын хяналтын баганан диаграм"""
+    fig_pos = chart(
+        'position',
+        current_data.sort_values('position'),
+        x='horse_id',
+        y='distance_covered_km',
+        color='position',
+        title=f"🏁 Одоогийн Байрлал (Цаг: {current_time//60}:{current_time%60:02d})"
+    )
+    fig_pos.update_layout(showlegend=False)
+    return fig_pos
+
+def format_clock(seconds):
+    """Секундийг м:сс хэлбэрт (тодорхойгүй бол —)"""
+    if pd.isna(seconds):
+        return "—"
+    return f"{int(seconds) // 60}:{int(seconds) % 60:02d}"
+
+def render_live_snapshot(current_data, current_time, path_trace, fig_pos=None, stats=None):
+    """Нэг агшны байрлал, шууд үзүүлэлт болон газрын зургийг зурах"""
     
-    if position_filter == "Эхний 10":
-        filtered_df = filtered_df[filtered_df['final_position'] <= 10]
-    elif position_filter == "Эхний 20":
-        filtered_df = filtered_df[filtered_df['final_position'] <= 20]
-    elif position_filter == "Сүүлийн 10":
-        filtered_df = filtered_df[filtered_df['final_position'] > 40]
+    # Уралдааны явц
+    col1, col2 = st.columns([2, 1])
     
-    filtered_df = filtered_df[filtered_df['average_speed_kmh'] >= speed_filter]
+    with col1:
+        # Байрлалын хяналт
+        if fig_pos is None:
+            fig_pos = build_position_figure(current_data, current_time)
+        plotly_chart(fig_pos, 'position', use_container_width=True)
     
-    if weather_filter != "Бүгд":
-        filtered_df = filtered_df[filtered_df['weather'] == weather_filter]
+    with col2:
+        st.markdown("### 📊 Шууд Үзүүлэлт")
+        # Гүйлгэх статистик (EWMA хурд, зүрхний дээд, хурдац, зөрүү) - түүхийг дахин уншихгүй
+        if stats is not None and not stats.empty:
+            current_data = current_data.merge(stats, on='horse_id', how='left')
+        for _, horse in current_data.iterrows():
+            with st.container():
+                st.markdown(f"**{horse['horse_id']}** (Байр: {horse['position']})")
+                ewma = horse.get('ewma_speed_kmh')
+                st.metric(
+                    "Хурд", 
+                    f"{horse['current_speed_kmh']:.1f} км/ц",
+                    delta=None if ewma is None or pd.isna(ewma) else f"{horse['current_speed_kmh'] - ewma:.1f}",
+                    help="Дундаж (EWMA) хурдтай харьцуулсан өөрчлөлт"
+                )
+                if 'gap_seconds' in horse:
+                    heart = "" if pd.isna(horse['heart_rate_max']) else f"💓 Дээд: {horse['heart_rate_max']:.0f} · "
+                    st.caption(f"{heart}⏱️ Сүүлийн км: {format_clock(horse['pace_last_km_seconds'])} · "
+                               f"🏁 Тооцоолсон: {format_clock(horse['projected_finish_seconds'])} · "
+                               f"Зөрүү: +{horse['gap_seconds']:.0f}с ({horse['gap_km']:.2f} км)")
+                # Зөвхөн GPS-тэй трекерт эрчим хүчний түвшин байхгүй
+                if pd.notna(horse.get('energy_level')):
+                    st.progress(horse['energy_level']/100)
+                st.markdown("---")
     
-    # Үр дүнг харуулах
-    display_cols = ['final_position', 'horse_id', 'finish_time_minutes', 'finish_time_seconds', 
-                   'average_speed_kmh', 'max_speed_kmh', 'prize_money_tugrik']
+    # Уралдааны газрын зураг
+    if 'latitude' in current_data.columns and 'longitude' in current_data.columns:
+        st.markdown("### 🗺️ Шууд Уралдааны Газрын Зураг")
+        
+        fig_map = chart(
+            'live_map',
+            current_data,
+            lat='latitude',
+            lon='longitude',
+            size='current_speed_kmh',
+            color='position',
+            hover_name='horse_id',
+            hover_data=[col for col in ['current_speed_kmh', 'heart_rate', 'energy_level']
+                        if has_values(current_data, col)],
+            zoom=MAP_ZOOM
+        )
+        
+        # Уралдааны замын шугам нэмэх (хялбарчилсан, нэг trace)
+        fig_map.add_trace(path_trace)
+        
+        plotly_chart(fig_map, 'live_map', use_container_width=True)
+
+@timed()
+def render_live_history(time_data):
+    """Хурд болон зүрхний цохилтыг цаг хугацаагаар зурах"""
+    
+    # Зүрхний цохилтгүй (зөвхөн GPS) бол хурдыг бүтэн өргөнөөр
+    if not has_values(time_data, 'heart_rate'):
+        fig_speed = chart('live_speed', time_data, x='timestamp_seconds', y='current_speed_kmh', color='horse_id')
+        plotly_chart(fig_speed, 'live_speed', use_container_width=True)
+        return
     
-    st.dataframe(
-        filtered_df[display_cols].style.format({
-            'average_speed_kmh': '{:.2f}',
-            'max_speed_kmh': '{:.2f}',
-            'prize_money_tugrik': '₮{:,.0f}'
-        }),
-        use_container_width=True
-    )
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        # Хурдны хяналт
+        fig_speed = chart('live_speed', time_data, x='timestamp_seconds', y='current_speed_kmh', color='horse_id')
+        plotly_chart(fig_speed, 'live_speed', use_container_width=True)
+    
+    with col2:
+        # Зүрхний цохилтын хяналт
+        fig_hr = chart('live_heart_rate', time_data, x='timestamp_seconds', y='heart_rate', color='horse_id')
+        plotly_chart(fig_hr, 'live_heart_rate', use_container_width=True)
+
+def live_stream_view(path=r"data/live.csv", race_km=None, course=None):
+    """Файлын сүүлд нэмэгдэж буй телеметрийг цагираг буферээр дамжуулан харуулах"""
+    
+    # Сесс бүр өөрийн курсортой: зөвхөн шинээр нэмэгдсэн мөрүүдийг уншина
+    if 'live_feed' not in st.session_state:
+        positions = PositionEngine(course) if course is not None else None
+        st.session_state.live_feed = LiveFeed(FileTailSource(path), race_km=race_km, positions=positions)
+    feed = st.session_state.live_feed
+    
+    auto_refresh = st.checkbox("🔁 Автомат Шинэчлэл", value=True)
+    
+    @profiled("📡 Шууд Дамжуулал")
+    def stream_frame():
+        with span("poll") as item:
+            new_rows = feed.poll()
+            item.rows = len(new_rows)
+        st.caption(f"Шинэ мөр: {len(new_rows)} · Нийт хүлээн авсан: {feed.total_rows} · "
+                   f"Морь: {len(feed.buffers)}")
+        
+        current_data = feed.snapshot()
+        if current_data.empty:
+            st.warning("Шууд дамжуулалаас өгөгдөл ирээгүй байна.")
+            return
+        current_time = int(current_data['timestamp_seconds'].max())
+        time_data = feed.history()
+        render_live_snapshot(current_data, current_time,
+                             frame_path_trace(time_data, showlegend=False), stats=feed.rolling())
+        render_live_history(time_data)
+    
+    # Зөвхөн энэ хэсэг л шинэчлэгдэнэ, бүх скрипт дахин ажиллахгүй
+    st.fragment(stream_frame, run_every=2 if auto_refresh else None)()
 
-def live_race_simulation(live_df, record_df):
-    """Шууд уралдааны дүрслэл - анимацитай"""
+def replay_animation_view(live):
+    """Хөтөч дээр тоглогдох анимаци - сервер нэг удаа л зураг бүтээнэ"""
+    
+    live_index = load_live_index(live.version, live)
+    path_cache = load_path_cache(live.version, live_index)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        speed = st.select_slider("Тоглуулах Хурд (x)", [10, 30, 60, 120, 300], value=60)
+    with col2:
+        step = st.select_slider("Алхам (секунд)", [10, 30, 60], value=30)
+    frame_ms = int(max(step / speed, 0.1) * 1000)
+    
+    with st.spinner("Анимаци бэлтгэж байна..."):
+        fig_json = replay_animation(live.version, step, frame_ms, live_index, path_cache)
+    st.caption(f"Фрэйм: {len(replay_times(live_index.max_time, step))} · "
+               f"Зургийн хэмжээ: {len(fig_json) / 1024:.0f} КБ")
+    plotly_chart(pio.from_json(fig_json), 'replay', use_container_width=True)
+
+def live_race_simulation(live, records, sql=None, race=None):
+    """Шууд уралдааны дүрслэл - анимацитай.
+
+    sql (SqlStore) өгвөл бичлэгийн тоглуулалт фрэйм бүрийн мөрийг цаг, морины шүүлттэй
+    SQL асуулгаар авна (уралдааны телеметрийг бүтнээр ачаалахгүй).
+    """
     
     st.markdown('<h2 class="sub-header">📡 Шууд Уралдааны Дүрслэл - Шилдэг 5 Морь</h2>', unsafe_allow_html=True)
     
+    source = st.radio("Өгөгдлийн Эх Сурвалж", ["📼 Бичлэг", "🎞️ Хөдөлгөөнт Бичлэг", "📡 Шууд Дамжуулал"],
+                      horizontal=True)
+    distances = records.column('distance_km')
+    race_km = float(distances.iloc[0]) if len(distances) else None
+    if source == "📡 Шууд Дамжуулал":
+        live_stream_view(race_km=race_km, course=load_course(live.version, live) if len(live) else None)
+        return
+    if len(live) == 0:
+        st.warning("Энэ уралдаанд шууд өгөгдөл бичигдээгүй байна.")
+        return
+    if source == "🎞️ Хөдөлгөөнт Бичлэг":
+        replay_animation_view(live)
+        return
+    
+    if sql is not None:
+        live_index = load_sql_live(live.version, race, sql)
+    else:
+        live_index = load_live_index(live.version, live)
+    max_time = live_index.max_time
+    
+    # Тоглуулагчийн төлөв (уралдаан солигдвол байрлалыг шинэ төгсгөлд багтаана)
+    if 'playback' not in st.session_state:
+        st.session_state.playback = PlaybackClock(end=max_time)
+    playback = st.session_state.playback
+    playback.end = max_time
+    if playback.position > max_time:
+        playback.seek(max_time)
+    
     # Удирдлагын самбар
-    col1, col2, col3 = st.columns(3)
+    col1, col2, col3, col4, col5 = st.columns(5)
     
     with col1:
         if st.button("▶️ Дүрслэл Эхлүүлэх", type="primary"):
-            st.session_state.simulation_running = True
-            st.session_state.current_timestamp = 0
+            playback.seek(0)
+            playback.start()
     
     with col2:
         if st.button("⏸️ Зогсоох"):
-            st.session_state.simulation_running = False
+            playback.pause()
     
     with col3:
         if st.button("🔄 Дахин Эхлэх"):
-            st.session_state.simulation_running = False
-            st.session_state.current_timestamp = 0
+            playback.pause()
+            playback.seek(0)
+    
+    with col4:
+        playback.speed = st.select_slider("Тоглуулах Хурд (x)", [10, 30, 60, 120, 300], value=30)
     
-    # Session state эхлүүлэх
-    if 'simulation_running' not in st.session_state:
-        st.session_state.simulation_running = False
-    if 'current_timestamp' not in st.session_state:
-        st.session_state.current_timestamp = 0
+    with col5:
+        playback.step = st.select_slider("Алхам (секунд)", [1, 10, 30, 60], value=60)
     
-    # Цагийн сонголт
-    max_time = live_df['timestamp_seconds'].max()
+    frame_cache = load_frame_cache(live.version, race_km, live_index)
+    if st.checkbox("⚡ Бүх фрэймийг урьдчилан бэлтгэх"):
+        frame_cache.precompute(range(0, max_time + 1, playback.step))
+        st.caption(f"Кэшлэгдсэн фрэйм: {len(frame_cache)} · "
+                   f"{frame_cache.nbytes / 1024 / 1024:.1f} МБ"
+                   + (" · бэлтгэж байна..." if frame_cache.precomputing else ""))
+    
+    # Цагийн сонголт (гулсуурыг хөдөлгөвөл тухайн цаг руу шилжинэ)
     current_time = st.slider(
         "Уралдааны Цаг (секунд)", 
         0, int(max_time), 
-        int(st.session_state.current_timestamp),
-        step=60
+        int(playback.position),
+        step=playback.step
     )
+    if current_time != playback.position:
+        playback.seek(current_time)
+    
+    path_cache = load_path_cache(live.version, live_index)
+    
+    @profiled("📼 Бичлэг")
+    def playback_frame():
+        frame_time = playback.tick()
+        with span("frame_cache") as item:
+            frame = frame_cache.get(frame_time)
+            item.rows = len(frame.snapshot)
+        if len(frame.snapshot) == 0:
+            st.warning("Сонгосон цагт өгөгдөл байхгүй байна.")
+            return
+        path_trace = combined_path_trace(path_cache, live_index.horse_ids, frame_time, showlegend=False)
+        render_live_snapshot(frame.snapshot, frame_time, path_trace, pio.from_json(frame.figure_json),
+                             stats=frame.stats)
+        if playback.dropped:
+            st.caption(f"⏭️ Ачааллаас болж {playback.dropped} фрэйм алгассан")
+        if playback.finished:
+            # Төгсгөлд хүрэхэд нэг удаа бүтэн дахин ажиллуулж таймерыг зогсооно
+            playback.finished = False
+            st.rerun()
     
-    # Одоогийн өгөгдөл авах
-    current_data = live_df[live_df['timestamp_seconds'] == current_time]
+    # Тоглуулж байх үед зөвхөн байрлал, үзүүлэлт, газрын зураг шинэчлэгдэнэ
+    st.fragment(playback_frame, run_every=playback.interval if playback.running else None)()
     
-    if len(current_data) > 0:
-        # Уралдааны явц
-        col1, col2 = st.columns([2, 1])
-        
-        with col1:
-            # Байрлалын хяналт
-            fig_pos = px.bar(
-                current_data.sort_values('position'),
-                x='horse_id',
-                y='distance_covered_km',
-                color='position',
-                title=f"🏁 Одоогийн Байрлал (Цаг: {current_time//60}:{current_time%60:02d})",
-                labels={'distance_covered_km': 'Туулсан Зай (км)'},
-                color_continuous_scale='RdYlBu'
-            )
-            fig_pos.update_layout(showlegend=False)
-            st.plotly_chart(fig_pos, use_container_width=True)
-        
-        with col2:
-            st.markdown("### 📊 Шууд Үзүүлэлт")
-            for _, horse in current_data.iterrows():
-                with st.container():
-                    st.markdown(f"**{horse['horse_id']}** (Байр: {horse['position']})")
-                    st.metric(
-                        "Хурд", 
-                        f"{horse['current_speed_kmh']:.1f} км/ц",
-                        delta=f"{horse['current_speed_kmh'] - 30:.1f}"
-                    )
-                    st.progress(horse['energy_level']/100)
-                    st.markdown("---")
-        
-        # Хурд болон зүрхний цохилт цаг хугацаагаар
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            # Хурдны хяналт
-            time_data = live_df[live_df['timestamp_seconds'] <= current_time]
-            fig_speed = px.line(
-                time_data,
-                x='timestamp_seconds',
-                y='current_speed_kmh',
-                color='horse_id',
-                title="🚀 Цаг Хугацаагаар Хурд",
-                labels={'timestamp_seconds': 'Цаг (секунд)', 'current_speed_kmh': 'Хурд (км/ц)'}
-            )
-            st.plotly_chart(fig_speed, use_container_width=True)
-        
-        with col2:
-            # Зүрхний цохилтын хяналт
-            fig_hr = px.line(
-                time_data,
-                x='timestamp_seconds',
-                y='heart_rate',
-                color='horse_id',
-                title="💓 Цаг Хугацаагаар Зүрхний Цохилт",
-                labels={'timestamp_seconds': 'Цаг (секунд)', 'heart_rate': 'Зүрхний Цохилт (мин-д)'}
-            )
-            st.plotly_chart(fig_hr, use_container_width=True)
-        
-        # Уралдааны газрын зураг
-        if 'latitude' in current_data.columns and 'longitude' in current_data.columns:
-            st.markdown("### 🗺️ Шууд Уралдааны Газрын Зураг")
-            
-            fig_map = px.scatter_mapbox(
-                current_data,
-                lat='latitude',
-                lon='longitude',
-                size='current_speed_kmh',
-                color='position',
-                hover_name='horse_id',
-                hover_data=['current_speed_kmh', 'heart_rate', 'energy_level'],
-                mapbox_style='open-street-map',
-                zoom=10,
-                title="Замд Морьдын Байрлал"
-            )
-            
-            # Уралдааны замын шугам нэмэх
-            if len(time_data) > 0:
-                for horse_id in time_data['horse_id'].unique():
-                    horse_path = time_data[time_data['horse_id'] == horse_id]
-                    fig_map.add_trace(go.Scattermapbox(
-                        lat=horse_path['latitude'],
-                        lon=horse_path['longitude'],
-                        mode='lines',
-                        name=f"{horse_id} зам",
-                        line=dict(width=2),
-                        showlegend=False
-                    ))
-            
-            st.plotly_chart(fig_map, use_container_width=True)
-        
-        # Автомат дүрслэлийн үргэлжлэл
-        if st.session_state.simulation_running and current_time < max_time:
-            time.sleep(2)
-            st.session_state.current_timestamp = min(current_time + 60, max_time)
-            st.rerun()
+    with span("history") as item:
+        history = live_index.history_from(frame_cache.get(playback.position).stops)
+        item.rows = len(history)
+    render_live_history(history)
     
-    else:
-        st.warning("Сонгосон цагт өгөгдөл байхгүй байна.")
+    # Харагдаж буй түүхийг (сонгосон цаг хүртэл, уламжилсан багануудтай) экспортлох
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        fmt = st.selectbox("Экспортын Формат", FORMATS, key="history_export_format")
+    with col2:
+        st.download_button(f"⬇️ {playback.position} сек хүртэлх түүхийг татах ({len(history):,} мөр)",
+                           functools.partial(export_frame, history, fmt),
+                           file_name=f"live-{int(playback.position)}s.{fmt}", mime=MIME_TYPES[fmt])
 
-def horse_trainer_profile(horses_df, trainers_df, record_df):
+def horse_trainer_profile(horses, trainers, records, sql=None):
     """Морь ба Сургагчийн Хувийн Мэдээллийн Самбар"""
     
+    version = data_version(horses, trainers, records)
+    if sql is not None:
+        entities = load_sql_entities(version, sql)
+        horse_search, trainer_search = entities.search_indexes()
+    else:
+        entities = load_entity_index(version, horses, trainers, records)
+        horse_search, trainer_search = load_search_indexes(version, entities)
+    
     st.markdown('<h2 class="sub-header">🐎 Морь ба Уяачийн Хувийн Мэдээлэл</h2>', unsafe_allow_html=True)
     
     profile_type = st.selectbox("Хувийн Мэдээллийн Төрөл", ["Морины Хувийн Мэдээлэл", "Уяачийн Хувийн Мэдээлэл"])
     
     if profile_type == "Морины Хувийн Мэдээлэл":
         # Морь сонгох
-        horse_options = horses_df['horse_id'].tolist()
-        selected_horse = st.selectbox("Морь Сонгох", horse_options)
+        def horse_label(horse_id):
+            horse = entities.horse(horse_id)
+            return f"{horse_id} · {horse['rider_name']} · {horse['aimag']}"
+        
+        selected_horse = search_picker("Морь", horse_search, horse_label, key="horse_picker")
         
         if selected_horse:
-            horse_info = horses_df[horses_df['horse_id'] == selected_horse].iloc[0]
+            horse_info = entities.horse(selected_horse)
             
             # Морины дэлгэрэнгүй мэдээлэл
             col1, col2, col3 = st.columns(3)
@@ -619,9 +866,8 @@ def horse_trainer_profile(horses_df, trainers_df, record_df):
             
             with col2:
                 # Сургагчийн мэдээлэл
-                trainer_info = trainers_df[trainers_df['trainer_id'] == horse_info['trainer_id']]
-                if not trainer_info.empty:
-                    trainer = trainer_info.iloc[0]
+                trainer = entities.trainer(horse_info['trainer_id'])
+                if trainer is not None:
                     st.markdown(f"""
                     <div class="race-card">
                     <h3>👨‍🏫 Уяачийн Мэдээлэл</h3>
@@ -632,10 +878,11 @@ def horse_trainer_profile(horses_df, trainers_df, record_df):
                     """, unsafe_allow_html=True)
             
             # Уралдааны гүйцэтгэл (боломжтой бол)
-            race_performance = record_df[record_df['horse_id'] == selected_horse]
+            race_performance = entities.horse_records(selected_horse).sort_values('date', ascending=False)
             if not race_performance.empty:
                 st.markdown("### 🏁 Уралдааны Гүйцэтгэл")
                 perf = race_performance.iloc[0]
+                st.caption(f"Сүүлийн уралдаан: {perf['race_name']} ({perf['date']})")
                 
                 col1, col2, col3, col4 = st.columns(4)
                 with col1:
@@ -646,13 +893,24 @@ def horse_trainer_profile(horses_df, trainers_df, record_df):
                     st.metric("Хамгийн Өндөр Хурд", f"{perf['max_speed_kmh']:.2f} км/ц")
                 with col4:
                     st.metric("Хожсон Шагнал", f"₮{perf['prize_money_tugrik']:,.0f}")
+                
+                # Бүх уралдааны түүх
+                if len(race_performance) > 1:
+                    st.dataframe(
+                        race_performance[['date', 'race_name', 'final_position', 'average_speed_kmh',
+                                          'prize_money_tugrik']],
+                        use_container_width=True, hide_index=True
+                    )
     
     else:  # Сургагчийн Хувийн Мэдээлэл
-        trainer_options = trainers_df['trainer_name'].tolist()
-        selected_trainer = st.selectbox("Уяач Сонгох", trainer_options)
+        selected_trainer = search_picker(
+            "Уяач", trainer_search,
+            lambda trainer_id: f"{entities.trainer(trainer_id)['trainer_name']} ({trainer_id})",
+            key="trainer_picker"
+        )
         
         if selected_trainer:
-            trainer_info = trainers_df[trainers_df['trainer_name'] == selected_trainer].iloc[0]
+            trainer_info = entities.trainer(selected_trainer)
             
             # Сургагчийн дэлгэрэнгүй мэдээлэл
             col1, col2, col3 = st.columns(3)
@@ -660,7 +918,7 @@ def horse_trainer_profile(horses_df, trainers_df, record_df):
             with col1:
                 st.markdown(f"""
                 <div class="race-card">
-                <h3>👨‍🏫 {selected_trainer}</h3>
+                <h3>👨‍🏫 {trainer_info['trainer_name']}</h3>
                 <p><strong>ID:</strong> {trainer_info['trainer_id']}</p>
                 <p><strong>Утас:</strong> {trainer_info['phone_number']}</p>
                 </div>
@@ -686,7 +944,7 @@ def horse_trainer_profile(horses_df, trainers_df, record_df):
                 """, unsafe_allow_html=True)
             
             # Сургагчийн морьд
-            trainer_horses = horses_df[horses_df['trainer_id'] == trainer_info['trainer_id']]
+            trainer_horses = entities.trainer_horses(trainer_info['trainer_id'])
             
             if not trainer_horses.empty:
                 st.markdown("### 🐎 Сургасан Морьд")
@@ -697,27 +955,21 @@ def horse_trainer_profile(horses_df, trainers_df, record_df):
                 with col1:
                     # Сургасан морьдын насны тархалт
                     age_dist = trainer_horses['age'].value_counts().sort_index()
-                    fig_age = px.bar(
-                        x=age_dist.index,
-                        y=age_dist.values,
-                        title="Сургасан Морьдын Насны Тархалт",
-                        labels={'x': 'Нас (Жил)', 'y': 'Морины Тоо'}
-                    )
-                    st.plotly_chart(fig_age, use_container_width=True)
+                    fig_age = chart('trainer_ages', x=age_dist.index, y=age_dist.values)
+                    plotly_chart(fig_age, 'trainer_ages', use_container_width=True)
                 
                 with col2:
                     # Амжилтын тархалт
-                    fig_achievements = px.scatter(
+                    fig_achievements = chart(
+                        'achievements',
                         trainer_horses,
                         x='aimgiin_airag',
                         y='ulsiin_airag',
                         size='total_achievement',
                         color='age',
-                        title="Морьдын Амжилт",
-                        labels={'aimgiin_airag': 'Аймгийн Шагнал', 'ulsiin_airag': 'Үндэсний Шагнал'},
                         hover_data=['horse_id']
                     )
-                    st.plotly_chart(fig_achievements, use_container_width=True)
+                    plotly_chart(fig_achievements, 'achievements', use_container_width=True)
                 
                 # Дэлгэрэнгүй морьдын жагсаалт
                 st.dataframe(
@@ -725,23 +977,36 @@ def horse_trainer_profile(horses_df, trainers_df, record_df):
                     use_container_width=True
                 )
 
-def geospatial_dashboard(live_df, record_df):
+# Нүдний өнгөөр харуулах үзүүлэлтүүд
+CELL_METRICS = {
+    'mean_speed_kmh': "Дундаж Хурд (км/ц)",
+    'mean_elevation_m': "Дундаж Өндөр (м)",
+    'horses': "Морины Тоо",
+    'points': "Цэгийн Тоо",
+}
+
+def geospatial_dashboard(live, records, sql=None, race=None):
     """Газарзүйн уралдааны шинжилгээний самбар"""
     
     st.markdown('<h2 class="sub-header">🗺️ Газарзүйн Уралдааны Шинжилгээ</h2>', unsafe_allow_html=True)
     
-    if 'latitude' not in live_df.columns or 'longitude' not in live_df.columns:
+    if 'latitude' not in live.columns or 'longitude' not in live.columns or len(live) == 0:
         st.warning("Одоогийн өгөгдлийн санд газарзүйн өгөгдөл байхгүй байна.")
         return
     
+    if sql is not None:
+        live_index = load_sql_live(live.version, race, sql)
+    else:
+        live_index = load_live_index(live.version, live)
+    
     # Газрын зургийн удирдлага
     col1, col2, col3 = st.columns(3)
     
     with col1:
         selected_horses = st.multiselect(
             "Харуулах Морьдыг Сонгох",
-            live_df['horse_id'].unique(),
-            default=live_df['horse_id'].unique()[:3]
+            live_index.horse_ids,
+            default=live_index.horse_ids[:3]
         )
     
     with col2:
@@ -752,67 +1017,92 @@ def geospatial_dashboard(live_df, record_df):
     
     with col3:
         show_elevation = st.checkbox("Өндрийн Профайл Харуулах", value=True)
+        zoom = st.slider("Томруулалт", 6, 16, MAP_ZOOM)
     
     if selected_horses:
-        filtered_live = live_df[live_df['horse_id'].isin(selected_horses)]
+        with span("horses_frame") as item:
+            filtered_live = live_index.horses_frame(selected_horses)
+            item.rows = len(filtered_live)
+        # Зөвхөн GPS-тэй трекерт өндөр байхгүй - өндрийн самбар, үзүүлэлтийг нууна
+        has_elevation = has_values(filtered_live, 'elevation_m')
+        metrics = [metric for metric in CELL_METRICS if has_elevation or metric != 'mean_elevation_m']
         
         # Үндсэн уралдааны замын газрын зураг
         st.markdown("### 🏁 Бүрэн Уралдааны Зам")
         
-        fig_map = px.scatter_mapbox(
-            filtered_live,
-            lat='latitude',
-            lon='longitude',
-            color='horse_id',
-            size='current_speed_kmh',
-            hover_data=['timestamp_seconds', 'current_speed_kmh', 'heart_rate', 'position'],
-            mapbox_style=map_style,
-            zoom=10,
-            height=600,
-            title="Морьдын Хөдөлгөөнтэй Уралдааны Зам"
-        )
+        # Олон цэгтэй үед анхдагчаар нүдээр нэгтгэнэ: хөтөч рүү нүдний тоогоор л өгөгдөл явна
+        modes = ["📍 Цэгүүд", "⬡ Зургаан Өнцөгт Нүд", "🔥 Нягтрал"]
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            map_mode = st.radio("Газрын Зургийн Горим", modes, horizontal=True,
+                                index=0 if len(filtered_live) <= POINT_LIMIT else 1)
+        with col2:
+            cell_metric = st.selectbox("Нүдний Үзүүлэлт", metrics, format_func=CELL_METRICS.get,
+                                       disabled=map_mode == modes[0])
+        
+        with span("figure:map", rows=len(filtered_live)):
+            if map_mode == modes[0]:
+                fig_map = chart(
+                    'map',
+                    filtered_live,
+                    lat='latitude',
+                    lon='longitude',
+                    color='horse_id',
+                    size='current_speed_kmh',
+                    hover_data=[col for col in ['timestamp_seconds', 'current_speed_kmh', 'heart_rate', 'position']
+                                if has_values(filtered_live, col)],
+                    mapbox_style=map_style,
+                    zoom=zoom
+                )
+            else:
+                cells, geojson = load_hex_cells(live.version, tuple(selected_horses), zoom, live_index)
+                center = dict(lat=float(filtered_live['latitude'].mean()), lon=float(filtered_live['longitude'].mean()))
+                hover_data = {'mean_speed_kmh': ':.1f', 'mean_elevation_m': ':.0f', 'horses': True, 'points': True}
+                if not has_elevation:
+                    del hover_data['mean_elevation_m']
+                if map_mode == modes[1]:
+                    fig_map = chart(
+                        'hex_map', cells, geojson=geojson, locations='cell_id', color=cell_metric,
+                        hover_data=hover_data, labels=CELL_METRICS, mapbox_style=map_style, zoom=zoom,
+                        center=center,
+                        title=f"Нүдээр Нэгтгэсэн Зам ({len(cells):,} нүд · {len(filtered_live):,} цэг)"
+                    )
+                    fig_map.update_traces(marker_line_width=0)
+                else:
+                    fig_map = chart(
+                        'density_map', cells, lat='latitude', lon='longitude', z=cell_metric,
+                        hover_data=hover_data, labels=CELL_METRICS, mapbox_style=map_style,
+                        zoom=zoom, center=center,
+                        title=f"Нягтралын Зураг ({len(cells):,} нүд · {len(filtered_live):,} цэг)"
+                    )
         
-        # Уралдааны замын шугам нэмэх
-        for horse_id in selected_horses:
-            horse_data = filtered_live[filtered_live['horse_id'] == horse_id].sort_values('timestamp_seconds')
-            fig_map.add_trace(go.Scattermapbox(
-                lat=horse_data['latitude'],
-                lon=horse_data['longitude'],
-                mode='lines',
-                name=f"{horse_id} зам",
-                line=dict(width=3),
-                showlegend=True
+            # Уралдааны замын шугам нэмэх (томруулалтад тохирсон хялбарчлалтай, нэг trace)
+            fig_map.add_trace(combined_path_trace(
+                load_path_cache(live.version, live_index), selected_horses, zoom=zoom,
+                line=dict(width=3), showlegend=True
             ))
         
-        st.plotly_chart(fig_map, use_container_width=True)
+        plotly_chart(fig_map, 'map', use_container_width=True)
         
         # Хурд болон өндрийн шинжилгээ
-        if show_elevation:
+        if show_elevation and not has_elevation:
+            fig_speed_time = chart('speed', filtered_live, x='timestamp_seconds',
+                                   y='current_speed_kmh', color='horse_id')
+            plotly_chart(fig_speed_time, 'speed', use_container_width=True)
+        elif show_elevation:
             col1, col2 = st.columns(2)
             
             with col1:
                 # Морь тус бүрийн хурд ба цаг
-                fig_speed_time = px.line(
-                    filtered_live,
-                    x='timestamp_seconds',
-                    y='current_speed_kmh',
-                    color='horse_id',
-                    title="Цаг Хугацаагаар Хурд",
-                    labels={'timestamp_seconds': 'Цаг (секунд)', 'current_speed_kmh': 'Хурд (км/ц)'}
-                )
-                st.plotly_chart(fig_speed_time, use_container_width=True)
+                fig_speed_time = chart('speed', filtered_live, x='timestamp_seconds',
+                                       y='current_speed_kmh', color='horse_id')
+                plotly_chart(fig_speed_time, 'speed', use_container_width=True)
             
             with col2:
                 # Өндрийн профайл
-                fig_elevation = px.line(
-                    filtered_live,
-                    x='distance_covered_km',
-                    y='elevation_m',
-                    color='horse_id',
-                    title="Өндрийн Профайл",
-                    labels={'distance_covered_km': 'Зай (км)', 'elevation_m': 'Өндөр (м)'}
-                )
-                st.plotly_chart(fig_elevation, use_container_width=True)
+                fig_elevation = chart('elevation', filtered_live, x='distance_covered_km',
+                                      y='elevation_m', color='horse_id')
+                plotly_chart(fig_elevation, 'elevation', use_container_width=True)
         
         # Статистикийн шинжилгээ
         st.markdown("### 📊 Газарзүйн Статистик")
@@ -823,12 +1113,48 @@ def geospatial_dashboard(live_df, record_df):
             st.metric("Нийт Зай", f"{filtered_live['distance_covered_km'].max():.1f} км")
         with col2:
             elevation_gain = filtered_live['elevation_m'].max() - filtered_live['elevation_m'].min()
-            st.metric("Өндрийн Өсөлт", f"{elevation_gain:.0f} м")
+            st.metric("Өндрийн Өсөлт", f"{elevation_gain:.0f} м" if has_elevation else "—")
         with col3:
             avg_speed = filtered_live['current_speed_kmh'].mean()
             st.metric("Дундаж Хурд", f"{avg_speed:.1f} км/ц")
 
+def render_debug_panel(metrics):
+    """Хажуугийн гүйцэтгэлийн самбар: энэ дахин зуралтын хэсгүүд болон процессын хуримтлал"""
+    run = active_profile()
+    with st.sidebar.expander("🛠 Гүйцэтгэл", expanded=True):
+        st.caption(f"Энэ зуралт: {run.elapsed * 1000:.0f} мс · Диаграм: {run.bytes / 1024:.0f} КБ")
+        span_config = {
+            'span': st.column_config.TextColumn("Хэсэг"),
+            'ms': st.column_config.NumberColumn("мс", format="%.1f"),
+            'rows': st.column_config.NumberColumn("Мөр"),
+            'kb': st.column_config.NumberColumn("КБ", format="%.0f"),
+        }
+        st.dataframe(run.frame(), column_config=span_config, hide_index=True, use_container_width=True)
+        
+        # Энэ самбарын хуримтлал (фрагментийн шинэчлэлүүд тусдаа харагдацаар бичигдэнэ)
+        summary = metrics.summary()
+        st.caption(f"Процесс: {len(metrics.history)} сүүлийн зуралт")
+        st.dataframe(
+            summary.sort_values('mean_ms', ascending=False),
+            column_config={
+                'view': st.column_config.TextColumn("Харагдац"),
+                'span': st.column_config.TextColumn("Хэсэг"),
+                'count': st.column_config.NumberColumn("Тоо"),
+                'mean_ms': st.column_config.NumberColumn("Дундаж мс", format="%.1f"),
+                'max_ms': st.column_config.NumberColumn("Дээд мс", format="%.1f"),
+                'rows': st.column_config.NumberColumn("Мөр", format="%.0f"),
+                'kb': st.column_config.NumberColumn("КБ", format="%.0f"),
+            },
+            hide_index=True,
+            use_container_width=True
+        )
+        st.download_button("⬇️ Prometheus", metrics.prometheus(), file_name="naadam.prom",
+                           mime="text/plain")
+        if metrics.error:
+            st.caption(f"⚠️ Хэмжилт бичихэд алдаа: {metrics.error}")
+
 # Үндсэн програм
+@profiled("app")
 def main():
     # CSS болон өгөгдөл ачаалах
     load_css()
@@ -836,7 +1162,7 @@ def main():
     st.markdown('<h1 class="main-header">🏇 Наадам 2025 Уралдааны Самбар</h1>', unsafe_allow_html=True)
     
     # Өгөгдөл ачаалах
-    horses_df, trainers_df, record_df, live_df = load_data()
+    (horses, trainers, races), store = load_data()
     
     # Хажуугийн навигаци
     try:
@@ -850,34 +1176,51 @@ def main():
         "Самбар Сонгох",
         ["🏇 Ерөнхий", "🏁 Уралдааны Рэкорд", "📡 Шууд Дүрслэл", "👤 Хувийн Мэдээлэл", "🗺️ Газарзүйн"]
     )
+    label(dashboard)
+    
+    # Уралдааны сонголт - зөвхөн сонгосон хуваалтыг уншина
+    race = st.sidebar.selectbox("Уралдаан Сонгох", races.race_ids, format_func=races.label)
+    records, live = races.race(race)
+    # Сонголтот SQLite хадгалалт (NAADAM_SQLITE): шүүлтүүрүүд индекстэй асуулга болно
+    sql = store.sql if store is not None else None
     
     # Хажуугийн өгөгдлийн хураангуй
     st.sidebar.markdown("## 📊 Өгөгдлийн Хураангуй")
-    st.sidebar.metric("Нийт Морь", len(horses_df))
-    st.sidebar.metric("Нийт Уяач", len(trainers_df))
-    st.sidebar.metric("Уралдааны Оролцогч", len(record_df))
-    #st.sidebar.metric("Шууд Өгөгдлийн Цэг", len(live_df))
+    summary = data_summary(data_version(horses, trainers, records), horses, trainers, records)
+    st.sidebar.metric("Нийт Морь", summary['horses'])
+    st.sidebar.metric("Нийт Уяач", summary['trainers'])
+    st.sidebar.metric("Нийт Уралдаан", len(races))
+    st.sidebar.metric("Уралдааны Оролцогч", summary['records'])
+    #st.sidebar.metric("Шууд Өгөгдлийн Цэг", len(live))
     
     # Үндсэн самбарын агуулга
     if dashboard == "🏇 Ерөнхий":
-        overview_dashboard(horses_df, trainers_df, record_df)
+        overview_dashboard(horses, trainers, races)
     
     elif dashboard == "🏁 Уралдааны Рэкорд":
-        race_record_dashboard(record_df, horses_df)
+        race_record_dashboard(records, horses, races.records, sql, race)
     
     elif dashboard == "📡 Шууд Дүрслэл":
-        live_race_simulation(live_df, record_df)
+        live_race_simulation(live, records, sql, race)
     
     elif dashboard == "👤 Хувийн Мэдээлэл":
-        horse_trainer_profile(horses_df, trainers_df, record_df)
+        horse_trainer_profile(horses, trainers, races.records, sql)
     
     elif dashboard == "🗺️ Газарзүйн":
-        geospatial_dashboard(live_df, record_df)
+        geospatial_dashboard(live, records, sql, race)
     
     # Доод талын мэдээлэл
     st.sidebar.markdown("---")
     st.sidebar.markdown("**🏇 Наадам 2025 Самбар**")
     st.sidebar.markdown(f"Сүүлд шинэчлэгдсэн: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
+    if store is not None and store.reloads:
+        reload = store.reloads[-1]
+        st.sidebar.caption(f"🔄 {reload['table']}: {reload['detail']} "
+                           f"({datetime.fromtimestamp(reload['time']).strftime('%H:%M:%S')})")
+    
+    # Хэмжилтийн самбар (нээлттэй үед диаграмын хэмжээг ч хэмжинэ)
+    if st.sidebar.toggle("🛠 Гүйцэтгэлийн Хэмжилт", key='debug_panel'):
+        render_debug_panel(load_metrics())
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,264 @@
+"""Уралдааны телеметрийг урсгалаар экспортлох, дахин тоглуулах CLI
+
+Хуваалтын Parquet хэсгүүдийг RecordBatch-аар уншина (санах ой уралдааны уртаас үл хамаарна).
+Телеметр цагаар эрэмбэлэгдэж хадгалагддаг тул мөрийн бүлгийн min/max статистикаар
+цагийн цонхноос гадуурх хэсгийг уншилгүй алгасна. Хадгалагдаагүй уламжилсан багана
+(зөвхөн GPS-тэй трекерийн зай, хурд, байр, зөрүү) хэрэгтэй бол самбартай ижил
+LiveIndex-ээр уралдааныг бүтнээр нь уншина.
+
+Ажиллуулах: python export.py --list
+           python export.py --race 0 --format ndjson --speed 30 > race.ndjson
+           python export.py --race 0 --horses М021 М019 --start 60 --end 600 --format arrow --output race.arrows
+           python export.py --race 0 --format csv --speed 1 --socket 127.0.0.1:9000
+"""
+
+import argparse
+import io
+import json
+import socket
+import sys
+import time
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+from live_index import LiveIndex
+from store import DATA_DIR, DERIVED, STORE_DIR, open_store
+
+FORMATS = ('ndjson', 'arrow', 'csv')
+BATCH_SIZE = 64 * 1024
+
+
+def _plain(batch):
+    """Dictionary (ангиллын) баганыг утгын төрөлд нь буулгах - бүх формат, хэсэгт нэг схем"""
+    columns = [pc.cast(column, column.type.value_type) if pa.types.is_dictionary(column.type) else column
+               for column in batch.columns]
+    names = batch.schema.names
+    return pa.RecordBatch.from_arrays(columns, names=names)
+
+
+def iter_batches(paths, columns=None, horses=None, start=None, end=None, batch_size=BATCH_SIZE):
+    """Хуваалтын хэсгүүдээс шүүсэн RecordBatch-ууд цагийн дарааллаар"""
+    value_set = pa.array(list(horses), type=pa.string()) if horses else None
+    for path in paths:
+        parquet = pq.ParquetFile(path)
+        ts_index = parquet.schema_arrow.get_field_index('timestamp_seconds')
+        for group in range(parquet.num_row_groups):
+            stats = parquet.metadata.row_group(group).column(ts_index).statistics
+            if stats is not None and stats.has_min_max and (
+                    (start is not None and stats.max < start) or (end is not None and stats.min > end)):
+                continue
+            for batch in parquet.iter_batches(batch_size, row_groups=[group], columns=columns):
+                batch = _plain(batch)
+                mask = None
+                ts = batch.column('timestamp_seconds')
+                if start is not None:
+                    mask = pc.greater_equal(ts, start)
+                if end is not None:
+                    upper = pc.less_equal(ts, end)
+                    mask = upper if mask is None else pc.and_(mask, upper)
+                if value_set is not None:
+                    member = pc.is_in(batch.column('horse_id'), value_set=value_set)
+                    mask = member if mask is None else pc.and_(mask, member)
+                if mask is not None:
+                    batch = batch.filter(mask)
+                if batch.num_rows:
+                    yield batch
+
+
+def frame_batches(df, batch_size=BATCH_SIZE):
+    """DataFrame-ийг цагийн дарааллаар RecordBatch-ууд болгох"""
+    df = df.sort_values('timestamp_seconds', kind='stable') if 'timestamp_seconds' in df.columns else df
+    for batch in pa.Table.from_pandas(df, preserve_index=False).to_batches(batch_size):
+        yield _plain(batch)
+
+
+def race_columns(table, columns=None):
+    """Экспортлох баганууд (өгөөгүй бол хадгалагдсан ба уламжилсан бүх багана)"""
+    if columns:
+        return list(columns)
+    return list(table.columns) + [col for col in DERIVED['live'] if col not in table.columns]
+
+
+def iter_race(table, columns=None, horses=None, start=None, end=None, batch_size=BATCH_SIZE):
+    """Уралдааны телеметрийн шүүсэн batch-ууд цагийн дарааллаар.
+
+    Бүх багана хадгалагдсан бол Parquet-ээс урсгалаар; уламжилсан багана хэрэгтэй бол
+    самбарын LiveIndex-ээр (history_until) - самбарт харагдах утгатай ижил.
+    """
+    columns = race_columns(table, columns)
+    if set(columns) <= set(table.columns):
+        yield from iter_batches(table.paths, columns, horses, start, end, batch_size)
+        return
+    index = LiveIndex(table.select(list(dict.fromkeys(['horse_id', 'timestamp_seconds'] + columns))))
+    df = index.history_until(index.max_time if end is None else end, horses)
+    if start is not None:
+        df = df[df['timestamp_seconds'] >= start]
+    yield from frame_batches(df[columns], batch_size)
+
+
+def paced(batches, speed, clock=time.monotonic, sleep=time.sleep):
+    """Уралдааны цагийг speed дахин хурдасгаж гаргах (speed <= 0 бол хүлээхгүй)"""
+    origin = None
+    for batch in batches:
+        if speed <= 0:
+            yield batch
+            continue
+        ts = batch.column('timestamp_seconds').to_numpy()
+        # Нэг агшны мөрүүдийг хамт гаргана
+        bounds = np.flatnonzero(np.diff(ts)) + 1
+        for lo, hi in zip(np.concatenate(([0], bounds)), np.concatenate((bounds, [len(ts)]))):
+            if origin is None:
+                origin = (int(ts[lo]), clock())
+            delay = origin[1] + (int(ts[lo]) - origin[0]) / speed - clock()
+            if delay > 0:
+                sleep(delay)
+            yield batch.slice(lo, hi - lo)
+
+
+class NdjsonWriter:
+    def __init__(self, sink, schema):
+        self.sink = sink
+
+    def write(self, batch):
+        lines = "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in batch.to_pylist())
+        self.sink.write(lines.encode('utf-8'))
+        self.sink.flush()
+
+    def close(self):
+        self.sink.flush()
+
+
+class ArrowWriter:
+    def __init__(self, sink, schema):
+        self.sink = sink
+        self.writer = pa.ipc.new_stream(sink, schema)
+
+    def write(self, batch):
+        self.writer.write_batch(batch)
+        self.sink.flush()
+
+    def close(self):
+        self.writer.close()
+
+
+class CsvWriter:
+    def __init__(self, sink, schema):
+        self.sink = sink
+        self.writer = pacsv.CSVWriter(sink, schema)
+
+    def write(self, batch):
+        self.writer.write_batch(batch)
+        self.sink.flush()
+
+    def close(self):
+        self.writer.close()
+
+
+WRITERS = {'ndjson': NdjsonWriter, 'arrow': ArrowWriter, 'csv': CsvWriter}
+MIME_TYPES = {'ndjson': 'application/x-ndjson', 'arrow': 'application/vnd.apache.arrow.stream', 'csv': 'text/csv'}
+
+
+def export(batches, sink, fmt='ndjson'):
+    """Batch-уудыг сонгосон форматаар sink руу урсгах; бичсэн мөрийн тоог буцаана"""
+    writer = None
+    rows = 0
+    try:
+        for batch in batches:
+            if writer is None:
+                writer = WRITERS[fmt](sink, batch.schema)
+            writer.write(batch)
+            rows += batch.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def export_frame(df, fmt='ndjson'):
+    """Самбарт харагдаж буй (шүүсэн, уламжилсан) DataFrame-ийг сонгосон форматын байт болгох"""
+    sink = io.BytesIO()
+    export(frame_batches(df), sink, fmt)
+    return sink.getvalue()
+
+
+def resolve_race(races, value):
+    """--race утгыг (жагсаалтын дугаар эсвэл race_id) race_id болгох"""
+    if value.isdigit() and int(value) < len(races):
+        return races.race_ids[int(value)]
+    if value in races.race_ids:
+        return value
+    raise SystemExit(f"Уралдаан олдсонгүй: {value} (--list ашиглан жагсаалтыг харна уу)")
+
+
+def _open_socket(address):
+    """HOST:PORT дээр сонсож, эхний холбогдсон хэрэглэгч рүү урсгана"""
+    host, port = address.rsplit(':', 1)
+    server = socket.create_server((host, int(port)))
+    print(f"→ {address} дээр холболт хүлээж байна...", file=sys.stderr)
+    conn, peer = server.accept()
+    server.close()
+    print(f"→ {peer[0]}:{peer[1]} холбогдлоо", file=sys.stderr)
+    return conn, conn.makefile('wb')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Уралдааны телеметрийг урсгалаар экспортлох")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--store-dir", default=STORE_DIR)
+    parser.add_argument("--list", action='store_true', help="Уралдааны жагсаалт харуулах")
+    parser.add_argument("--race", default="0", help="Жагсаалтын дугаар эсвэл race_id")
+    parser.add_argument("--horses", nargs='+', help="Зөвхөн эдгээр морь")
+    parser.add_argument("--start", type=int, help="Эхлэх цаг (секунд)")
+    parser.add_argument("--end", type=int, help="Дуусах цаг (секунд)")
+    parser.add_argument("--columns", nargs='+', help="Зөвхөн эдгээр багана")
+    parser.add_argument("--format", choices=FORMATS, default='ndjson')
+    parser.add_argument("--speed", type=float, default=0,
+                        help="Тоглуулах хурд (1 = бодит хугацаа, 0 = хүлээхгүй)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--output", help="Файл руу бичих (өгөхгүй бол stdout)")
+    target.add_argument("--socket", help="HOST:PORT дээр сонсож урсгах")
+    args = parser.parse_args()
+
+    _, _, races = open_store(args.data_dir, args.store_dir)
+    if args.list:
+        for i, race in enumerate(races.race_ids):
+            row = races.summary(race)
+            print(f"{i:3d}  {races.label(race):<48} {row['live_rows']:>10,} мөр  {race}")
+        return
+
+    race = resolve_race(races, args.race)
+    columns = args.columns
+    if columns and 'timestamp_seconds' not in columns:
+        columns = ['timestamp_seconds'] + columns
+    if columns and args.horses and 'horse_id' not in columns:
+        columns = columns + ['horse_id']
+    batches = paced(iter_race(races.table(race, 'live'), columns, args.horses, args.start, args.end,
+                              args.batch_size), args.speed)
+
+    conn = None
+    if args.socket:
+        conn, sink = _open_socket(args.socket)
+    elif args.output:
+        sink = open(args.output, 'wb')
+    else:
+        sink = sys.stdout.buffer
+    try:
+        rows = export(batches, sink, args.format)
+    except (BrokenPipeError, ConnectionResetError):
+        rows = None
+    finally:
+        if sink is not sys.stdout.buffer:
+            sink.close()
+        if conn is not None:
+            conn.close()
+    if rows is not None:
+        print(f"→ {rows:,} мөр", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
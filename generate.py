@@ -0,0 +1,307 @@
+"""Векторжуулсан синтетик өгөгдөл үүсгэгч - ачааллын тестэд зориулсан
+
+Ажиллуулах: python generate.py --horses 100000 --tracked 5000 --duration 1800 --rate 1 --out data/bench
+           python generate.py --years 2023 2024 2025 --groups Даага Шүдлэн Азарга
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from ingest import write_catalog, write_codes, write_parquet, write_table
+from store import (AGE_GROUPS, CodeBook, apply_schema, content_hash, partition_path, race_id,
+                   summarize_race)
+
+AIMAGS = ['Улаанбаатар', 'Дархан-Уул', 'Орхон', 'Сэлэнгэ', 'Төв', 'Архангай']
+SUMS = ['Төв', 'Хойд', 'Урд', 'Зүүн', 'Баруун']
+COLORS = ['Хээр', 'Шар', 'Хар', 'Саарал', 'Бор', 'Алаг']
+# Насны ангилал бүрийн уралдааны зай (км)
+RACE_DISTANCES = {'Даага': 15.0, 'Шүдлэн': 20.0, 'Хязаалан': 25.0, 'Соёолон': 28.0,
+                  'Их нас': 30.0, 'Азарга': 28.0}
+WEATHER = ['Нартай', 'Үүлэрхэг', 'Салхитай']
+TRACK = ['Сайн', 'Зөөлөн', 'Хатуу']
+INJURY = ['Байхгүй', 'Бага зэрэг']
+FATIGUE = ['Бага', 'Дунд', 'Өндөр']
+COMMANDS = ['Тогтвортой', 'Түлхэх', 'Барих', 'Гүйлт', 'Амрах']
+
+# Монголын тал нутгийн координат
+BASE_LAT, BASE_LON = 47.9184, 106.9177
+# Хурдны загвар: морины тогтмол үндсэн хурд (км/ц) дээр уралдааны дундуур SURGE_KMH·sin(π·явц) нэмэгдэнэ
+BASE_SPEED_KMH = (28, 34)
+SURGE_KMH = 5
+
+
+def _ids(prefix, n):
+    """М001, М002 ... хэлбэрийн ID-г векторжуулан үүсгэх"""
+    width = max(3, len(str(n)))
+    return np.char.add(prefix, np.char.zfill(np.arange(1, n + 1).astype(str), width))
+
+
+def generate_registry(rng, n_horses=300, n_trainers=50):
+    """Морь болон уяачийн бүртгэлийг багцаар үүсгэх"""
+    ages = 2 + (np.arange(n_horses) * len(AGE_GROUPS)) // n_horses
+    trainer_no = rng.integers(1, n_trainers + 1, n_horses)
+    trainer_ids = _ids('Т', n_trainers)
+    trainer_names = np.char.add('Уяач_', np.arange(1, n_trainers + 1).astype(str))
+
+    horses_df = pd.DataFrame({
+        'horse_id': _ids('М', n_horses),
+        'color': rng.choice(COLORS, n_horses),
+        'age': ages,
+        'trainer': trainer_names[trainer_no - 1],
+        'trainer_id': trainer_ids[trainer_no - 1],
+        'aimag': rng.choice(AIMAGS, n_horses),
+        'sum': rng.choice(SUMS, n_horses),
+        'rider_name': np.char.add('Унаач_', np.arange(1, n_horses + 1).astype(str)),
+        'rider_age': rng.integers(8, 16, n_horses),
+        'aimgiin_airag': rng.integers(0, 5, n_horses),
+        'ulsiin_airag': rng.integers(0, 10, n_horses),
+        'aimgiin_turuu': rng.integers(0, 3, n_horses),
+        'ulsiin_turuu': rng.integers(0, 8, n_horses),
+        'racing_group': np.vectorize(AGE_GROUPS.get)(ages),
+        'total_achievement': rng.integers(0, 20, n_horses),
+    })
+
+    trainers_df = pd.DataFrame({
+        'trainer_id': trainer_ids,
+        'trainer_name': trainer_names,
+        'aimag': rng.choice(AIMAGS, n_trainers),
+        'sum': rng.choice(SUMS, n_trainers),
+        'national_achievement': rng.integers(0, 15, n_trainers),
+        'provincial__achievement': rng.integers(0, 25, n_trainers),
+        'total_trained_horses': np.bincount(trainer_no, minlength=n_trainers + 1)[1:],
+        'phone_number': np.char.add('+976-', rng.integers(80000000, 99999999, n_trainers).astype(str)),
+    })
+
+    return apply_schema(horses_df, 'horses'), apply_schema(trainers_df, 'trainers')
+
+
+def race_schedule(years=(2025,), groups=(AGE_GROUPS[2],), distance_km=None):
+    """Он, насны ангилал бүрийн уралдаан: (race_id, нэр, огноо, ангилал, зай)"""
+    for year in years:
+        for group in groups:
+            race_name = f"Наадам {year} - {group.lower()}"
+            distance = distance_km or RACE_DISTANCES[group]
+            yield race_id(year, race_name, group), race_name, f"{year}-07-11", group, distance
+
+
+def race_duration(duration_s, distance_km):
+    """Зайд пропорциональ үргэлжлэх хугацаа (duration_s нь Даагын зайнд харгалзана)"""
+    return int(duration_s * distance_km / RACE_DISTANCES[AGE_GROUPS[2]])
+
+
+def finish_seconds(base_speed, distance_km):
+    """Хурдны загвараар зайг туулах хугацаа (секунд).
+
+    sin(π·t/T)-ийн [0, T] дээрх дундаж 2/π тул дундаж хурд base + SURGE_KMH·2/π.
+    """
+    return distance_km / (base_speed + SURGE_KMH * 2 / np.pi) * 3600
+
+
+def base_speeds(record_df):
+    """Бичлэгийн дундаж хурднаас морины үндсэн хурдыг сэргээх (finish_seconds-ийн урвуу)"""
+    return record_df['average_speed_kmh'].to_numpy(dtype=float) - SURGE_KMH * 2 / np.pi
+
+
+def generate_records(rng, horses_df, n_racers=50, distance_km=15.0,
+                     race_name='Наадам 2025 - даага', date='2025-07-11', group=AGE_GROUPS[2]):
+    """Нэг уралдааны үр дүнг үүсгэх (барианы цагаар байрлал эрэмбэлэгдэнэ)"""
+    racers = horses_df.loc[horses_df['racing_group'] == group, 'horse_id'].to_numpy()[:n_racers]
+    n = len(racers)
+
+    # Барианы цагийг телеметртэй ижил хурдны загвар, уралдааны зайнаас гаргана
+    total_seconds = np.sort(np.round(finish_seconds(rng.uniform(*BASE_SPEED_KMH, n), distance_km))
+                            .astype(np.int64))
+    positions = np.arange(1, n + 1)
+
+    record_df = pd.DataFrame({
+        'horse_id': racers,
+        'racing_group': group,
+        'final_position': positions,
+        'finish_time_minutes': total_seconds // 60,
+        'finish_time_seconds': total_seconds % 60,
+        'average_speed_kmh': distance_km / (total_seconds / 3600),
+        'max_speed_kmh': rng.uniform(35, 55, n),
+        'stride_length_m': rng.uniform(4.5, 6.5, n),
+        'heart_rate_start': rng.integers(60, 80, n),
+        'heart_rate_end': rng.integers(120, 180, n),
+        'weight_kg': rng.uniform(280, 350, n),
+        'rider_weight_kg': rng.uniform(25, 40, n),
+        'race_name': race_name,
+        'date': date,
+        'distance_km': distance_km,
+        'weather': rng.choice(WEATHER, n),
+        'temperature_celsius': rng.integers(20, 30, n),
+        'wind_speed_kmh': rng.integers(0, 20, n),
+        'humidity_percent': rng.integers(30, 70, n),
+        'track_condition': rng.choice(TRACK, n),
+        'prize_money_tugrik': np.maximum(0, 10000000 - (positions - 1) * 200000),
+        'injury': rng.choice(INJURY, n, p=[0.8, 0.2]),
+        'fatigue_level': rng.choice(FATIGUE, n),
+        'rider_experience_years': rng.integers(1, 8, n),
+    })
+    return apply_schema(record_df, 'records')
+
+
+def iter_live_chunks(rng, horse_ids, duration_s=1800, sample_rate_hz=1 / 60,
+                     distance_km=15.0, chunk_rows=1_000_000, base_speed=None):
+    """Телеметрийг (цаг x морь) блокоор үүсгэж, DataFrame хэсгүүдээр дамжуулах.
+
+    base_speed (base_speeds(record_df)) өгвөл морь бүр бичлэгийнхээ барианы цагт зайгаа
+    туулна; өгөхгүй бол BASE_SPEED_KMH мужаас санамсаргүй авна.
+
+    Байр, тэргүүлэгчээс хоцрох хугацааг бичихгүй: хэсэг нь бүтэн уралдааны түүхгүй тул
+    уншихад DERIVED (positions.rank_ticks) бүх хуваалтаас нэг тодорхойлолтоор тооцно.
+    """
+    horse_ids = np.asarray(horse_ids)
+    n_horses = len(horse_ids)
+    step = max(1, int(round(1 / sample_rate_hz)))
+    timestamps = np.arange(0, duration_s, step)
+    per_chunk = max(1, chunk_rows // max(n_horses, 1))
+
+    # Морь бүрийн тогтмол шинж чанар
+    if base_speed is None:
+        base_speed = rng.uniform(*BASE_SPEED_KMH, n_horses)
+    base_speed = np.asarray(base_speed, dtype=float)
+    finish = finish_seconds(base_speed, distance_km)
+    lateral = rng.uniform(-0.002, 0.002, n_horses)
+    next_id = 0
+
+    for offset in range(0, len(timestamps), per_chunk):
+        ts = timestamps[offset:offset + per_chunk]
+        shape = (len(ts), n_horses)
+        t = ts[:, None].astype(float)
+        progress = np.clip(t / duration_s, 0, 1)
+        # Морь бүрийн өөрийн барианы цагт харьцуулсан явц
+        pace = np.clip(t / finish, 0, 1)
+
+        # Явцын муруйг цацруулан (broadcast) тооцоолох; зай нь хурдны интеграл
+        speed = base_speed + SURGE_KMH * np.sin(pace * np.pi) + rng.uniform(-3, 3, shape)
+        distance = np.minimum(base_speed * np.minimum(t, finish) / 3600
+                              + SURGE_KMH * finish / (3600 * np.pi) * (1 - np.cos(pace * np.pi))
+                              + rng.uniform(-0.05, 0.05, shape), distance_km)
+        distance = np.maximum(distance, 0)
+
+        n = len(ts) * n_horses
+        codes = rng.integers(0, len(COMMANDS), n)
+        chunk = pd.DataFrame({
+            'id': np.arange(next_id, next_id + n),
+            'timestamp_seconds': np.repeat(ts, n_horses),
+            'horse_id': np.tile(horse_ids, len(ts)),
+            'distance_covered_km': distance.ravel(),
+            'current_speed_kmh': speed.ravel(),
+            'heart_rate': (80 + progress * 60 + rng.integers(-10, 10, shape)).astype(np.int64).ravel(),
+            'cumulative_time_seconds': np.repeat(ts, n_horses),
+            'latitude': (BASE_LAT + distance / distance_km * 0.1 + lateral).ravel(),
+            'longitude': (BASE_LON + distance / distance_km * 0.15 - lateral).ravel(),
+            'elevation_m': (1350 + 40 * np.sin(progress * 3 * np.pi)
+                            + rng.integers(-5, 5, shape)).astype(np.int64).ravel(),
+            'stride_frequency': (2.2 + rng.uniform(-0.3, 0.3, shape)).ravel(),
+            'energy_level': np.clip(100 - progress * 60 + rng.integers(-10, 10, shape), 20, 100)
+                              .astype(np.int64).ravel(),
+            'rider_commands': pd.Categorical.from_codes(codes, categories=COMMANDS),
+        })
+        next_id += n
+        yield apply_schema(chunk, 'live')
+
+
+def generate(n_horses=300, n_trainers=50, n_racers=50, n_tracked=5, duration_s=1800,
+             sample_rate_hz=1 / 60, distance_km=None, seed=42, years=(2025,),
+             groups=(AGE_GROUPS[2],)):
+    """Бүх хүснэгтийг санах ойд үүсгэх (жижиг хэмжээнд); мөрүүд race_id-тай"""
+    rng = np.random.default_rng(seed)
+    horses_df, trainers_df = generate_registry(rng, n_horses, n_trainers)
+    records, live = [], []
+    for race, race_name, date, group, distance in race_schedule(years, groups, distance_km):
+        record_df = generate_records(rng, horses_df, n_racers, distance, race_name, date, group)
+        records.append(record_df.assign(race_id=race))
+        tracked = record_df.iloc[:n_tracked]
+        for chunk in iter_live_chunks(rng, tracked['horse_id'].to_numpy(),
+                                      race_duration(duration_s, distance), sample_rate_hz, distance,
+                                      base_speed=base_speeds(tracked)):
+            live.append(chunk.assign(race_id=race))
+    record_df = apply_schema(pd.concat(records, ignore_index=True), 'records')
+    live_df = apply_schema(pd.concat(live, ignore_index=True), 'live')
+    return horses_df, trainers_df, record_df, live_df
+
+
+def _write_live(target, chunks):
+    """Телеметрийн хэсгүүдийг нэг Parquet файл руу урсгалаар бичих: (мөр, морь, хугацаа)"""
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp = f"{target}.tmp"
+    writer = None
+    rows, horses, duration = 0, set(), 0
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(tmp, table.schema)
+            writer.write_table(table.cast(writer.schema))
+            rows += len(chunk)
+            horses.update(chunk['horse_id'].unique())
+            duration = max(duration, int(chunk['timestamp_seconds'].max()))
+    finally:
+        if writer is not None:
+            writer.close()
+    os.replace(tmp, target)
+    return rows, len(horses), duration
+
+
+def write_store(store_dir, n_horses=300, n_trainers=50, n_racers=50, n_tracked=5,
+                duration_s=1800, sample_rate_hz=1 / 60, distance_km=None, seed=42,
+                chunk_rows=1_000_000, years=(2025,), groups=(AGE_GROUPS[2],)):
+    """Үүсгэсэн өгөгдлийг уралдаан бүрийн хуваалт руу хэсэгчлэн бичих (телеметрийг бүтнээр нь санахгүй)"""
+    rng = np.random.default_rng(seed)
+    horses_df, trainers_df = generate_registry(rng, n_horses, n_trainers)
+    write_table(horses_df, 'horses', store_dir)
+    write_table(trainers_df, 'trainers', store_dir)
+    # Телеметрийн (rider_commands) утгууд уншигдах үед кодын хүснэгтэд нэмэгдэнэ
+    codes = CodeBook.build([horses_df, trainers_df])
+
+    catalog = []
+    for race, race_name, date, group, distance in race_schedule(years, groups, distance_km):
+        record_df = generate_records(rng, horses_df, n_racers, distance, race_name, date, group)
+        codes.update(record_df)
+        records_path = write_parquet(record_df.assign(race_id=race),
+                                     partition_path('records', race, store_dir))
+        tracked = record_df.iloc[:n_tracked]
+        live_path = partition_path('live', race, store_dir)
+        rows, n_tracked_horses, duration = _write_live(live_path, iter_live_chunks(
+            rng, tracked['horse_id'].to_numpy(), race_duration(duration_s, distance), sample_rate_hz,
+            distance, chunk_rows, base_speeds(tracked)))
+        catalog.append(dict(summarize_race(race, record_df, rows, n_tracked_horses, duration),
+                            records_version=content_hash(records_path),
+                            live_version=content_hash(live_path)))
+    write_catalog(catalog, store_dir)
+    write_codes(codes, store_dir)
+    return {'horses': len(horses_df), 'trainers': len(trainers_df), 'races': len(catalog),
+            'records': sum(row['racers'] for row in catalog),
+            'live': sum(row['live_rows'] for row in catalog)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Синтетик уралдааны өгөгдөл үүсгэх")
+    parser.add_argument("--out", default=os.path.join("data", "bench"),
+                        help="Баганан сангийн хавтас")
+    parser.add_argument("--horses", type=int, default=300)
+    parser.add_argument("--trainers", type=int, default=50)
+    parser.add_argument("--racers", type=int, default=50)
+    parser.add_argument("--tracked", type=int, default=5)
+    parser.add_argument("--duration", type=int, default=1800, help="Уралдааны үргэлжлэх хугацаа (секунд)")
+    parser.add_argument("--rate", type=float, default=1 / 60, help="Түүврийн давтамж (Гц, 1-ээс ихгүй)")
+    parser.add_argument("--distance", type=float, default=None,
+                        help="Бүх уралдааны зай (км); өгөхгүй бол насны ангиллын зай")
+    parser.add_argument("--years", type=int, nargs='+', default=[2025])
+    parser.add_argument("--groups", nargs='+', default=[AGE_GROUPS[2]], choices=list(AGE_GROUPS.values()))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+    counts = write_store(args.out, args.horses, args.trainers, args.racers, args.tracked,
+                         args.duration, args.rate, args.distance, args.seed, args.chunk_rows,
+                         args.years, args.groups)
+    for name, count in counts.items():
+        print(f"{name}: {count:,}")
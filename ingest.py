@@ -0,0 +1,333 @@
+"""CSV файлуудаас баганан сан (Parquet) бүтээх алхам
+
+Хүснэгт бүрийн эх файлууд: үндсэн CSV (жишээ нь record.csv) болон уралдаан/аймаг тус
+бүрийн файлууд ({нэр}/*.csv, жишээ нь record/naadam-2025.csv). Файлуудыг (том
+телеметрийг байтын мужаар хувааж) процессын санд зэрэг, хэсэг хэсгээр нь уншиж
+векторжсон шалгалт хийнэ. Алдаатай мөрүүд {store}/quarantine/{нэр}.csv руу явна.
+
+Ажиллуулах: python ingest.py [--data-dir data] [--store-dir data/store] [--workers 8] [--sqlite]
+"""
+
+import argparse
+import glob
+import io
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from store import (CATALOG, CODES, DATA_DIR, SCHEMAS, SOURCES, STORE_DIR, CodeBook, apply_schema,
+                   content_hash, live_race_ids, partition_dir, partition_path,
+                   split_races, store_path, summarize_live, summarize_race)
+from validate import UNIQUE, check_keys, validate_chunk
+
+# Телеметрийн мөрийн бүлгийн хэмжээ (цагийн цонхоор алгасах нэгж)
+LIVE_ROW_GROUP = 64 * 1024
+# Нэг удаад уншиж шалгах мөрийн тоо
+CHUNK_ROWS = 100_000
+# Үүнээс том файлыг байтын мужуудаар хувааж зэрэг уншина
+RANGE_BYTES = 64 << 20
+# Хашилт доторх олон мөрт утгагүй тул мөрийн хил дээр хувааж болох хүснэгтүүд
+SPLITTABLE = ('live',)
+# Лавлах хүснэгтүүдийг эхэлж шалгана (гадаад түлхүүрийн дараалал)
+ORDER = ('trainers', 'horses', 'records', 'live')
+
+
+def source_files(name, data_dir=DATA_DIR):
+    """Хүснэгтийн эх файлууд: үндсэн CSV ба {нэр}/ хавтас дахь хэсэгчилсэн CSV-үүд"""
+    main = os.path.join(data_dir, SOURCES[name])
+    stem = os.path.splitext(SOURCES[name])[0]
+    files = [main] if os.path.exists(main) else []
+    return files + sorted(glob.glob(os.path.join(data_dir, stem, "*.csv")))
+
+
+def byte_ranges(path, name, range_bytes=RANGE_BYTES):
+    """Файлыг мөрийн хил дээр таарсан [start, end) мужуудад хуваах (жижиг бол бүтнээр)"""
+    size = os.path.getsize(path)
+    if name not in SPLITTABLE or size <= range_bytes:
+        return [(0, None)]
+    ranges = []
+    with open(path, 'rb') as f:
+        start = len(f.readline())
+        while start < size:
+            f.seek(min(start + range_bytes, size))
+            f.readline()
+            end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def _empty(name):
+    return apply_schema(pd.DataFrame(columns=list(SCHEMAS[name])), name)
+
+
+def _concat(frames, name=None):
+    frames = [frame for frame in frames if len(frame)]
+    if not frames:
+        return _empty(name) if name else pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+
+def parse_source(task):
+    """Нэг файл (эсвэл түүний байтын муж)-ыг хэсэг хэсгээр уншиж шалгах.
+
+    Процессын санд ажиллах тул модулийн түвшний функц. Буцаах:
+    (хүснэгт, цэвэр DataFrame, хорионы DataFrame, засварын тоо)
+    """
+    name, path, start, end = task
+    if end is None:
+        source, label = path, path
+    else:
+        with open(path, 'rb') as f:
+            header = f.readline()
+            f.seek(start)
+            source = io.BytesIO(header + f.read(end - start))
+        label = f"{path}@{start}"
+    clean, quarantine, repairs = [], [], Counter()
+    row = 0
+    for chunk in pd.read_csv(source, dtype=str, chunksize=CHUNK_ROWS):
+        good, bad, fixed = validate_chunk(chunk, name, label, row)
+        clean.append(good)
+        quarantine.append(bad)
+        repairs.update(fixed)
+        row += len(chunk)
+    return name, _concat(clean, name), _concat(quarantine), dict(repairs)
+
+
+def load_sources(names, data_dir=DATA_DIR, workers=1):
+    """Хүснэгтүүдийн бүх эх файлыг уншиж шалгах (workers > 1 бол процессын санд зэрэг).
+
+    Буцаах: {хүснэгт: (цэвэр DataFrame, хорионы DataFrame, засварын тоо)}
+    """
+    tasks = []
+    for name in names:
+        files = source_files(name, data_dir)
+        if not files:
+            raise FileNotFoundError(os.path.join(data_dir, SOURCES[name]))
+        tasks += [(name, path, start, end) for path in files for start, end in byte_ranges(path, name)]
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(min(workers, len(tasks))) as pool:
+            results = list(pool.map(parse_source, tasks))
+    else:
+        results = [parse_source(task) for task in tasks]
+
+    # map() дарааллыг хадгална: файл, муж бүрийн мөрүүд эх дарааллаараа нийлнэ
+    parsed = {}
+    for name in names:
+        parts = [result for result in results if result[0] == name]
+        repairs = Counter()
+        for part in parts:
+            repairs.update(part[3])
+        parsed[name] = (_concat([part[1] for part in parts], name),
+                        _concat([part[2] for part in parts]), dict(repairs))
+    return parsed
+
+
+def stored_keys(table, store_dir=STORE_DIR):
+    """Сан дахь лавлах хүснэгтийн түлхүүрүүд (хэсэгчилсэн дахин ачаалалтад)"""
+    path = store_path(table, store_dir)
+    if not os.path.exists(path):
+        return None
+    key = UNIQUE[table][0]
+    return pd.read_parquet(path, columns=[key])[key]
+
+
+def check_sources(parsed, store_dir=STORE_DIR):
+    """Давхардал, гадаад түлхүүрийг лавлах хүснэгтээс нь эхлэн шалгах.
+
+    Шинээр уншсан лавлах хүснэгт байвал түүнийг, үгүй бол сан дахийг ашиглана.
+    """
+    keys = {}
+    checked = {}
+    for name in ORDER:
+        if name not in parsed:
+            continue
+        df, quarantine, repairs = parsed[name]
+        for table in ('trainers', 'horses'):
+            if table not in keys:
+                keys[table] = stored_keys(table, store_dir) if table not in parsed else None
+        clean, rejected = check_keys(df, name, keys)
+        if name in UNIQUE:
+            keys[name] = clean[UNIQUE[name][0]]
+        checked[name] = (clean, _concat([quarantine, rejected]), repairs)
+    return checked
+
+
+def quarantine_path(name, store_dir=STORE_DIR):
+    return os.path.join(store_dir, "quarantine", f"{name}.csv")
+
+
+def write_quarantine(df, name, store_dir=STORE_DIR, append=False):
+    """Алдаатай мөрүүдийг шалтгааных нь хамт хадгалах (алдаагүй бол хуучин файлыг арилгана)"""
+    path = quarantine_path(name, store_dir)
+    if df.empty:
+        if not append and os.path.exists(path):
+            os.remove(path)
+        return None
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    exists = append and os.path.exists(path)
+    df.to_csv(path, mode='a' if exists else 'w', header=not exists, index=False)
+    return path
+
+
+def read_source(name, data_dir=DATA_DIR, store_dir=STORE_DIR):
+    """Эх файлуудыг уншиж шалгаад цэвэр DataFrame буцаах; муу мөрийг хорио руу бичнэ"""
+    clean, quarantine, _ = check_sources(load_sources((name,), data_dir), store_dir)[name]
+    write_quarantine(quarantine, name, store_dir)
+    return clean
+
+
+def read_appended(name, offset, data_dir=DATA_DIR, store_dir=STORE_DIR):
+    """Эх CSV-д offset-оос хойш нэмэгдсэн бүтэн мөрүүд: (DataFrame, дараагийн offset)
+
+    Сүүлийн дутуу мөрийг дараагийн уншилтад үлдээнэ. Алдаатай мөр хорионд нэмэгдэнэ.
+    """
+    path = os.path.join(data_dir, SOURCES[name])
+    with open(path, 'rb') as f:
+        header = f.readline()
+        f.seek(max(offset, len(header)))
+        data = f.read()
+    end = data.rfind(b'\n') + 1
+    if end == 0:
+        return _empty(name), offset
+    start = max(offset, len(header))
+    raw = pd.read_csv(io.BytesIO(header + data[:end]), dtype=str)
+    clean, quarantine, repairs = validate_chunk(raw, name, f"{path}@{start}")
+    clean, quarantine, _ = check_sources({name: (clean, quarantine, repairs)}, store_dir)[name]
+    write_quarantine(quarantine, name, store_dir, append=True)
+    return clean, start + end
+
+
+def place_live(record_df, live_df):
+    """Телеметрийн мөр бүрт race_id оноох: (оноогдсон DataFrame, хорионы DataFrame).
+
+    Уралдаанд онох боломжгүй мөр (бичлэггүй уралдааны түлхүүртэй, эсвэл морь нь бичлэггүй)
+    хуваалтад орохгүй тул хорионд шилжинэ.
+    """
+    ids = live_race_ids(record_df, live_df)
+    placed = ids.notna().to_numpy()
+    quarantine = live_df[~placed].assign(_reason='race:unassigned')
+    return live_df[placed].assign(race_id=ids[placed].to_numpy()).reset_index(drop=True), quarantine
+
+
+def write_parquet(df, target, row_group_size=None):
+    """Parquet файлыг түр файлаар дамжуулан атомаар бичих"""
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    # Цэгээр эхэлсэн түр файлыг хуваалтын хэсэг гэж уншихгүй
+    tmp = os.path.join(os.path.dirname(target), f".{os.path.basename(target)}.tmp")
+    df.to_parquet(tmp, index=False, row_group_size=row_group_size)
+    os.replace(tmp, target)
+    return target
+
+
+def write_table(df, name, store_dir=STORE_DIR):
+    return write_parquet(df, store_path(name, store_dir))
+
+
+def write_catalog(rows, store_dir=STORE_DIR):
+    """Хуваалтуудын хураангуйг каталог болгон бичих (хуваалтууд бичигдсэний дараа)"""
+    return write_table(apply_schema(pd.DataFrame(rows), CATALOG), CATALOG, store_dir)
+
+
+def write_codes(codes, store_dir=STORE_DIR):
+    """Кодын хүснэгт (домэйн, код, утга)-ийг бичих"""
+    return write_table(codes.to_frame(), CODES, store_dir)
+
+
+def update_codes(frames, store_dir=STORE_DIR):
+    """Сан дахь кодын хүснэгтэд шинэ утгуудыг төгсгөлд нь нэмэх (хуучин код өөрчлөгдөхгүй)"""
+    codes = CodeBook.read(store_dir)
+    changed = [codes.update(df) for df in frames]
+    if any(changed) or not os.path.exists(store_path(CODES, store_dir)):
+        write_codes(codes, store_dir)
+    return codes
+
+
+def write_races(record_df, live_df, store_dir=STORE_DIR):
+    """Бичлэг, телеметрийг он/уралдаан/насны ангиллаар хувааж бичээд каталог үүсгэх"""
+    rows = []
+    for race, records, live in split_races(record_df, live_df):
+        # Өмнөх нэмэлт хэсгүүдийг арилгаж, хуваалтыг нэг хэсэг болгон дахин бичнэ
+        for name in ('records', 'live'):
+            for part in glob.glob(os.path.join(partition_dir(name, race, store_dir), "part-*.parquet")):
+                os.remove(part)
+        records_path = write_parquet(records, partition_path('records', race, store_dir))
+        # Телеметрийг цагаар эрэмбэлж бичнэ: урсгал экспорт мөрийн бүлгийн статистикаар алгасна
+        live = live.sort_values('timestamp_seconds', kind='stable').reset_index(drop=True)
+        live_path = write_parquet(live, partition_path('live', race, store_dir), row_group_size=LIVE_ROW_GROUP)
+        rows.append(dict(summarize_race(race, records, **summarize_live(live)),
+                         records_version=content_hash(records_path),
+                         live_version=content_hash(live_path)))
+    write_catalog(rows, store_dir)
+    return [partition_path(name, row['race_id'], store_dir) for row in rows for name in ('records', 'live')]
+
+
+def write_part(df, name, race, store_dir=STORE_DIR):
+    """Хуваалтад дараагийн дугаартай нэмэлт хэсэг бичих (нэмэгдэж буй телеметрт)"""
+    part = len(glob.glob(os.path.join(partition_dir(name, race, store_dir), "part-*.parquet")))
+    return write_parquet(df, partition_path(name, race, store_dir, part))
+
+
+def ingest_table(name, data_dir=DATA_DIR, store_dir=STORE_DIR):
+    df = read_source(name, data_dir, store_dir)
+    update_codes([df], store_dir)
+    return write_table(df, name, store_dir)
+
+
+def ingest_races(data_dir=DATA_DIR, store_dir=STORE_DIR):
+    record_df = read_source('records', data_dir, store_dir)
+    clean, quarantine, _ = check_sources(load_sources(('live',), data_dir), store_dir)['live']
+    live_df, unplaced = place_live(record_df, clean)
+    write_quarantine(_concat([quarantine, unplaced]), 'live', store_dir)
+    update_codes([record_df, live_df], store_dir)
+    return write_races(record_df, live_df, store_dir)
+
+
+def ingest(data_dir=DATA_DIR, store_dir=STORE_DIR, workers=None, log=None):
+    """Бүх эх файлыг зэрэг уншиж, шалгаад баганан сан руу хөрвүүлэх.
+
+    log(хүснэгт, мөр, хорио, засвар) өгвөл хүснэгт бүрийн дүнг дамжуулна.
+    """
+    workers = workers or os.cpu_count() or 1
+    checked = check_sources(load_sources(ORDER, data_dir, workers), store_dir)
+    # Уралдаанд онох боломжгүй телеметр хорионд нэмэгдэнэ
+    clean, quarantine, repairs = checked['live']
+    live_df, unplaced = place_live(checked['records'][0], clean)
+    checked['live'] = (live_df, _concat([quarantine, unplaced]), repairs)
+    for name, (clean, quarantine, repairs) in checked.items():
+        write_quarantine(quarantine, name, store_dir)
+        if log is not None:
+            log(name, len(clean), len(quarantine), repairs)
+    # Бүрэн бүтээхэд кодын хүснэгтийг эрэмбэлэн шинээр үүсгэнэ
+    paths = [write_codes(CodeBook.build([checked[name][0] for name in ORDER]), store_dir)]
+    paths += [write_table(checked[name][0], name, store_dir) for name in ('horses', 'trainers')]
+    return paths + write_races(checked['records'][0], checked['live'][0], store_dir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CSV -> Parquet баганан сан бүтээх")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--store-dir", default=STORE_DIR)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Зэрэг ажиллах процессын тоо")
+    parser.add_argument("--sqlite", action="store_true", help="Индекстэй SQLite хуулбар (naadam.sqlite) синк хийх")
+    args = parser.parse_args()
+
+    def report(name, rows, rejected, repairs):
+        fixed = ", ".join(f"{col}: {count}" for col, count in repairs.items())
+        print(f"→ {name}: {rows:,} мөр · хорио {rejected:,}" + (f" · засвар ({fixed})" if fixed else ""))
+
+    started = time.perf_counter()
+    for path in ingest(args.data_dir, args.store_dir, args.workers, log=report):
+        print(path)
+    print(f"→ {time.perf_counter() - started:.2f} сек ({args.workers} процесс)")
+    if args.sqlite:
+        from sqlstore import SqlStore, sqlite_path
+        from store import open_store
+
+        horses, trainers, races = open_store(args.data_dir, args.store_dir)
+        path = sqlite_path(args.store_dir)
+        synced = SqlStore(path, races.codes).sync(horses, trainers, races, store_dir=args.store_dir)
+        print(f"{path} ({len(synced)} хүснэгт/хуваалт шинэчлэгдсэн)")
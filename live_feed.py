@@ -0,0 +1,182 @@
+"""Шууд телеметрийн өсөн нэмэгдэх ачаалал - морь тус бүрийн цагираг буфер"""
+
+import io
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from rolling import RollingStats
+from store import SCHEMAS
+
+LIVE_SCHEMA = SCHEMAS['live']
+LIVE_COLUMNS = list(LIVE_SCHEMA)
+
+
+def _buffer_dtype(dtype):
+    """Тоон баганыг (нарийсгасан int8/16/32 ч) өөрийн төрлөөр, ангилал, текстийг object-оор"""
+    try:
+        dtype = np.dtype(dtype)
+    except TypeError:
+        return object
+    return dtype if np.issubdtype(dtype, np.number) else object
+
+
+class HorseBuffer:
+    """Нэг морины сүүлийн `capacity` мөрийг хадгалах зөвхөн нэмэгддэг цагираг буфер"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.count = 0
+        self.data = {col: np.empty(capacity, dtype=_buffer_dtype(dtype))
+                     for col, dtype in LIVE_SCHEMA.items()}
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def append(self, rows):
+        """DataFrame-ийн мөрүүдийг буферийн төгсгөлд нэмэх"""
+        n = len(rows)
+        if n > self.capacity:
+            rows = rows.iloc[n - self.capacity:]
+            self.count += n - self.capacity
+            n = self.capacity
+        slots = (self.count + np.arange(n)) % self.capacity
+        for col, arr in self.data.items():
+            if col in rows.columns:
+                values = rows[col].to_numpy()
+            else:
+                # Трекер өгдөггүй сонголтот багана (зөвхөн GPS) - хоосон утга
+                values = np.full(n, None if arr.dtype == object else np.nan)
+            if arr.dtype != object and not np.can_cast(values.dtype, arr.dtype):
+                # Нарийн төрөлд багтаагүй (int64 хэвээр үлдсэн) эсвэл хоосон утгыг
+                # таслахгүйгээр өргөтгөнө
+                arr = self.data[col] = arr.astype(np.result_type(arr.dtype, values.dtype))
+            arr[slots] = values
+        self.count += n
+
+    def _order(self):
+        size = len(self)
+        return (self.count - size + np.arange(size)) % self.capacity
+
+    def latest(self):
+        slot = (self.count - 1) % self.capacity
+        return {col: arr[slot] for col, arr in self.data.items()}
+
+    def frame(self):
+        """Буферийн агуулгыг цаг хугацааны дарааллаар буцаах"""
+        order = self._order()
+        return pd.DataFrame({col: arr[order] for col, arr in self.data.items()})
+
+
+class FileTailSource:
+    """live.csv хэлбэрийн файлын сүүлд нэмэгдсэн бүтэн мөрүүдийг л уншина"""
+
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self.header = None
+
+    def read(self):
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, 'rb') as f:
+            if os.path.getsize(self.path) < self.offset:
+                # Файл дахин бичигдсэн тул эхнээс нь уншина
+                self.offset, self.header = 0, None
+            f.seek(self.offset)
+            chunk = f.read()
+        end = chunk.rfind(b'\n') + 1
+        if end == 0:
+            return None
+        self.offset += end
+        text = chunk[:end].decode('utf-8')
+        if self.header is None:
+            self.header, _, text = text.partition('\n')
+        if not text.strip():
+            return None
+        return pd.read_csv(io.StringIO(f"{self.header}\n{text}"), dtype=LIVE_SCHEMA)
+
+
+class QueueSource:
+    """Процесс доторх үйлдвэрлэгчийн дараалалд орсон мөрүүдийг уншина"""
+
+    def __init__(self, rows_queue=None):
+        self.queue = rows_queue or queue.Queue()
+
+    def read(self):
+        batches = []
+        while True:
+            try:
+                batches.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        if not batches:
+            return None
+        return pd.concat(batches, ignore_index=True)
+
+
+def start_replay_producer(live_df, rows_queue, interval=2.0):
+    """Бичигдсэн телеметрийг цаг тус бүрээр дараалал руу илгээх арын урсгал"""
+
+    def produce():
+        for _, rows in live_df.groupby('timestamp_seconds', sort=True):
+            rows_queue.put(rows[LIVE_COLUMNS])
+            time.sleep(interval)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    return thread
+
+
+class LiveFeed:
+    """Эх сурвалжаас шинэ мөрүүдийг татаж морь тус бүрийн буферт хуваарилна"""
+
+    def __init__(self, source, capacity=3600, race_km=None, positions=None):
+        self.source = source
+        self.capacity = capacity
+        self.buffers = {}
+        self.stats = RollingStats(race_km)
+        # Зөвхөн GPS ирвэл зай, байр, зөрүүг агшин бүрт тооцох PositionEngine
+        self.positions = positions
+        self.total_rows = 0
+        self._lock = threading.Lock()
+
+    def poll(self):
+        """Сүүлийн дуудлагаас хойш нэмэгдсэн мөрүүдийг л уншиж буферт нэмэх"""
+        with self._lock:
+            rows = self.source.read()
+            if rows is None or rows.empty:
+                return pd.DataFrame(columns=LIVE_COLUMNS)
+            if self.positions is not None and 'position' not in rows.columns:
+                rows = self.positions.fill(rows)
+            for horse_id, horse_rows in rows.groupby('horse_id', sort=False):
+                if horse_id not in self.buffers:
+                    self.buffers[horse_id] = HorseBuffer(self.capacity)
+                self.buffers[horse_id].append(horse_rows)
+                self.stats.update(horse_rows)
+            self.total_rows += len(rows)
+            return rows
+
+    def snapshot(self):
+        """Морь бүрийн хамгийн сүүлийн мөр"""
+        with self._lock:
+            latest = [buf.latest() for buf in self.buffers.values() if len(buf)]
+        return pd.DataFrame(latest, columns=LIVE_COLUMNS)
+
+    def rolling(self):
+        """Морь бүрийн гүйлгэх статистик (түүхийг дахин уншихгүй)"""
+        with self._lock:
+            return self.stats.snapshot()
+
+    def history(self, horses=None):
+        """Буферт байгаа түүхийг (морь бүрээр хязгаарлагдсан) нэгтгэх"""
+        with self._lock:
+            frames = [buf.frame() for horse_id, buf in self.buffers.items()
+                      if horses is None or horse_id in horses]
+        if not frames:
+            return pd.DataFrame(columns=LIVE_COLUMNS)
+        return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,112 @@
+"""Шууд өгөгдлийн цагийн индекс - морь тус бүрээр хуваасан, цагаар эрэмбэлсэн"""
+
+import numpy as np
+
+
+def _ranges(starts, stops):
+    """[start, stop) мужуудын байрлалуудыг нэг массив болгон нийлүүлэх"""
+    lengths = stops - starts
+    offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+    return offsets + np.arange(lengths.sum())
+
+
+class LiveIndex:
+    """live_df-ийг horse_id-ээр хувааж, timestamp_seconds-оор эрэмбэлээд
+    searchsorted-оор O(log n) цонхон хайлт хийнэ"""
+
+    def __init__(self, live_df):
+        frame = live_df.sort_values(['horse_id', 'timestamp_seconds'], kind='stable')
+        self.frame = frame.reset_index(drop=True)
+
+        horse_ids = self.frame['horse_id'].to_numpy()
+        ts = self.frame['timestamp_seconds'].to_numpy().astype(np.int64)
+        n = len(ts)
+
+        # Морь бүрийн хэсгийн эхлэл/төгсгөл
+        if n:
+            change = np.flatnonzero(horse_ids[1:] != horse_ids[:-1]) + 1
+            self.starts = np.concatenate(([0], change))
+            self.stops = np.append(self.starts[1:], n)
+        else:
+            self.starts = self.stops = np.array([], dtype=np.int64)
+        self.horse_ids = [horse_ids[i] for i in self.starts]
+        self._codes = {horse_id: code for code, horse_id in enumerate(self.horse_ids)}
+
+        # (морь, цаг) хосыг нэг эрэмбэлэгдсэн түлхүүр болгох
+        self.times = np.unique(ts)
+        self._t0 = int(self.times[0]) if n else 0
+        self._span = int(self.times[-1]) - self._t0 + 2 if n else 1
+        codes = np.repeat(np.arange(len(self.starts)), self.stops - self.starts)
+        self._keys = codes * self._span + (ts - self._t0)
+
+    def __len__(self):
+        return len(self.frame)
+
+    @property
+    def max_time(self):
+        return int(self.times[-1]) if len(self.times) else 0
+
+    def _horse_codes(self, horses):
+        if horses is None:
+            return np.arange(len(self.horse_ids))
+        return np.array([self._codes[h] for h in horses if h in self._codes], dtype=np.int64)
+
+    def _bound(self, codes, t, side):
+        t = min(max(int(t) - self._t0, -1), self._span - 1)
+        return np.searchsorted(self._keys, codes * self._span + t, side=side)
+
+    def snapshot_at(self, t, horses=None):
+        """t агшин дахь морь бүрийн мөр"""
+        codes = self._horse_codes(horses)
+        left = self._bound(codes, t, 'left')
+        right = self._bound(codes, t, 'right')
+        return self.frame.take(_ranges(left, right))
+
+    def latest_at(self, t, horses=None):
+        """t хүртэлх морь бүрийн хамгийн сүүлийн мөр (asof)"""
+        codes = self._horse_codes(horses)
+        right = self._bound(codes, t, 'right')
+        found = right > self.starts[codes]
+        return self.frame.take(right[found] - 1)
+
+    def latest_rows(self, times):
+        """Цаг бүрт морь бүрийн хамгийн сүүлийн мөрийн байрлал (n_times, n_horses), байхгүй бол -1"""
+        codes = np.arange(len(self.horse_ids))
+        t = np.clip(np.asarray(times, dtype=np.int64) - self._t0, -1, self._span - 1)
+        right = np.searchsorted(self._keys, codes[None, :] * self._span + t[:, None], side='right')
+        return np.where(right > self.starts[None, :], right - 1, -1)
+
+    def history_stops(self, t):
+        """t хүртэлх түүхийн морь бүрийн төгсгөлийн байрлал (фрэймийн кэшид хадгалагдана)"""
+        return self._bound(np.arange(len(self.horse_ids)), t, 'right')
+
+    def history_from(self, stops):
+        """history_stops-оор тодорхойлогдсон түүхийн мөрүүд"""
+        return self.frame.take(_ranges(self.starts, stops))
+
+    def rows_between(self, start_stops, stop_stops):
+        """Хоёр history_stops-ийн хоорондох мөрүүд, морь бүрээр цагийн дарааллаар"""
+        return self.frame.take(_ranges(start_stops, stop_stops))
+
+    def history_until(self, t, horses=None):
+        """t хүртэлх бүх мөр, морь бүрээр цагийн дарааллаар"""
+        codes = self._horse_codes(horses)
+        return self.frame.take(_ranges(self.starts[codes], self._bound(codes, t, 'right')))
+
+    def mean(self, column):
+        return float(self.frame[column].mean())
+
+    def horse_path(self, horse_id, t=None):
+        """Нэг морины t хүртэлх замын мөрүүд"""
+        code = self._codes.get(horse_id)
+        if code is None:
+            return self.frame.iloc[0:0]
+        start, stop = self.starts[code], self.stops[code]
+        if t is not None:
+            stop = int(self._bound(np.array([code]), t, 'right')[0])
+        return self.frame.iloc[start:stop]
+
+    def horses_frame(self, horses):
+        """Сонгосон морьдын бүх мөр (isin шүүлтүүрийн оронд)"""
+        codes = self._horse_codes(horses)
+        return self.frame.take(_ranges(self.starts[codes], self.stops[codes]))
@@ -0,0 +1,121 @@
+"""GPS замын хялбарчлал - Ramer–Douglas–Peucker болон нэгтгэсэн mapbox trace"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import plotly.graph_objects as go
+
+MAP_ZOOM = 10
+
+
+def zoom_tolerance(zoom, pixels=1.0):
+    """Тухайн томруулалтад нэг пикселд ногдох градус (Web Mercator, 256px хавтан)"""
+    return pixels * 360.0 / (256 * 2 ** zoom)
+
+
+def rdp_mask(x, y, tolerance):
+    """Ramer–Douglas–Peucker: хадгалах цэгүүдийн boolean маск"""
+    n = len(x)
+    keep = np.zeros(n, dtype=bool)
+    if n <= 2:
+        keep[:] = True
+        return keep
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        dx, dy = x[end] - x[start], y[end] - y[start]
+        px, py = x[start + 1:end] - x[start], y[start + 1:end] - y[start]
+        norm = np.hypot(dx, dy)
+        if norm == 0:
+            dist = np.hypot(px, py)
+        else:
+            dist = np.abs(dx * py - dy * px) / norm
+        i = int(np.argmax(dist))
+        if dist[i] > tolerance:
+            mid = start + 1 + i
+            keep[mid] = True
+            stack.append((start, mid))
+            stack.append((mid, end))
+    return keep
+
+
+def simplify_path(lat, lon, tolerance):
+    """Өргөргийн шахалтыг тооцон замыг хялбарчлах"""
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    if len(lat) == 0:
+        return lat, lon
+    scale = np.cos(np.radians(np.nanmean(lat)))
+    keep = rdp_mask(lon * scale, lat, tolerance)
+    return lat[keep], lon[keep]
+
+
+class PathCache:
+    """(морь, цагийн муж, хүлцэл) түлхүүртэй хялбарчилсан замын LRU кэш"""
+
+    def __init__(self, index, max_entries=4096):
+        self.index = index
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, horse_id, t_end, tolerance):
+        path = self.index.horse_path(horse_id, t_end)
+        t_start = int(path['timestamp_seconds'].iloc[0]) if len(path) else 0
+        key = (horse_id, t_start, t_end, tolerance)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        value = simplify_path(path['latitude'].to_numpy(), path['longitude'].to_numpy(), tolerance)
+        with self._lock:
+            self._entries[key] = value
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+
+def _join(parts):
+    """Массивуудыг None тусгаарлагчтай нэг жагсаалт болгох"""
+    if not parts:
+        return []
+    sep = np.array([np.nan])
+    joined = np.concatenate([p for part in parts for p in (part, sep)][:-1])
+    values = joined.astype(object)
+    values[np.isnan(joined)] = None
+    return values
+
+
+def _path_trace(lats, lons, trace_kwargs):
+    trace_kwargs.setdefault('name', "Морьдын зам")
+    trace_kwargs.setdefault('line', dict(width=2))
+    return go.Scattermapbox(lat=_join(lats), lon=_join(lons), mode='lines',
+                            connectgaps=False, **trace_kwargs)
+
+
+def combined_path_trace(cache, horses, t_end=None, zoom=MAP_ZOOM, **trace_kwargs):
+    """Бүх морины хялбарчилсан замыг None тусгаарлагчтай ганц Scattermapbox болгох"""
+    t_end = cache.index.max_time if t_end is None else int(t_end)
+    tolerance = zoom_tolerance(zoom)
+    lats, lons = [], []
+    for horse_id in horses:
+        lat, lon = cache.get(horse_id, t_end, tolerance)
+        if len(lat):
+            lats.append(lat)
+            lons.append(lon)
+    return _path_trace(lats, lons, trace_kwargs)
+
+
+def frame_path_trace(time_data, zoom=MAP_ZOOM, **trace_kwargs):
+    """Индексгүй (шууд дамжуулалын) түүхээс кэшгүйгээр нэгтгэсэн trace бүтээх"""
+    tolerance = zoom_tolerance(zoom)
+    lats, lons = [], []
+    for _, horse_path in time_data.groupby('horse_id', sort=False):
+        lat, lon = simplify_path(horse_path['latitude'], horse_path['longitude'], tolerance)
+        lats.append(lat)
+        lons.append(lon)
+    return _path_trace(lats, lons, trace_kwargs)
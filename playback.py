@@ -0,0 +1,59 @@
+"""Шууд дүрслэлийн тоглуулагч - ханын цагаар урагшилж, ачаалалтай үед фрэйм алгасна"""
+
+import time
+
+# Нэг tick-ийн хамгийн бага завсар (секунд)
+MIN_INTERVAL = 0.5
+
+
+class PlaybackClock:
+    """Уралдааны цагийг тоглуулах хурд (уралдааны секунд / бодит секунд) болон алхмаар урагшлуулна"""
+
+    def __init__(self, end=0, speed=30, step=60):
+        self.end = end
+        self.speed = speed
+        self.step = step
+        self.running = False
+        self.finished = False
+        self.position = 0
+        self.dropped = 0
+        self._exact = 0.0
+        self._last = None
+
+    @property
+    def interval(self):
+        """Дараагийн фрэйм хүртэлх бодит хугацаа"""
+        return max(MIN_INTERVAL, self.step / self.speed)
+
+    def start(self, now=None):
+        if self.position >= self.end:
+            self.seek(0)
+        self.running = True
+        self._last = time.monotonic() if now is None else now
+
+    def pause(self):
+        self.running = False
+        self._last = None
+
+    def seek(self, position):
+        self.position = int(min(max(position, 0), self.end))
+        self._exact = float(self.position)
+
+    def tick(self, now=None):
+        """Өнгөрсөн бодит хугацаанд тохируулан урагшлах; хоцорсон фрэймүүдийг алгасна"""
+        if not self.running:
+            return self.position
+        now = time.monotonic() if now is None else now
+        elapsed = now - self._last if self._last is not None else 0.0
+        self._last = now
+
+        self._exact = min(self._exact + elapsed * self.speed, self.end)
+        target = min(int(self._exact // self.step) * self.step, self.end)
+        if self._exact >= self.end:
+            target = self.end
+        self.dropped = max(0, (target - self.position) // self.step - 1)
+        self.position = target
+        if self.position >= self.end:
+            self.running = False
+            self.finished = True
+        return self.position
@@ -0,0 +1,268 @@
+"""GPS-ээс байрлал тооцох хөдөлгүүр - замын шугамд наах, haversine зай, агшин бүрийн эрэмбэ
+
+Трекер зөвхөн цаг, өргөрөг, уртрагийг өгнө. Цэг бүрийг уралдааны замын шугамын хамгийн
+ойр сегментэд проекцолж, оройнуудын хуримтлагдсан haversine зайгаар замын дагуух зайг
+олно. Агшин бүрт зайгаар эрэмбэлж байр, тэргүүлэгч тухайн цэгийг давснаас хойших
+хугацаагаар зөрүүг тооцно.
+"""
+
+import numpy as np
+import pandas as pd
+
+from paths import rdp_mask
+
+EARTH_RADIUS_KM = 6371.0088
+# Нэг удаад боловсруулах (цэг x сегмент) нүдний тоо - санах ойг хязгаарлана
+SNAP_CELLS = 1 << 20
+# Дамжуулалд GPS-ийн хэлбэлзлээр ухрахыг зөвшөөрөх зай (км)
+BACKTRACK_KM = 0.2
+# Замын шугамыг трекээс гаргахад хялбарчлах хүлцэл (км)
+COURSE_TOLERANCE_KM = 0.01
+# Тэргүүний бүрхүүлийн анхны багтаамж ба дээд хязгаар (агшин; 1 Гц-д ~18 цаг)
+FRONT_CAPACITY = 1024
+FRONT_TICKS = 1 << 16
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Хоёр цэгийн хоорондох их тойргийн зай (км), массиваар"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class Course:
+    """Уралдааны замын шугам: оройнуудын хуримтлагдсан haversine зай, сегментэд наах"""
+
+    def __init__(self, lat, lon):
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        # Давхардсан оройг хасна (тэг урттай сегмент)
+        keep = np.r_[True, (np.diff(lat) != 0) | (np.diff(lon) != 0)]
+        self.lat, self.lon = lat[keep], lon[keep]
+        if len(self.lat) < 2:
+            raise ValueError("Замын шугамд дор хаяж хоёр өөр цэг хэрэгтэй")
+        self.segment_km = haversine_km(self.lat[:-1], self.lon[:-1], self.lat[1:], self.lon[1:])
+        self.cum_km = np.concatenate(([0.0], np.cumsum(self.segment_km)))
+
+        # Проекцод ашиглах орон нутгийн хавтгай координат (км)
+        self._scale = np.cos(np.radians(self.lat.mean()))
+        x, y = self._xy(self.lat, self.lon)
+        self._x0, self._y0 = x[:-1], y[:-1]
+        self._dx, self._dy = np.diff(x), np.diff(y)
+        self._len2 = self._dx ** 2 + self._dy ** 2
+
+    def __len__(self):
+        return len(self.segment_km)
+
+    @property
+    def length_km(self):
+        return float(self.cum_km[-1])
+
+    def _xy(self, lat, lon):
+        k = np.pi / 180 * EARTH_RADIUS_KM
+        return np.asarray(lon, dtype=float) * self._scale * k, np.asarray(lat, dtype=float) * k
+
+    @classmethod
+    def from_fixes(cls, horse_ids, timestamps, lat, lon, tolerance_km=COURSE_TOLERANCE_KM):
+        """Хэмжсэн замын шугам байхгүй үед хамгийн хол явсан морины трекээс гаргах"""
+        frame = pd.DataFrame({'horse_id': horse_ids, 'timestamp_seconds': timestamps,
+                              'latitude': lat, 'longitude': lon}).dropna()
+        frame = frame.sort_values(['horse_id', 'timestamp_seconds'], kind='stable')
+        first = frame.groupby('horse_id', sort=False, observed=True).nth(0)
+        last = frame.groupby('horse_id', sort=False, observed=True).nth(-1)
+        reach = haversine_km(first['latitude'].to_numpy(), first['longitude'].to_numpy(),
+                             last['latitude'].to_numpy(), last['longitude'].to_numpy())
+        reference = first['horse_id'].to_numpy()[int(np.argmax(reach))]
+        track = frame[frame['horse_id'] == reference]
+        lat, lon = track['latitude'].to_numpy(), track['longitude'].to_numpy()
+        scale = np.cos(np.radians(lat.mean()))
+        keep = rdp_mask(lon * scale, lat, tolerance_km / (np.pi / 180 * EARTH_RADIUS_KM))
+        return cls(lat[keep], lon[keep])
+
+    def snap(self, lat, lon, min_km=None):
+        """Цэгүүдийг шугамд наах: (замын дагуух зай км, шугамаас хазайлт км).
+
+        min_km өгвөл (өмнөх агшны зай) түүнээс BACKTRACK_KM-ээс илүү хойших сегментийг
+        тооцохгүй - буцаж эргэдэг замд эсрэг талын хэсэгт наагдахаас сэргийлнэ.
+        """
+        px, py = self._xy(lat, lon)
+        n = len(px)
+        along = np.empty(n)
+        offset = np.empty(n)
+        chunk = max(1, SNAP_CELLS // len(self))
+        for lo in range(0, n, chunk):
+            hi = min(lo + chunk, n)
+            rx = px[lo:hi, None] - self._x0
+            ry = py[lo:hi, None] - self._y0
+            t = np.clip((rx * self._dx + ry * self._dy) / self._len2, 0.0, 1.0)
+            d2 = (rx - t * self._dx) ** 2 + (ry - t * self._dy) ** 2
+            km = self.cum_km[:-1] + t * self.segment_km
+            if min_km is not None:
+                floor = np.asarray(min_km, dtype=float)[lo:hi, None] - BACKTRACK_KM
+                blocked = km < floor
+                # Бүх сегмент хаагдвал (эхлэл) хязгааргүй наана
+                blocked &= ~blocked.all(axis=1, keepdims=True)
+                d2 = np.where(blocked, np.inf, d2)
+            best = np.argmin(d2, axis=1)
+            rows = np.arange(hi - lo)
+            along[lo:hi] = km[rows, best]
+            offset[lo:hi] = np.sqrt(d2[rows, best])
+        return along, offset
+
+
+def _front_times(tick_times, front_km, distance_km):
+    """Тэргүүлэгч distance_km-д хүрсэн цаг (агшнуудын хооронд шугаман интерполяц)"""
+    i = np.searchsorted(front_km, distance_km, side='left')
+    hi = np.clip(i, 0, len(front_km) - 1)
+    lo = np.clip(i - 1, 0, len(front_km) - 1)
+    span = front_km[hi] - front_km[lo]
+    share = np.where(span > 0, (distance_km - front_km[lo]) / np.where(span > 0, span, 1), 1.0)
+    return tick_times[lo] + (tick_times[hi] - tick_times[lo]) * np.clip(share, 0.0, 1.0)
+
+
+def rank_ticks(timestamps, along_km):
+    """Агшин бүрт зайгаар эрэмбэлэх: (байр, тэргүүлэгчээс хоцрох секунд)"""
+    ts = np.asarray(timestamps, dtype=np.int64)
+    km = np.nan_to_num(np.asarray(along_km, dtype=float), nan=-np.inf)
+    n = len(ts)
+    if n == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    order = np.lexsort((-km, ts))
+    ts_sorted, km_sorted = ts[order], km[order]
+    starts = np.flatnonzero(np.r_[True, ts_sorted[1:] != ts_sorted[:-1]])
+    group = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, n]))
+    position = np.empty(n, dtype=np.int64)
+    position[order] = np.arange(n) - starts[group] + 1
+
+    # Тэргүүний зайн бүрхүүл: агшин бүрийн дээд зайн хуримтлагдсан максимум
+    front = np.maximum.accumulate(np.maximum(km_sorted[starts], 0.0))
+    gap = ts - _front_times(ts_sorted[starts].astype(float), front, np.maximum(km, 0.0))
+    return position, np.maximum(gap, 0.0)
+
+
+def tick_positions(df):
+    """timestamp_seconds, distance_covered_km -> агшин бүрийн байр"""
+    return pd.Series(rank_ticks(df['timestamp_seconds'], df['distance_covered_km'])[0], index=df.index)
+
+
+def tick_gaps(df):
+    """timestamp_seconds, distance_covered_km -> тэргүүлэгчээс хоцрох бүхэл секунд"""
+    gap = rank_ticks(df['timestamp_seconds'], df['distance_covered_km'])[1]
+    return pd.Series(np.round(gap).astype(np.int64), index=df.index)
+
+
+def along_track_km(df):
+    """horse_id, timestamp_seconds, latitude, longitude -> замын дагуух зай (км)"""
+    try:
+        course = Course.from_fixes(df['horse_id'], df['timestamp_seconds'], df['latitude'], df['longitude'])
+    except ValueError:
+        # Хоосон эсвэл хөдлөөгүй трек: зай тэг
+        return pd.Series(0.0, index=df.index)
+    along, _ = course.snap(df['latitude'].to_numpy(), df['longitude'].to_numpy())
+    # Морь ухарч гүйхгүй: GPS-ийн хэлбэлзлийг морь бүрийн хуримтлагдсан максимумаар дарна
+    along = pd.Series(along, index=df.index)
+    order = df.sort_values(['horse_id', 'timestamp_seconds'], kind='stable').index
+    return along.loc[order].groupby(df.loc[order, 'horse_id'], observed=True).cummax().reindex(df.index)
+
+
+def ground_speed_kmh(df):
+    """Замын дагуух зайн өөрчлөлтөөс морь бүрийн хурд (км/ц)"""
+    frame = df.sort_values(['horse_id', 'timestamp_seconds'], kind='stable')
+    grouped = frame.groupby('horse_id', observed=True)
+    dt = grouped['timestamp_seconds'].diff()
+    speed = grouped['distance_covered_km'].diff() / dt * 3600
+    return speed.where(dt > 0).fillna(0.0).reindex(df.index)
+
+
+class PositionEngine:
+    """Дамжуулалын агшин бүрийн GPS-ийг хүлээн авч зай, байр, зөрүүг тооцно.
+
+    Морь бүрийн сүүлийн зай ба тэргүүний бүрхүүл л хадгалагдана; агшин бүр нэг
+    проекц (морь x сегмент) ба нэг эрэмбэлэлт. Байрыг энэ агшинд мэдээлсэн морьдоор
+    бус, бүх морины сүүлд мэдэгдсэн зайгаар тооцно.
+
+    Бүрхүүл урьдчилан нөөцөлсөн массивт бичигдэнэ. Дүүрэхэд хамгийн хоцорсон морины
+    зайнаас өмнөх агшнуудыг (интерполяцад нэгийг үлдээн) хасна; хасах зүйл цөөн бол
+    FRONT_TICKS хүртэл томруулж, цаашид хамгийн хуучныг нь хасна. Бүх морьдоос хойно
+    орж ирсэн шинэ морины зөрүүг хадгалагдсан хамгийн эхний агшнаас хэмжинэ.
+    """
+
+    def __init__(self, course):
+        self.course = course
+        self._codes = {}
+        self._along = np.zeros(0)
+        self._times = np.zeros(0)
+        self._tick_times = np.empty(FRONT_CAPACITY)
+        self._front_km = np.empty(FRONT_CAPACITY)
+        self._ticks = 0
+
+    def _record_front(self, t, front):
+        """Тэргүүний бүрхүүлд (цаг, зай) нэмэх; ижил цагт бол зайг нь шинэчилнэ"""
+        n = self._ticks
+        if n and t <= self._tick_times[n - 1]:
+            self._front_km[n - 1] = max(self._front_km[n - 1], front)
+            return
+        if n == len(self._tick_times):
+            n = self._compact()
+        self._tick_times[n] = t
+        self._front_km[n] = front
+        self._ticks = n + 1
+
+    def _compact(self):
+        """Дүүрсэн бүрхүүлээс хэрэггүй агшнуудыг хасах (эсвэл багтаамжийг нэмэх)"""
+        n = self._ticks
+        slowest = np.fmin.reduce(self._along) if len(self._along) else 0.0
+        start = max(int(np.searchsorted(self._front_km[:n], slowest, side='left')) - 1, 0)
+        if start < n // 2:
+            # Хагасаас бага чөлөөлөгдөх бол (тогтмол зардалтай байлгахаар) томруулна
+            if n < FRONT_TICKS:
+                self._tick_times = np.concatenate((self._tick_times, np.empty(n)))
+                self._front_km = np.concatenate((self._front_km, np.empty(n)))
+                return n
+            start = max(start, n // 4)
+        kept = n - start
+        self._tick_times[:kept] = self._tick_times[start:n]
+        self._front_km[:kept] = self._front_km[start:n]
+        self._ticks = kept
+        return kept
+
+    def tick(self, t, horse_ids, lat, lon):
+        """Нэг агшны морьдын (зай, байр, зөрүү, хурд) - оролтын дарааллаар"""
+        codes = np.array([self._codes.setdefault(h, len(self._codes)) for h in horse_ids], dtype=np.int64)
+        if len(self._codes) > len(self._along):
+            grow = np.full(len(self._codes) - len(self._along), np.nan)
+            self._along = np.concatenate((self._along, grow))
+            self._times = np.concatenate((self._times, grow))
+        previous = self._along[codes]
+        along, _ = self.course.snap(lat, lon, min_km=np.nan_to_num(previous, nan=-np.inf))
+        along = np.fmax(along, previous)
+        dt = t - self._times[codes]
+        speed = np.where(dt > 0, (along - previous) / np.where(dt > 0, dt, 1) * 3600, 0.0)
+        self._along[codes] = along
+        self._times[codes] = t
+
+        # Бүх морины сүүлийн зайгаар эрэмбэлнэ (энэ агшинд мэдээлээгүй морь ч тоологдоно)
+        known = np.nan_to_num(self._along, nan=-np.inf)
+        rank = np.empty(len(known), dtype=np.int64)
+        rank[np.argsort(-known, kind='stable')] = np.arange(1, len(known) + 1)
+        self._record_front(float(t), float(np.fmax.reduce(self._along, initial=0.0)))
+        n = self._ticks
+        gap = t - _front_times(self._tick_times[:n], self._front_km[:n], along)
+        return along, rank[codes], np.maximum(gap, 0.0), np.nan_to_num(speed)
+
+    def fill(self, rows):
+        """Зөвхөн GPS-тэй мөрүүдэд зай, байр, зөрүү, хурдыг нэмэх"""
+        rows = rows.sort_values('timestamp_seconds', kind='stable')
+        along = np.empty(len(rows))
+        position = np.empty(len(rows), dtype=np.int64)
+        gap = np.empty(len(rows))
+        speed = np.empty(len(rows))
+        ts = rows['timestamp_seconds'].to_numpy()
+        bounds = np.flatnonzero(np.r_[True, ts[1:] != ts[:-1], True])
+        horse_ids = rows['horse_id'].to_numpy()
+        lat, lon = rows['latitude'].to_numpy(), rows['longitude'].to_numpy()
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            along[lo:hi], position[lo:hi], gap[lo:hi], speed[lo:hi] = self.tick(
+                int(ts[lo]), horse_ids[lo:hi], lat[lo:hi], lon[lo:hi])
+        return rows.assign(distance_covered_km=along, position=position,
+                           gap_to_leader_seconds=np.round(gap).astype(np.int64), current_speed_kmh=speed)
@@ -0,0 +1,242 @@
+"""Дахин зуралт бүрийн гүйцэтгэлийн хэмжилт - хэсгийн хугацаа, мөрийн тоо, диаграмын хэмжээ
+
+Самбарын халуун хэсгийг `with span("нэр") as item:` хүрээгээр ороож, мөрийн тоог item.rows-д
+өгнө. Нэг дахин зуралт (эсвэл фрагментийн шинэчлэл) нэг Profile болж Metrics-д хуримтлагдана.
+Идэвхтэй Profile байхгүй үед span юу ч бичихгүй.
+
+Орчны хувьсагчаар гадагш гаргана:
+    NAADAM_METRICS_LOG=metrics.ndjson   - дахин зуралт бүрийг NDJSON мөр болгон нэмнэ
+    NAADAM_METRICS_PROM=naadam.prom     - хуримтлагдсан дүнг Prometheus текст хэлбэрээр
+                                          (node_exporter textfile collector) дарж бичнэ
+"""
+
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import pandas as pd
+
+LOG_ENV = 'NAADAM_METRICS_LOG'
+PROM_ENV = 'NAADAM_METRICS_PROM'
+# Санах ойд хадгалах сүүлийн дахин зуралтын тоо
+HISTORY = 50
+
+SPAN_COLUMNS = ['span', 'ms', 'rows', 'kb']
+SUMMARY_COLUMNS = ['view', 'span', 'count', 'mean_ms', 'max_ms', 'rows', 'kb']
+
+_current = contextvars.ContextVar('naadam_profile', default=None)
+
+
+class Span:
+    """Нэг хэсгийн хэмжилт (depth нь үүрлэсэн түвшин)"""
+
+    __slots__ = ('name', 'depth', 'seconds', 'rows', 'bytes')
+
+    def __init__(self, name, depth=0, rows=None):
+        self.name = name
+        self.depth = depth
+        self.seconds = 0.0
+        self.rows = rows
+        self.bytes = None
+
+
+class Profile:
+    """Нэг дахин зуралтын хэсгүүд. payload үнэн бол диаграмын JSON хэмжээг хэмжинэ
+    (нэмэлт сериалчлал тул зөвхөн хэмжилтийн самбар нээлттэй үед)"""
+
+    def __init__(self, view, payload=False):
+        self.view = view
+        self.payload = payload
+        self.time = time.time()
+        self.seconds = 0.0
+        self.spans = []
+        self._started = time.perf_counter()
+        self._depth = 0
+
+    @property
+    def elapsed(self):
+        """Дууссан бол нийт хугацаа, үгүй бол одоог хүртэлх"""
+        return self.seconds or time.perf_counter() - self._started
+
+    @property
+    def bytes(self):
+        return sum(item.bytes or 0 for item in self.spans)
+
+    def frame(self):
+        """Хэсгүүдийг дуудагдсан дарааллаар (үүрлэсэн нь доголтой)"""
+        rows = [("  " * item.depth + item.name, item.seconds * 1000, item.rows,
+                 None if item.bytes is None else item.bytes / 1024) for item in self.spans]
+        return pd.DataFrame(rows, columns=SPAN_COLUMNS)
+
+    def to_dict(self):
+        return {
+            'time': self.time,
+            'view': self.view,
+            'seconds': self.seconds,
+            'spans': [{'name': item.name, 'depth': item.depth, 'seconds': item.seconds,
+                       'rows': item.rows, 'bytes': item.bytes} for item in self.spans],
+        }
+
+
+def active_profile():
+    return _current.get()
+
+
+def label(view):
+    """Идэвхтэй хэмжилтийн харагдацын нэрийг (жишээ нь сонгосон самбар) тохируулах"""
+    current = _current.get()
+    if current is not None:
+        current.view = view
+
+
+@contextmanager
+def span(name, rows=None):
+    """Хэсгийн хугацааг хэмжих; мөрийн тоо, байтыг yield-сэн Span-д бичиж болно"""
+    current = _current.get()
+    if current is None:
+        yield Span(name, rows=rows)
+        return
+    item = Span(name, current._depth, rows)
+    current.spans.append(item)
+    current._depth += 1
+    start = time.perf_counter()
+    try:
+        yield item
+    finally:
+        item.seconds = time.perf_counter() - start
+        current._depth -= 1
+
+
+def timed(name=None):
+    """Функцийн дуудлагыг span болгон хэмжих декоратор (кэштэй ачаалагчид дээр - кэш тусвал ч)"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name or func.__name__):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def profile_run(view, metrics=None, payload=False):
+    """Нэг дахин зуралтыг хэмжиж дуусахад metrics-д бичих.
+
+    Өөр хэмжилт дотор дуудагдвал (фрагментийн эхний ажиллалт бүтэн зуралтын дотор) span болно.
+    """
+    parent = _current.get()
+    if parent is not None:
+        with span(view):
+            yield parent
+        return
+    current = Profile(view, payload)
+    token = _current.set(current)
+    try:
+        yield current
+    finally:
+        current.seconds = time.perf_counter() - current._started
+        _current.reset(token)
+        if metrics is not None:
+            metrics.record(current)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Metrics:
+    """Процесс даяарх хэмжилтийн нэгтгэл: сүүлийн дахин зуралтууд, (харагдац, хэсэг)-ээр
+    хуримтлуулсан дүн. Бүртгэлд бичих алдаа самбарыг зогсоохгүй, error-д үлдэнэ."""
+
+    def __init__(self, log_path=None, prom_path=None, history=HISTORY):
+        self.log_path = log_path
+        self.prom_path = prom_path
+        self.history = deque(maxlen=history)
+        self.error = None
+        # (харагдац, хэсэг) -> [тоо, нийт сек, дээд сек, мөр, байт]; хэсэг '' нь бүтэн зуралт
+        self._totals = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(os.environ.get(LOG_ENV) or None, os.environ.get(PROM_ENV) or None)
+
+    def _add(self, key, seconds, rows=None, size=None):
+        total = self._totals.setdefault(key, [0, 0.0, 0.0, 0, 0])
+        total[0] += 1
+        total[1] += seconds
+        total[2] = max(total[2], seconds)
+        total[3] += rows or 0
+        total[4] += size or 0
+
+    def record(self, profile):
+        with self._lock:
+            self.history.append(profile)
+            self._add((profile.view, ''), profile.seconds)
+            for item in profile.spans:
+                self._add((profile.view, item.name), item.seconds, item.rows, item.bytes)
+            try:
+                if self.log_path:
+                    with open(self.log_path, 'a', encoding='utf-8') as f:
+                        f.write(json.dumps(profile.to_dict(), ensure_ascii=False) + "\n")
+                if self.prom_path:
+                    self._write_prometheus()
+            except OSError as error:
+                self.error = str(error)
+
+    def _write_prometheus(self):
+        # Түр файлаар дамжуулан атомаар - collector хагас бичигдсэн файл уншихгүй
+        tmp = f"{self.prom_path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(self._prometheus())
+        os.replace(tmp, self.prom_path)
+
+    def prometheus(self):
+        """Хуримтлагдсан дүн Prometheus текст хэлбэрээр"""
+        with self._lock:
+            return self._prometheus()
+
+    def _prometheus(self):
+        lines = [
+            "# HELP naadam_render_seconds Самбарын бүтэн дахин зуралтын хугацаа",
+            "# TYPE naadam_render_seconds summary",
+        ]
+        spans = []
+        for (view, name), (count, seconds, _, _, _) in sorted(self._totals.items()):
+            if name:
+                spans.append((view, name))
+                continue
+            labels = f'view="{_escape(view)}"'
+            lines += [f"naadam_render_seconds_sum{{{labels}}} {seconds:.6f}",
+                      f"naadam_render_seconds_count{{{labels}}} {count}"]
+        metrics = (
+            ('naadam_span_seconds', 'summary', "Самбарын хэсгийн хугацаа"),
+            ('naadam_span_rows_total', 'counter', "Хэсэгт боловсруулсан мөрийн тоо"),
+            ('naadam_chart_bytes_total', 'counter', "Диаграмын JSON хэмжээ (хэмжилтийн самбар нээлттэй үед)"),
+        )
+        for metric, kind, help_text in metrics:
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+            for view, name in spans:
+                count, seconds, _, rows, size = self._totals[(view, name)]
+                labels = f'view="{_escape(view)}",span="{_escape(name)}"'
+                if kind == 'summary':
+                    lines += [f"{metric}_sum{{{labels}}} {seconds:.6f}", f"{metric}_count{{{labels}}} {count}"]
+                elif metric == 'naadam_span_rows_total' and rows:
+                    lines.append(f"{metric}{{{labels}}} {rows}")
+                elif metric == 'naadam_chart_bytes_total' and size:
+                    lines.append(f"{metric}{{{labels}}} {size}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self, view=None):
+        """(харагдац, хэсэг)-ийн дундаж, дээд хугацаа болон дундаж мөр, хэмжээ"""
+        with self._lock:
+            rows = [(v, name or "∑", count, seconds / count * 1000, peak * 1000,
+                     rows / count if rows else None, size / count / 1024 if size else None)
+                    for (v, name), (count, seconds, peak, rows, size) in self._totals.items()
+                    if view is None or v == view]
+        return pd.DataFrame(rows, columns=SUMMARY_COLUMNS)
@@ -0,0 +1,53 @@
+"""Морь, уяач болон уралдааны бичлэгийн хэш индекс - O(1) хайлт"""
+
+import numpy as np
+
+
+def _positions(series):
+    """Утга -> анхны мөрийн байрлал (давхардсан утгад эхнийх нь)"""
+    values = series.to_numpy()
+    return dict(zip(values[::-1], range(len(values) - 1, -1, -1)))
+
+
+def _groups(series):
+    """Утга -> тухайн утгатай бүх мөрийн байрлалын массив"""
+    if series.empty:
+        return {}
+    return {key: np.asarray(pos) for key, pos in series.groupby(series, sort=False, observed=True).indices.items()}
+
+
+class EntityIndex:
+    """Ачаалах үед нэг удаа бүтээгдэх морь/уяач/бичлэгийн индекс"""
+
+    def __init__(self, horses_df, trainers_df, record_df):
+        self.horses = horses_df.reset_index(drop=True)
+        self.trainers = trainers_df.reset_index(drop=True)
+        self.records = record_df.reset_index(drop=True)
+
+        self._horse_pos = _positions(self.horses['horse_id'])
+        self._trainer_pos = _positions(self.trainers['trainer_id'])
+        self._trainer_ids = dict(zip(self.trainers['trainer_name'].to_numpy()[::-1],
+                                     self.trainers['trainer_id'].to_numpy()[::-1]))
+        self._trainer_horses = _groups(self.horses['trainer_id'])
+        self._horse_records = _groups(self.records['horse_id'])
+
+    def horse(self, horse_id):
+        """horse_id -> морины мөр (олдохгүй бол None)"""
+        pos = self._horse_pos.get(horse_id)
+        return None if pos is None else self.horses.iloc[pos]
+
+    def trainer(self, trainer_id):
+        """trainer_id -> уяачийн мөр (олдохгүй бол None)"""
+        pos = self._trainer_pos.get(trainer_id)
+        return None if pos is None else self.trainers.iloc[pos]
+
+    def trainer_id(self, trainer_name):
+        return self._trainer_ids.get(trainer_name)
+
+    def trainer_horses(self, trainer_id):
+        """Уяачийн сургасан морьд"""
+        return self.horses.take(self._trainer_horses.get(trainer_id, np.array([], dtype=np.intp)))
+
+    def horse_records(self, horse_id):
+        """Морины уралдааны бичлэгүүд"""
+        return self.records.take(self._horse_records.get(horse_id, np.array([], dtype=np.intp)))
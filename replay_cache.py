@@ -0,0 +1,110 @@
+"""Уралдааны дахин тоглуулалтын фрэймийн кэш - санах ойгоор хязгаарлагдсан LRU"""
+
+import threading
+from collections import OrderedDict
+
+
+class ReplayFrame:
+    """Нэг агшинд бэлтгэсэн өгөгдөл: морь бүрийн мөр, түүхийн төгсгөлүүд, байрлалын диаграм,
+    гүйлгэх статистик"""
+
+    def __init__(self, time, snapshot, stops, figure_json=None, stats=None):
+        self.time = time
+        self.snapshot = snapshot
+        self.stops = stops
+        self.figure_json = figure_json
+        self.stats = stats
+
+    @property
+    def nbytes(self):
+        size = int(self.snapshot.memory_usage(index=True, deep=True).sum()) + self.stops.nbytes
+        if self.stats is not None:
+            size += int(self.stats.memory_usage(index=True, deep=True).sum())
+        return size + (len(self.figure_json) if self.figure_json else 0)
+
+
+class FrameCache:
+    """(уралдаан, цаг) түлхүүртэй фрэймүүдийг `max_bytes` хэмжээнд багтаан хадгална"""
+
+    def __init__(self, index, race_key, figure_builder=None, max_bytes=64 * 1024 * 1024, tracker=None):
+        self.index = index
+        self.race_key = race_key
+        self.figure_builder = figure_builder
+        self.max_bytes = max_bytes
+        # Гүйлгэх статистикийг урагш л шинэчилнэ; ухарвал эхнээс нь дахин тоолно
+        self.tracker = tracker
+        self._tracked_time = None
+        self._tracked_stops = None
+        self._tracker_lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._frames = OrderedDict()
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def __len__(self):
+        return len(self._frames)
+
+    def _build(self, t):
+        snapshot = self.index.latest_at(t)
+        figure_json = None
+        if self.figure_builder is not None and len(snapshot):
+            figure_json = self.figure_builder(snapshot, t).to_json()
+        stops = self.index.history_stops(t)
+        return ReplayFrame(t, snapshot, stops, figure_json, self._advance(t, stops))
+
+    def _advance(self, t, stops):
+        """Статистикийг t хүртэл зөвхөн шинэ мөрүүдээр шинэчлэх"""
+        if self.tracker is None:
+            return None
+        with self._tracker_lock:
+            if self._tracked_time is None or t < self._tracked_time:
+                self.tracker.reset()
+                self._tracked_stops = self.index.starts
+            self.tracker.update(self.index.rows_between(self._tracked_stops, stops))
+            self._tracked_time, self._tracked_stops = t, stops
+            return self.tracker.snapshot()
+
+    def get(self, t):
+        """t агшны фрэйм; байхгүй бол бэлтгээд кэшлэнэ"""
+        key = (self.race_key, int(t))
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is not None:
+                self._frames.move_to_end(key)
+                self.hits += 1
+                return frame
+            self.misses += 1
+        frame = self._build(int(t))
+        self._put(key, frame)
+        return frame
+
+    def _put(self, key, frame):
+        with self._lock:
+            if key in self._frames:
+                return
+            self._frames[key] = frame
+            self.nbytes += frame.nbytes
+            # Хязгаараас хэтэрвэл хамгийн удаан ашиглаагүйг гаргана
+            while self.nbytes > self.max_bytes and len(self._frames) > 1:
+                _, evicted = self._frames.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+
+    @property
+    def precomputing(self):
+        return self._worker is not None and self._worker.is_alive()
+
+    def precompute(self, times):
+        """Бүх фрэймийг арын урсгалд урьдчилан бэлтгэх (аль хэдийн ажиллаж байвал алгасна)"""
+        if self.precomputing:
+            return self._worker
+
+        def work():
+            for t in times:
+                if (self.race_key, int(t)) not in self._frames:
+                    self._put((self.race_key, int(t)), self._build(int(t)))
+
+        self._worker = threading.Thread(target=work, daemon=True)
+        self._worker.start()
+        return self._worker
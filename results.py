@@ -0,0 +1,91 @@
+"""Уралдааны үр дүнгийн хүснэгтийн сервер талын шүүлт, эрэмбэлэлт, хуудаслалт"""
+
+import threading
+
+import numpy as np
+
+ALL = "Бүгд"
+POSITION_FILTERS = [ALL, "Эхний 10", "Эхний 20", "Сүүлийн 10"]
+
+
+def _label_ranks(values):
+    """Ангиллын баганын утгын (текстийн) эрэмбэ, хоосон нь эхэнд.
+
+    Кодын хүснэгтэд шинэ утга төгсгөлд нэмэгддэг тул код нь текстийн дараалалтай
+    таарахгүй болно; SQL-ийн ORDER BY-тэй ижил эрэмбэлэхийн тулд утгаар нь эрэмбэлнэ.
+    """
+    codes = values.cat.codes.to_numpy()
+    categories = values.cat.categories.to_numpy(dtype=str)
+    if len(categories) == 0:
+        return codes
+    ranks = np.empty(len(categories), dtype=np.int64)
+    ranks[np.argsort(categories, kind='stable')] = np.arange(len(categories))
+    return np.where(codes >= 0, ranks[np.maximum(codes, 0)], -1)
+
+
+class ResultsQuery:
+    """Шүүлтүүрийг нэг boolean маск болгон хөрвүүлж, эрэмбэлсэн хуудсыг хуулбаргүй буцаана.
+
+    Багана бүрийн эрэмбийн сэлгэмэлийг нэг удаа тооцоолж хадгалах тул хуудас бүр
+    O(n) маск + page_size мөрийн take болно.
+    """
+
+    def __init__(self, df):
+        self.df = df.reset_index(drop=True)
+        self._positions = self.df['final_position'].to_numpy()
+        self._speeds = self.df['average_speed_kmh'].to_numpy()
+        # Уралдаан бүрийн оролцогчдын тоо ("Сүүлийн 10" шүүлтүүрт)
+        if 'race_id' in self.df.columns:
+            self._field = self.df.groupby('race_id', observed=True)['final_position'].transform('max').to_numpy()
+        else:
+            self._field = np.full(len(self.df), self._positions.max() if len(self.df) else 0)
+        self._orders = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.df)
+
+    def speed_range(self):
+        """Дундаж хурдны (бага, их) утга - шүүлтүүрийн гулсуурт"""
+        speeds = self.df['average_speed_kmh']
+        return (float(speeds.min()), float(speeds.max())) if len(speeds) else (0.0, 0.0)
+
+    def weathers(self):
+        """Бичлэгт байгаа цаг агаарын нөхцлүүд (кодын хүснэгтийн бүх утга биш)"""
+        return sorted(self.df['weather'].dropna().unique().tolist())
+
+    def mask(self, position=ALL, min_speed=None, weather=ALL):
+        """Шүүлтүүрийн утгуудаас нэг маск бүтээх"""
+        mask = np.ones(len(self.df), dtype=bool)
+        if position == "Эхний 10":
+            mask &= self._positions <= 10
+        elif position == "Эхний 20":
+            mask &= self._positions <= 20
+        elif position == "Сүүлийн 10":
+            mask &= self._positions > self._field - 10
+        if min_speed is not None:
+            mask &= self._speeds >= min_speed
+        if weather != ALL:
+            mask &= (self.df['weather'] == weather).to_numpy()
+        return mask
+
+    def count(self, mask):
+        return int(mask.sum())
+
+    def order(self, column, ascending=True):
+        """Баганын эрэмбийн сэлгэмэл (нэг удаа тооцоолно)"""
+        key = (column, ascending)
+        with self._lock:
+            if key not in self._orders:
+                values = self.df[column]
+                keys = _label_ranks(values) if values.dtype == 'category' else values.to_numpy()
+                order = np.argsort(keys, kind='stable')
+                self._orders[key] = order if ascending else order[::-1]
+            return self._orders[key]
+
+    def window(self, mask, sort_by='final_position', ascending=True, page=0, page_size=50):
+        """Эрэмбэлсэн илэрцийн нэг хуудас: (DataFrame, нийт илэрцийн тоо)"""
+        order = self.order(sort_by, ascending)
+        hits = order[mask[order]]
+        start = page * page_size
+        return self.df.take(hits[start:start + page_size]), len(hits)
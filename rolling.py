@@ -0,0 +1,157 @@
+"""Шууд телеметрийн онлайн статистик - морь бүрт тогтмол санах ойтой, мөр бүрт O(1)"""
+
+from collections import deque
+import math
+
+import numpy as np
+import pandas as pd
+
+# Хурдны EWMA-ийн хагас задралын хугацаа (секунд)
+SPEED_HALFLIFE = 30
+# Зүрхний цохилтын дээд утгыг харах цонх (секунд)
+HR_WINDOW = 60
+# Зөрүү тооцох зайн тэмдэг хоорондын зай (км)
+MARK_KM = 0.1
+# Сүүлийн км-ийн цэгийн дээд тоо (зогссон морь санах ой дүүргэхгүй)
+PACE_POINTS = 1024
+# Хадгалах зайн тэмдгийн дээд тоо (100 км)
+MAX_MARKS = 1000
+
+STATS_COLUMNS = ['horse_id', 'ewma_speed_kmh', 'heart_rate_max', 'pace_last_km_seconds',
+                 'projected_finish_seconds', 'gap_km', 'gap_seconds']
+
+
+class HorseStats:
+    """Нэг морины гүйлгэх статистик: EWMA хурд, цонхон дахь зүрхний цохилтын дээд,
+    сүүлийн км-ийн хурдац, зайн тэмдэг бүрийг давсан цаг"""
+
+    __slots__ = ('time', 'distance', 'ewma_speed', '_hr', '_km', 'marks')
+
+    def __init__(self):
+        self.time = None
+        self.distance = 0.0
+        self.ewma_speed = 0.0
+        self._hr = deque()
+        self._km = deque(maxlen=PACE_POINTS)
+        self.marks = []
+
+    def update(self, t, distance, speed, heart_rate):
+        if self.time is None:
+            self.ewma_speed = speed
+            self._cross(t, t, distance, distance)
+        else:
+            # Түүврийн завсар жигд бус байж болох тул цагаас хамаарсан жин
+            alpha = 1 - 0.5 ** (max(t - self.time, 0) / SPEED_HALFLIFE)
+            self.ewma_speed += alpha * (speed - self.ewma_speed)
+            self._cross(self.time, t, self.distance, distance)
+
+        # Цонхон дахь дээд утга: буурах дараалалтай deque (зүрхний мэдрэгчгүй бол NaN)
+        if not math.isnan(heart_rate):
+            while self._hr and self._hr[-1][1] <= heart_rate:
+                self._hr.pop()
+            self._hr.append((t, heart_rate))
+        while self._hr and self._hr[0][0] <= t - HR_WINDOW:
+            self._hr.popleft()
+
+        # Сүүлийн 1 км-ийн цэгүүд (зогсож байвал сүүлийн цэгийн цагийг шинэчилнэ)
+        if self._km and self._km[-1][1] >= distance:
+            self._km[-1] = (t, self._km[-1][1])
+        else:
+            self._km.append((t, distance))
+        while len(self._km) > 2 and self._km[1][1] <= distance - 1.0:
+            self._km.popleft()
+
+        self.time = t
+        self.distance = max(distance, self.distance)
+
+    def _cross(self, t0, t1, d0, d1):
+        """(d0, d1] хооронд давсан тэмдгүүдийн цагийг шугаман интерполяцаар бичих"""
+        while len(self.marks) < MAX_MARKS and len(self.marks) * MARK_KM <= d1 + 1e-9:
+            mark = len(self.marks) * MARK_KM
+            share = (mark - d0) / (d1 - d0) if d1 > d0 else 1.0
+            self.marks.append(t0 + (t1 - t0) * min(max(share, 0.0), 1.0))
+
+    @property
+    def heart_rate_max(self):
+        return self._hr[0][1] if self._hr else math.nan
+
+    @property
+    def pace_last_km(self):
+        """Сүүлийн 1 км-ийг туулсан хугацаа (секунд/км)"""
+        if len(self._km) < 2:
+            return math.nan
+        (t0, d0), (t1, d1) = self._km[0], self._km[1]
+        target = self.distance - 1.0
+        if d0 <= target < d1:
+            start = t0 + (t1 - t0) * (target - d0) / (d1 - d0)
+            return self.time - start
+        # 1 км-ээс бага туулсан бол байгаа зайгаар хэмжинэ
+        covered = self.distance - d0
+        return (self.time - t0) / covered if covered > 0 else math.nan
+
+    def time_at(self, distance):
+        """Энэ морь тухайн зайг давсан цаг (тэмдгүүдийн хооронд интерполяц)"""
+        position = distance / MARK_KM
+        i = int(position)
+        if i + 1 < len(self.marks):
+            return self.marks[i] + (self.marks[i + 1] - self.marks[i]) * (position - i)
+        return self.marks[-1] if self.marks and i < len(self.marks) else math.nan
+
+    def projected_finish(self, race_km):
+        """Одоогийн хурдацаар уралдааны зайг дуусгах цаг"""
+        if not race_km or self.time is None:
+            return math.nan
+        if self.distance >= race_km:
+            return self.time_at(race_km)
+        pace = self.pace_last_km
+        if math.isnan(pace) or pace <= 0:
+            if self.ewma_speed <= 0:
+                return math.nan
+            pace = 3600 / self.ewma_speed
+        return self.time + (race_km - self.distance) * pace
+
+
+class RollingStats:
+    """Морь бүрийн HorseStats-ийг шинэ мөрүүдээр шинэчилж, агшны хүснэгт гаргана"""
+
+    def __init__(self, race_km=None):
+        self.race_km = race_km
+        self.horses = {}
+        self.samples = 0
+
+    def __len__(self):
+        return len(self.horses)
+
+    def reset(self):
+        self.horses = {}
+        self.samples = 0
+
+    def update(self, rows):
+        """Мөрүүдийг (морь бүрт цагийн дарааллаар) нэмэх"""
+        if rows.empty:
+            return
+        columns = zip(rows['horse_id'].to_numpy().tolist(),
+                      rows['timestamp_seconds'].to_numpy().tolist(),
+                      rows['distance_covered_km'].to_numpy().tolist(),
+                      rows['current_speed_kmh'].to_numpy().tolist(),
+                      (rows['heart_rate'].to_numpy(dtype=float) if 'heart_rate' in rows.columns
+                       else np.full(len(rows), np.nan)).tolist())
+        for horse_id, t, distance, speed, heart_rate in columns:
+            horse = self.horses.get(horse_id)
+            if horse is None:
+                horse = self.horses[horse_id] = HorseStats()
+            horse.update(t, distance, speed, heart_rate)
+        self.samples += len(rows)
+
+    def snapshot(self):
+        """Морь бүрийн одоогийн статистик; зөрүүг тэргүүлэгчийн зайн тэмдгээс тооцно"""
+        if not self.horses:
+            return pd.DataFrame(columns=STATS_COLUMNS)
+        leader = max(self.horses.values(), key=lambda horse: horse.distance)
+        rows = []
+        for horse_id, horse in self.horses.items():
+            gap_seconds = 0.0 if horse is leader else horse.time - leader.time_at(horse.distance)
+            rows.append((horse_id, horse.ewma_speed, horse.heart_rate_max, horse.pace_last_km,
+                         horse.projected_finish(self.race_km), leader.distance - horse.distance,
+                         max(gap_seconds, 0.0)))
+        return pd.DataFrame(rows, columns=STATS_COLUMNS)
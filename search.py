@@ -0,0 +1,88 @@
+"""Бичих явцад хайх индекс - морь, уяачийн сонгогчид зориулсан"""
+
+import bisect
+import re
+import unicodedata
+
+import numpy as np
+
+# Монгол кирилл үсгийг хайлтад ойролцоо үсэгт буулгах
+FOLD = str.maketrans({'ө': 'о', 'ү': 'у', 'ё': 'е', 'й': 'и', 'ъ': '', 'ь': ''})
+SEPARATORS = re.compile(r"[\s_\-.,/()\"']+")
+
+# Сонгогчийн хайлтын талбарууд: бүртгэл -> (түлхүүр багана, хайх баганууд)
+FIELDS = {
+    'horses': ('horse_id', ('horse_id', 'rider_name', 'trainer', 'aimag', 'sum')),
+    'trainers': ('trainer_id', ('trainer_name', 'trainer_id', 'aimag', 'sum')),
+}
+
+
+def normalize(text):
+    """Том жижиг үсэг, ө/ү зэрэг үсгийн ялгааг арилгасан хайлтын хэлбэр"""
+    text = unicodedata.normalize('NFKC', str(text)).casefold().translate(FOLD)
+    return SEPARATORS.sub(' ', text).strip()
+
+
+def documents(df, name):
+    """Бүртгэлийн мөр бүрийн хэвийн болгосон хайлтын бичвэр (SQL хайлтад хадгалагдана)"""
+    _, fields = FIELDS[name]
+    return [' '.join(normalize(value) for value in row) for row in zip(*(df[col] for col in fields))]
+
+
+class SearchIndex:
+    """Талбаруудын үгсийн эрэмбэлсэн жагсаалт дээрх угтвар хайлт, олдохгүй бол дэд мөрөөр хайна"""
+
+    def __init__(self, keys, fields):
+        self.keys = list(keys)
+        columns = [[normalize(value) for value in field] for field in fields]
+        self._docs = np.array([' '.join(values) for values in zip(*columns)], dtype=str) \
+            if columns else np.array([], dtype=str)
+
+        entries = sorted(
+            (token, pos)
+            for column in columns
+            for pos, value in enumerate(column)
+            for token in value.split()
+        )
+        self._tokens = [token for token, _ in entries]
+        self._positions = np.array([pos for _, pos in entries], dtype=np.int64)
+
+    @classmethod
+    def from_frame(cls, df, name):
+        """Бүртгэлийн DataFrame-ээс FIELDS-ийн талбаруудаар индекс бүтээх"""
+        key, fields = FIELDS[name]
+        return cls(df[key], [df[col] for col in fields])
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _prefix(self, token):
+        lo = bisect.bisect_left(self._tokens, token)
+        hi = bisect.bisect_left(self._tokens, token + '\uffff')
+        return np.unique(self._positions[lo:hi])
+
+    def match(self, query):
+        """Асуулгад тохирох мөрүүдийн байрлал (эрэмбэлэгдсэн)"""
+        tokens = normalize(query).split()
+        if not tokens:
+            return np.arange(len(self.keys))
+        # Үг бүрийн угтварт тохирсон мөрүүдийн огтлолцол
+        found = self._prefix(tokens[0])
+        for token in tokens[1:]:
+            found = np.intersect1d(found, self._prefix(token), assume_unique=True)
+        if len(found) == 0:
+            found = np.flatnonzero(np.char.find(self._docs, ' '.join(tokens)) >= 0)
+        return found
+
+    def count(self, found):
+        return len(found)
+
+    def page(self, found, page=0, page_size=20):
+        """Илэрцийн нэг хуудасны түлхүүрүүд"""
+        start = page * page_size
+        return [self.keys[pos] for pos in found[start:start + page_size]]
+
+    def search(self, query, page=0, page_size=20):
+        """Хуудаслагдсан илэрц: (түлхүүрүүд, нийт илэрцийн тоо)"""
+        found = self.match(query)
+        return self.page(found, page, page_size), len(found)
@@ -0,0 +1,79 @@
+"""Газарзүйн нэгтгэл - цэгүүдийг зургаан өнцөгт нүдэнд (H3 маягийн) хувааж нүд бүрээр дүгнэх
+
+Нүдний хэмжээ томруулалтаас хамаарна (дэлгэц дээр ойролцоогоор HEX_PIXELS пиксел), тиймээс
+газрын зураг руу илгээх өгөгдөл цэгийн тоогоор бус нүдний тоогоор хязгаарлагдана.
+"""
+
+import numpy as np
+
+from paths import zoom_tolerance
+
+# Нүдний өргөн (пиксел)
+HEX_PIXELS = 24
+# Үүнээс олон цэгтэй бол нэгтгэлийн горимыг анхдагчаар сонгоно
+POINT_LIMIT = 5000
+
+SQRT3 = np.sqrt(3.0)
+# Зургаан өнцөгтийн оройнуудын өнцөг (оройгоороо дээш)
+_CORNERS = np.radians(30 + 60 * np.arange(7))
+
+
+def hex_size(zoom, scale=1.0):
+    """Томруулалтад тохирох нүдний төвөөс оройн зай (проекцын градус).
+
+    Web Mercator-т нэг пиксел өргөргийн cos(lat) дахин бага градус тул scale-аар үржүүлнэ.
+    """
+    return zoom_tolerance(zoom, HEX_PIXELS / SQRT3) * scale
+
+
+def hex_cells(lat, lon, size, scale):
+    """Цэг бүрийн зургаан өнцөгт нүдний тэнхлэгийн координат (q, r)"""
+    x = np.asarray(lon, dtype=float) * scale
+    y = np.asarray(lat, dtype=float)
+    q = (SQRT3 / 3 * x - y / 3) / size
+    r = (2 / 3 * y) / size
+    # Кубын координатаар дугуйлж, хамгийн их алдаатай тэнхлэгийг засна
+    s = -q - r
+    rq, rr, rs = np.round(q), np.round(r), np.round(s)
+    dq, dr, ds = np.abs(rq - q), np.abs(rr - r), np.abs(rs - s)
+    fix_q = (dq > dr) & (dq > ds)
+    fix_r = ~fix_q & (dr > ds)
+    rq = np.where(fix_q, -rr - rs, rq)
+    rr = np.where(fix_r, -rq - rs, rr)
+    return rq.astype(np.int64), rr.astype(np.int64)
+
+
+def hex_centers(q, r, size, scale):
+    """(q, r) нүдний төв (өргөрөг, уртраг)"""
+    x = size * (SQRT3 * q + SQRT3 / 2 * r)
+    y = size * 1.5 * r
+    return y, x / scale
+
+
+def aggregate_cells(df, zoom, scale=None):
+    """Цэгүүдийг нүдээр бүлэглэж дундаж хурд, өндөр, морины тоо, цэгийн тоог гаргах"""
+    if scale is None:
+        scale = np.cos(np.radians(df['latitude'].mean()))
+    size = hex_size(zoom, scale)
+    q, r = hex_cells(df['latitude'].to_numpy(), df['longitude'].to_numpy(), size, scale)
+    cells = (df.assign(q=q, r=r)
+               .groupby(['q', 'r'], sort=False)
+               .agg(mean_speed_kmh=('current_speed_kmh', 'mean'),
+                    mean_elevation_m=('elevation_m', 'mean'),
+                    horses=('horse_id', 'nunique'),
+                    points=('horse_id', 'size'))
+               .reset_index())
+    cells['latitude'], cells['longitude'] = hex_centers(cells['q'].to_numpy(), cells['r'].to_numpy(), size, scale)
+    cells['cell_id'] = cells['q'].astype(str) + ':' + cells['r'].astype(str)
+    return cells, size
+
+
+def cells_geojson(cells, size, scale):
+    """Нүд бүрийн зургаан өнцөгт полигон (choropleth давхаргад)"""
+    lat = cells['latitude'].to_numpy()[:, None] + size * np.sin(_CORNERS)[None, :]
+    lon = cells['longitude'].to_numpy()[:, None] + size * np.cos(_CORNERS)[None, :] / scale
+    rings = np.stack((np.round(lon, 6), np.round(lat, 6)), axis=-1).tolist()
+    features = [{'type': 'Feature', 'id': cell_id, 'properties': {},
+                 'geometry': {'type': 'Polygon', 'coordinates': [ring]}}
+                for cell_id, ring in zip(cells['cell_id'], rings)]
+    return {'type': 'FeatureCollection', 'features': features}
@@ -0,0 +1,467 @@
+"""Сонголтот SQLite хадгалалт - шүүлт, нэгтгэлийг индекстэй асуулга болгон илгээх
+
+Parquet сан нь эх үнэн хэвээр; энэ нь түүнээс синк хийгдэх нэг файлт хуулбар
+({store}/naadam.sqlite). Самбарууд бүх хүснэгтийг санах ойд ачаалж маск тавихын
+оронд WHERE/ORDER BY/LIMIT-тэй асуулга илгээж зөвхөн харуулах мөрүүдээ авна, тиймээс
+архив санах ойгоос том болсон ч санах ой хязгаартай хэвээр.
+
+Асаах: NAADAM_SQLITE=1 (DataStore синк хийнэ) эсвэл python ingest.py --sqlite
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+from results import ALL
+from search import FIELDS, documents, normalize
+from store import DERIVED, PARTITIONED, SCHEMAS, STORE_DIR, ParquetTable, apply_schema, partition_parts
+
+SQL_ENV = 'NAADAM_SQLITE'
+SQLITE_FILE = "naadam.sqlite"
+# Нэг INSERT-ээр бичих мөрийн тоо
+INSERT_ROWS = 50_000
+
+# Хуваалтын хүснэгтүүд race_id баганатай (live-ийн Parquet-д зам нь уралдааныг заана)
+TABLES = {
+    'horses': dict(SCHEMAS['horses']),
+    'trainers': dict(SCHEMAS['trainers']),
+    'records': dict(SCHEMAS['records']),
+    'live': {'race_id': 'string', **SCHEMAS['live']},
+}
+
+# Индексүүд: нэр -> (хүснэгт, баганууд). Телеметрийн асуулга үргэлж нэг уралдаанд
+# хамаарах тул (horse_id, timestamp_seconds) индекс race_id-аар эхэлнэ.
+INDEXES = {
+    'horses_horse_id': ('horses', ('horse_id',)),
+    'horses_trainer_id': ('horses', ('trainer_id',)),
+    'horses_racing_group': ('horses', ('racing_group',)),
+    'trainers_trainer_id': ('trainers', ('trainer_id',)),
+    'trainers_trainer_name': ('trainers', ('trainer_name',)),
+    'records_horse_id': ('records', ('horse_id',)),
+    'records_racing_group': ('records', ('racing_group',)),
+    'records_race_position': ('records', ('race_id', 'final_position')),
+    'live_race_horse_time': ('live', ('race_id', 'horse_id', 'timestamp_seconds')),
+    'search_name': ('search', ('name',)),
+}
+
+RESULT_SORTS = ('final_position', 'average_speed_kmh', 'max_speed_kmh', 'prize_money_tugrik', 'horse_id')
+
+
+def sqlite_path(store_dir=STORE_DIR):
+    return os.path.join(store_dir, SQLITE_FILE)
+
+
+def enabled():
+    return os.environ.get(SQL_ENV, '') not in ('', '0')
+
+
+def _sql_type(dtype):
+    if dtype.startswith('int'):
+        return 'INTEGER'
+    return 'REAL' if dtype == 'float64' else 'TEXT'
+
+
+def _rows(df):
+    """DataFrame-ийн мөрүүдийг sqlite3-д ойлгогдох Python утгууд болгох (NaN -> NULL)"""
+    columns = [df[col].astype(object).where(df[col].notna(), None).tolist() for col in df.columns]
+    return zip(*columns)
+
+
+class SqlStore:
+    """naadam.sqlite файл: Parquet сантай хувилбараар нь синк хийж, уншигчдад асуулга өгнө.
+
+    Бичих нь DataStore-ийн түгжээн дор нэг урсгалаас; уншигч бүр өөрийн read-only
+    холболт нээнэ (WAL горимд бичилтийг хүлээхгүй).
+    """
+
+    def __init__(self, path, codes=None):
+        self.path = path
+        self.codes = codes
+        self._lock = threading.Lock()
+
+    def connect(self):
+        """Уншихад зориулсан шинэ холболт (streamlit сесс бүр өөр урсгалд ажиллана)"""
+        return sqlite3.connect(f"file:{quote(os.path.abspath(self.path))}?mode=ro", uri=True)
+
+    def query(self, sql, params=(), name=None):
+        """Асуулгын үр дүнг DataFrame болгож, name өгвөл хүснэгтийн схемийг (кодтой) хэрэглэх"""
+        with closing(self.connect()) as conn:
+            df = pd.read_sql_query(sql, conn, params=list(params))
+        return df if name is None else apply_schema(df, name, self.codes)
+
+    def scalar(self, sql, params=()):
+        with closing(self.connect()) as conn:
+            return conn.execute(sql, list(params)).fetchone()[0]
+
+    # --- синк ---------------------------------------------------------------
+
+    def _writer(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _create(self, conn):
+        for name, schema in TABLES.items():
+            columns = ", ".join(f'"{col}" {_sql_type(dtype)}' for col, dtype in schema.items())
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {name} ({columns})")
+        # Синк хийгдсэн хүснэгт/хуваалт бүрийн хувилбар ('horses', 'live/<race_id>' гэх мэт)
+        conn.execute("CREATE TABLE IF NOT EXISTS versions (key TEXT PRIMARY KEY, version TEXT)")
+        # Бүртгэлийн мөр бүрийн хэвийн болгосон хайлтын бичвэр (search.FIELDS)
+        conn.execute("CREATE TABLE IF NOT EXISTS search (name TEXT, key TEXT, doc TEXT)")
+
+    def _insert(self, conn, name, df, race=None):
+        if race is not None:
+            df = df.assign(race_id=race)
+        columns = [col for col in TABLES[name] if col in df.columns]
+        names = ", ".join(f'"{col}"' for col in columns)
+        sql = f"INSERT INTO {name} ({names}) VALUES ({', '.join('?' * len(columns))})"
+        for start in range(0, len(df), INSERT_ROWS):
+            conn.executemany(sql, _rows(df[columns].iloc[start:start + INSERT_ROWS]))
+
+    @staticmethod
+    def _columns(table):
+        """Хүснэгтээс SQL-д бичих баганууд (уламжилсан баганыг Table тооцоолно)"""
+        derived = DERIVED.get(table.name, {})
+        return [col for col in TABLES[table.name] if col in table.columns or col in derived]
+
+    def _set_version(self, conn, key, version):
+        conn.execute("INSERT OR REPLACE INTO versions (key, version) VALUES (?, ?)", (key, version))
+
+    def sync(self, horses, trainers, races, store_dir=None):
+        """Хувилбар нь өөрчлөгдсөн хүснэгт, хуваалтыг л дахин бичих.
+
+        store_dir өгвөл хуваалтыг каталогийн кэшээр биш түр ParquetTable-ээр уншина
+        (бүх архивыг нэг дор санах ойд байлгахгүй).
+        """
+        with self._lock, closing(self._writer()) as conn:
+            with conn:
+                self._create(conn)
+            stored = dict(conn.execute("SELECT key, version FROM versions"))
+            changed = []
+            for table in (horses, trainers):
+                if stored.get(table.name) != table.version:
+                    with conn:
+                        conn.execute(f"DELETE FROM {table.name}")
+                        self._insert(conn, table.name, table.select(self._columns(table)))
+                        self._set_version(conn, table.name, table.version)
+                    changed.append(table.name)
+                if stored.get(f"search:{table.name}") != table.version:
+                    with conn:
+                        self._index_search(conn, table)
+                        self._set_version(conn, f"search:{table.name}", table.version)
+
+            current = {}
+            for row in races.summaries.itertuples():
+                for name in PARTITIONED:
+                    current[f"{name}/{row.race_id}"] = (row.race_id, name, getattr(row, f"{name}_version"))
+            for key in [key for key in stored if '/' in key and key not in current]:
+                name, race = key.split('/', 1)
+                with conn:
+                    conn.execute(f"DELETE FROM {name} WHERE race_id = ?", (race,))
+                    conn.execute("DELETE FROM versions WHERE key = ?", (key,))
+            for key, (race, name, version) in current.items():
+                if stored.get(key) == version:
+                    continue
+                if store_dir is not None:
+                    table = ParquetTable(name, partition_parts(name, race, store_dir), version, self.codes)
+                else:
+                    table = races.table(race, name)
+                with conn:
+                    self.replace_partition(conn, race, name, table)
+                    self._set_version(conn, key, version)
+                changed.append(key)
+
+            # Эхний бүтээлтэд индексийг өгөгдлийн дараа үүсгэх нь хурдан
+            with conn:
+                for index, (name, columns) in INDEXES.items():
+                    conn.execute(f"CREATE INDEX IF NOT EXISTS {index} ON {name} ({', '.join(columns)})")
+            if changed:
+                conn.execute("ANALYZE")
+        return changed
+
+    def _index_search(self, conn, table):
+        key, fields = FIELDS[table.name]
+        df = table.select(list(dict.fromkeys((key,) + fields)))
+        conn.execute("DELETE FROM search WHERE name = ?", (table.name,))
+        conn.executemany("INSERT INTO search (name, key, doc) VALUES (?, ?, ?)",
+                         zip([table.name] * len(df), df[key].astype(str), documents(df, table.name)))
+
+    def replace_partition(self, conn, race, name, table):
+        conn.execute(f"DELETE FROM {name} WHERE race_id = ?", (race,))
+        df = table.select(self._columns(table))
+        self._insert(conn, name, df, race if name == 'live' else None)
+
+    def append_live(self, race, rows, table, version):
+        """Нэмэгдсэн телеметрийн мөрүүдийг залгах. Уламжилсан баганууд (морины бүх түүхээс
+        тооцоологдоно) мөрүүдэд байхгүй бол уралдааны телеметрийг бүтнээр нь дахин бичнэ."""
+        with self._lock, closing(self._writer()) as conn, conn:
+            if set(TABLES['live']) - {'race_id'} <= set(rows.columns):
+                self._insert(conn, 'live', apply_schema(rows, 'live', self.codes), race)
+            else:
+                self.replace_partition(conn, race, 'live', table)
+            self._set_version(conn, f"live/{race}", version)
+
+    # --- асуулгын объектууд ---------------------------------------------------
+
+    def results(self, race=None, columns=None):
+        return SqlResultsQuery(self, race, columns)
+
+    def entities(self):
+        return SqlEntityIndex(self)
+
+    def live(self, race):
+        return SqlLiveQuery(self, race)
+
+
+class SqlResultsQuery:
+    """ResultsQuery-ийн SQL хувилбар: маск нь (WHERE, параметрүүд), хуудас нь LIMIT/OFFSET.
+
+    Шүүлт records_race_position индексээр, "Сүүлийн 10"-ийн оролцогчдын тоо уралдаан
+    бүрийн MAX(final_position)-ийн (индексийн төгсгөл) дэд асуулгаар хийгдэнэ.
+    """
+
+    def __init__(self, sql, race=None, columns=None):
+        self.sql = sql
+        self.race = race
+        self.columns = list(columns or TABLES['records'])
+        self._base = ("race_id = ?", [race]) if race is not None else ("1", [])
+        self._stats = None
+
+    def _summary(self):
+        if self._stats is None:
+            where, params = self._base
+            with closing(self.sql.connect()) as conn:
+                count, lo, hi = conn.execute(
+                    f"SELECT COUNT(*), MIN(average_speed_kmh), MAX(average_speed_kmh) FROM records WHERE {where}",
+                    params).fetchone()
+                weathers = [value for (value,) in conn.execute(
+                    f"SELECT DISTINCT weather FROM records WHERE {where} AND weather IS NOT NULL "
+                    f"ORDER BY weather", params)]
+            self._stats = count, (lo or 0.0, hi or 0.0), weathers
+        return self._stats
+
+    def __len__(self):
+        return self._summary()[0]
+
+    def speed_range(self):
+        return self._summary()[1]
+
+    def weathers(self):
+        return self._summary()[2]
+
+    def mask(self, position=ALL, min_speed=None, weather=ALL):
+        """Шүүлтүүрийн утгуудаас нэг WHERE нөхцөл бүтээх"""
+        where, params = self._base
+        clauses, params = [where], list(params)
+        if position == "Эхний 10":
+            clauses.append("final_position <= 10")
+        elif position == "Эхний 20":
+            clauses.append("final_position <= 20")
+        elif position == "Сүүлийн 10":
+            clauses.append("final_position > (SELECT MAX(field.final_position) FROM records AS field "
+                           "WHERE field.race_id = records.race_id) - 10")
+        if min_speed is not None:
+            clauses.append("average_speed_kmh >= ?")
+            params.append(float(min_speed))
+        if weather != ALL:
+            clauses.append("weather = ?")
+            params.append(weather)
+        return " AND ".join(clauses), params
+
+    def count(self, mask):
+        where, params = mask
+        return self.sql.scalar(f"SELECT COUNT(*) FROM records WHERE {where}", params)
+
+    def window(self, mask, sort_by='final_position', ascending=True, page=0, page_size=50):
+        """Эрэмбэлсэн илэрцийн нэг хуудас: (DataFrame, нийт илэрцийн тоо)"""
+        if sort_by not in RESULT_SORTS:
+            raise ValueError(f"Эрэмбэлэх багана биш: {sort_by}")
+        where, params = mask
+        # Ижил утгатай мөрүүдийн дараалал ResultsQuery-ийн тогтвортой эрэмбэтэй ижил
+        direction = "ASC" if ascending else "DESC"
+        df = self.sql.query(
+            f"SELECT {', '.join(self.columns)} FROM records WHERE {where} "
+            f"ORDER BY {sort_by} {direction}, rowid {direction} LIMIT ? OFFSET ?",
+            params + [page_size, page * page_size], 'records')
+        return df, self.count(mask)
+
+
+class SqlEntityIndex:
+    """EntityIndex-ийн SQL хувилбар: хайлт бүр индекстэй нэг асуулга"""
+
+    RECORD_COLUMNS = ['horse_id', 'race_name', 'date', 'final_position', 'average_speed_kmh',
+                      'max_speed_kmh', 'prize_money_tugrik']
+
+    def __init__(self, sql):
+        self.sql = sql
+
+    def search_indexes(self):
+        """Морь, уяачийн хайлт - бүртгэлийг санах ойд ачаалахгүй SQL хайлт"""
+        return SqlSearchIndex(self.sql, 'horses'), SqlSearchIndex(self.sql, 'trainers')
+
+    def _first(self, name, column, value):
+        df = self.sql.query(f"SELECT * FROM {name} WHERE {column} = ? ORDER BY rowid LIMIT 1", [value], name)
+        return None if df.empty else df.iloc[0]
+
+    def horse(self, horse_id):
+        """horse_id -> морины мөр (олдохгүй бол None)"""
+        return self._first('horses', 'horse_id', horse_id)
+
+    def trainer(self, trainer_id):
+        """trainer_id -> уяачийн мөр (олдохгүй бол None)"""
+        return self._first('trainers', 'trainer_id', trainer_id)
+
+    def trainer_id(self, trainer_name):
+        row = self._first('trainers', 'trainer_name', trainer_name)
+        return None if row is None else row['trainer_id']
+
+    def trainer_horses(self, trainer_id):
+        """Уяачийн сургасан морьд"""
+        return self.sql.query("SELECT * FROM horses WHERE trainer_id = ? ORDER BY rowid", [trainer_id], 'horses')
+
+    def horse_records(self, horse_id):
+        """Морины уралдааны бичлэгүүд"""
+        return self.sql.query(f"SELECT {', '.join(self.RECORD_COLUMNS)} FROM records WHERE horse_id = ? "
+                              f"ORDER BY rowid", [horse_id], 'records')
+
+
+def _like(text):
+    """LIKE загварын тусгай тэмдэгтүүдийг (\\ % _) escape хийх"""
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+class SqlSearchIndex:
+    """SearchIndex-ийн SQL хувилбар: синк хийхэд бичсэн хэвийн бичвэрийг LIKE-аар хайна.
+
+    Илэрц нь (WHERE, параметрүүд) тул хуудас бүр LIMIT/OFFSET-тэй нэг асуулга.
+    """
+
+    def __init__(self, sql, name):
+        self.sql = sql
+        self.name = name
+
+    def __len__(self):
+        return self.sql.scalar("SELECT COUNT(*) FROM search WHERE name = ?", [self.name])
+
+    def match(self, query):
+        """Үг бүр аль нэг талбарын үгийн угтвар; олдохгүй бол бүтэн асуулга дэд мөр"""
+        tokens = normalize(query).split()
+        where, params = "name = ?", [self.name]
+        if not tokens:
+            return where, params
+        prefix = where + " AND ' ' || doc LIKE ? ESCAPE '\\'" * len(tokens)
+        prefix_params = params + [f"% {_like(token)}%" for token in tokens]
+        if self.sql.scalar(f"SELECT EXISTS (SELECT 1 FROM search WHERE {prefix})", prefix_params):
+            return prefix, prefix_params
+        return where + " AND doc LIKE ? ESCAPE '\\'", params + [f"%{_like(' '.join(tokens))}%"]
+
+    def count(self, found):
+        where, params = found
+        return self.sql.scalar(f"SELECT COUNT(*) FROM search WHERE {where}", params)
+
+    def page(self, found, page=0, page_size=20):
+        """Илэрцийн нэг хуудасны түлхүүрүүд (бүртгэлийн дарааллаар)"""
+        where, params = found
+        with closing(self.sql.connect()) as conn:
+            return [key for (key,) in conn.execute(
+                f"SELECT key FROM search WHERE {where} ORDER BY rowid LIMIT ? OFFSET ?",
+                params + [page_size, page * page_size])]
+
+    def search(self, query, page=0, page_size=20):
+        found = self.match(query)
+        return self.page(found, page, page_size), self.count(found)
+
+
+class SqlLiveQuery:
+    """Нэг уралдааны телеметрийн асуулга: LiveIndex-ийн газарзүйн самбар болон бичлэгийн
+    тоглуулалтад (FrameCache) хэрэгтэй хэсэг. Мөр бүрийг цаг, морины шүүлттэй индекстэй
+    асуулгаар авах тул уралдааны телеметрийг бүтнээр нь санах ойд ачаалахгүй.
+
+    LiveIndex-ийн "stops" (морь бүрийн түүхийн төгсгөл) энд цагийн хил: history_stops(t) = [t].
+    """
+
+    COLUMNS = ['timestamp_seconds', 'horse_id', 'distance_covered_km', 'current_speed_kmh',
+               'heart_rate', 'position', 'latitude', 'longitude', 'elevation_m', 'energy_level']
+
+    def __init__(self, sql, race):
+        self.sql = sql
+        self.race = race
+        self._horse_ids = None
+        self._max_time = None
+
+    def __len__(self):
+        return self.sql.scalar("SELECT COUNT(*) FROM live WHERE race_id = ?", [self.race])
+
+    @property
+    def horse_ids(self):
+        if self._horse_ids is None:
+            self._horse_ids = [value for (value,) in self.sql.query(
+                "SELECT DISTINCT horse_id FROM live WHERE race_id = ? ORDER BY horse_id", [self.race]
+            ).itertuples(index=False)]
+        return self._horse_ids
+
+    @property
+    def max_time(self):
+        if self._max_time is None:
+            value = self.sql.scalar("SELECT MAX(timestamp_seconds) FROM live WHERE race_id = ?", [self.race])
+            self._max_time = int(value or 0)
+        return self._max_time
+
+    def mean(self, column):
+        return self.sql.scalar(f"SELECT AVG({column}) FROM live WHERE race_id = ?", [self.race])
+
+    def _select(self, where, params):
+        return self.sql.query(
+            f"SELECT {', '.join(self.COLUMNS)} FROM live WHERE race_id = ? AND {where} "
+            f"ORDER BY horse_id, timestamp_seconds", [self.race] + list(params), 'live')
+
+    def horses_frame(self, horses):
+        """Сонгосон морьдын бүх мөр (морь бүрээр цагийн дарааллаар)"""
+        horses = list(horses)
+        return self._select(f"horse_id IN ({', '.join('?' * len(horses))})", horses)
+
+    def latest_at(self, t, horses=None):
+        """t хүртэлх морь бүрийн хамгийн сүүлийн мөр - морь тус бүрд нэг индексийн хайлт"""
+        known = set(self.horse_ids)
+        horses = [h for h in (self.horse_ids if horses is None else horses) if h in known]
+        return self._select(
+            "rowid IN (SELECT (SELECT rowid FROM live AS latest WHERE latest.race_id = ? "
+            "AND latest.horse_id = horses.value AND latest.timestamp_seconds <= ? "
+            "ORDER BY latest.timestamp_seconds DESC LIMIT 1) FROM json_each(?) AS horses)",
+            [self.race, int(t), json.dumps(horses)])
+
+    def history_until(self, t, horses=None):
+        """t хүртэлх бүх мөр, морь бүрээр цагийн дарааллаар"""
+        if horses is None:
+            return self._select("timestamp_seconds <= ?", [int(t)])
+        horses = list(horses)
+        return self._select(f"horse_id IN ({', '.join('?' * len(horses))}) AND timestamp_seconds <= ?",
+                            horses + [int(t)])
+
+    @property
+    def starts(self):
+        return np.array([-1], dtype=np.int64)
+
+    def history_stops(self, t):
+        return np.array([int(t)], dtype=np.int64)
+
+    def history_from(self, stops):
+        return self.history_until(stops[0])
+
+    def rows_between(self, start_stops, stop_stops):
+        """Хоёр цагийн хилийн хоорондох мөрүүд (гүйлгэх статистикийг урагш шинэчлэхэд)"""
+        return self._select("timestamp_seconds > ? AND timestamp_seconds <= ?",
+                            [int(start_stops[0]), int(stop_stops[0])])
+
+    def horse_path(self, horse_id, t=None):
+        """Нэг морины t хүртэлх замын мөрүүд"""
+        if t is None:
+            return self._select("horse_id = ?", [horse_id])
+        return self._select("horse_id = ? AND timestamp_seconds <= ?", [horse_id, int(t)])
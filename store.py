@@ -0,0 +1,855 @@
+"""Наадмын өгөгдлийн баганан сан (Parquet) - схем болон залхуу уншигч"""
+
+import abc
+import glob
+import hashlib
+import os
+import threading
+import time
+from urllib.parse import quote, unquote
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from positions import along_track_km, ground_speed_kmh, tick_gaps, tick_positions
+
+DATA_DIR = "data"
+STORE_DIR = os.path.join(DATA_DIR, "store")
+
+# Насны ангилал (морины нас -> уралдааны ангилал)
+AGE_GROUPS = {2: 'Даага', 3: 'Шүдлэн', 4: 'Хязаалан', 5: 'Соёолон', 6: 'Их нас', 7: 'Азарга'}
+
+# Хүснэгтийн нэр -> эх CSV файл
+SOURCES = {
+    'horses': 'horse.csv',
+    'trainers': 'trainer.csv',
+    'records': 'record.csv',
+    'live': 'live.csv',
+}
+
+# Уралдаан бүрээр (он/уралдаан/насны ангилал) хуваагдан хадгалагдах хүснэгтүүд
+PARTITIONED = ('records', 'live')
+RACE_KEYS = ('year', 'race_name', 'racing_group')
+# Телеметр өөрийн уралдааныг заах баганууд (сонголтот); хуваалтад хадгалагдахгүй
+LIVE_RACE_COLUMNS = ('race_id',) + RACE_KEYS
+# Хуваалт бүрийн хураангуй болон хувилбарыг агуулах каталог
+CATALOG = 'races'
+
+# Хүснэгт бүрийн тодорхой схем (багана -> pandas dtype). Бүхэл тоон төрлийн өргөн нь
+# validate.RANGES-ийн мужид багтах хамгийн нарийн нь; давтагдах текст нь ангилал (код).
+SCHEMAS = {
+    'horses': {
+        'horse_id': 'category',
+        'color': 'category',
+        'age': 'int8',
+        'trainer': 'category',
+        'trainer_id': 'category',
+        'aimag': 'category',
+        'sum': 'category',
+        'rider_name': 'category',
+        'rider_age': 'int8',
+        'aimgiin_airag': 'int16',
+        'ulsiin_airag': 'int16',
+        'aimgiin_turuu': 'int16',
+        'ulsiin_turuu': 'int16',
+        'racing_group': 'category',
+        'total_achievement': 'int16',
+    },
+    'trainers': {
+        'trainer_id': 'category',
+        'trainer_name': 'category',
+        'aimag': 'category',
+        'sum': 'category',
+        'national_achievement': 'int16',
+        'provincial__achievement': 'int16',
+        'total_trained_horses': 'int32',
+        'phone_number': 'string',
+    },
+    'records': {
+        'race_id': 'string',
+        'horse_id': 'category',
+        'racing_group': 'category',
+        'final_position': 'int16',
+        'finish_time_minutes': 'int16',
+        'finish_time_seconds': 'int16',
+        'average_speed_kmh': 'float64',
+        'max_speed_kmh': 'float64',
+        'stride_length_m': 'float64',
+        'heart_rate_start': 'int16',
+        'heart_rate_end': 'int16',
+        'weight_kg': 'float64',
+        'rider_weight_kg': 'float64',
+        'race_name': 'category',
+        'date': 'string',
+        'distance_km': 'float64',
+        'weather': 'category',
+        'temperature_celsius': 'float64',
+        'wind_speed_kmh': 'float64',
+        'humidity_percent': 'float64',
+        'track_condition': 'category',
+        'prize_money_tugrik': 'int64',
+        'injury': 'category',
+        'fatigue_level': 'category',
+        'rider_experience_years': 'int8',
+    },
+    'live': {
+        'id': 'int32',
+        'timestamp_seconds': 'int32',
+        'horse_id': 'category',
+        'distance_covered_km': 'float64',
+        'current_speed_kmh': 'float64',
+        'heart_rate': 'int16',
+        'position': 'int32',
+        'gap_to_leader_seconds': 'int32',
+        'cumulative_time_seconds': 'int32',
+        'latitude': 'float64',
+        'longitude': 'float64',
+        'elevation_m': 'int16',
+        'stride_frequency': 'float64',
+        'energy_level': 'int8',
+        'rider_commands': 'category',
+    },
+    'races': {
+        'race_id': 'string',
+        'year': 'int64',
+        'date': 'string',
+        'race_name': 'string',
+        'racing_group': 'string',
+        'distance_km': 'float64',
+        'racers': 'int64',
+        'winner_id': 'string',
+        'average_speed_kmh': 'float64',
+        'max_speed_kmh': 'float64',
+        'prize_total': 'int64',
+        'tracked_horses': 'int64',
+        'live_rows': 'int64',
+        'duration_seconds': 'int64',
+        'records_version': 'string',
+        'live_version': 'string',
+    },
+}
+
+# Кодын хүснэгтүүдийн файл (домэйн, код, утга)
+CODES = 'codes'
+# Ангиллын багана -> кодын домэйн. Нэг домэйны баганууд бүх хүснэгт, хуваалтад
+# ижил кодтой тул concat, merge, groupby текст харьцуулахгүй кодоороо хийгдэнэ.
+DOMAINS = {
+    'horse_id': 'horse_id',
+    'trainer_id': 'trainer_id',
+    'trainer': 'trainer_name',
+    'trainer_name': 'trainer_name',
+    'rider_name': 'rider_name',
+    'color': 'color',
+    'aimag': 'aimag',
+    'sum': 'sum',
+    'racing_group': 'racing_group',
+    'race_name': 'race_name',
+    'weather': 'weather',
+    'track_condition': 'track_condition',
+    'injury': 'injury',
+    'fatigue_level': 'fatigue_level',
+    'rider_commands': 'rider_commands',
+}
+# Нарийн бүхэл тоон төрлүүд (багтахгүй утгатай бол int64 хэвээр)
+NARROW = ('int8', 'int16', 'int32')
+
+# Зарим трекер өгдөггүй баганууд (зөвхөн GPS-тэй телеметр). Хадгалагдаагүй бол уншихад
+# хоосон (NaN) утгаар дүүргэж, бүхэл тоон баганыг хоосон утгатай үед float64 хэвээр үлдээнэ.
+OPTIONAL = {
+    'live': ('id', 'heart_rate', 'elevation_m', 'energy_level', 'stride_frequency',
+             'rider_commands', 'cumulative_time_seconds'),
+}
+
+
+# Ачаалах үед нэг удаа тооцоологдох уламжилсан баганууд: багана -> (эх баганууд, функц).
+# Хадгалагдсан багана байвал түүнийг уншина; эх нь өөрөө уламжилсан байж болно.
+DERIVED = {
+    'records': {
+        'total_time': (('finish_time_minutes', 'finish_time_seconds'),
+                       lambda df: df['finish_time_minutes'] + df['finish_time_seconds'] / 60),
+    },
+    # Зөвхөн GPS (цаг, өргөрөг, уртраг) өгдөг трекерүүдэд
+    'live': {
+        'distance_covered_km': (('horse_id', 'timestamp_seconds', 'latitude', 'longitude'), along_track_km),
+        'current_speed_kmh': (('horse_id', 'timestamp_seconds', 'distance_covered_km'), ground_speed_kmh),
+        'position': (('timestamp_seconds', 'distance_covered_km'), tick_positions),
+        'gap_to_leader_seconds': (('timestamp_seconds', 'distance_covered_km'), tick_gaps),
+    },
+}
+
+
+def _fits(values, dtype):
+    """Бүхэл тоон утгууд нарийн төрөлд багтах эсэх (текст, хоосон баганыг шалгахгүй)"""
+    if values.empty or not pd.api.types.is_numeric_dtype(values):
+        return True
+    info = np.iinfo(dtype)
+    return info.min <= values.min() and values.max() <= info.max
+
+
+def apply_schema(df, name, codes=None):
+    """DataFrame-ийг хүснэгтийн схемд нийцүүлэх.
+
+    codes (CodeBook) өгвөл ангиллын баганууд домэйныхоо хуваалцсан кодыг авна.
+    """
+    dtypes = {}
+    for col, dtype in SCHEMAS[name].items():
+        if col not in df.columns:
+            continue
+        if dtype == 'category' and codes is not None and col in DOMAINS:
+            dtype = codes.dtype(col, df[col])
+        elif dtype.startswith('int') and col in OPTIONAL.get(name, ()) and df[col].hasnans:
+            dtype = 'float64'
+        elif dtype in NARROW and not _fits(df[col], dtype):
+            dtype = 'int64'
+        dtypes[col] = dtype
+    return df.astype(dtypes)
+
+
+def empty_column(name, col, n):
+    """Хадгалагдаагүй сонголтот баганын оронд n ширхэг хоосон утга"""
+    if SCHEMAS[name][col] == 'category':
+        return pd.Series(pd.Categorical([None] * n))
+    return pd.Series(np.full(n, np.nan))
+
+
+def has_values(df, col):
+    """Багана байгаа бөгөөд ядаж нэг утгатай эсэх (зөвхөн GPS-тэй телеметрт үгүй)"""
+    return col in df.columns and bool(df[col].notna().any())
+
+
+class CodeBook:
+    """Домэйн бүрийн кодын хүснэгт: утга <-> бүхэл код (ангиллын байрлал).
+
+    М001, Т001 зэрэг түлхүүр болон давтагдах текст санах ойд 1-2 байтын код болж,
+    утга нь энэ хүснэгтээс харагдана. Шинэ утга төгсгөлд нэмэгдэх тул аль хэдийн
+    кодлогдсон баганын код хүчинтэй хэвээр; ingest бүрэн ажиллахад эрэмбэлэгдэнэ.
+    """
+
+    def __init__(self, values=None):
+        self._dtypes = {domain: pd.CategoricalDtype(list(items))
+                        for domain, items in (values or {}).items()}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return sum(len(dtype.categories) for dtype in self._dtypes.values())
+
+    @classmethod
+    def build(cls, frames):
+        """Хүснэгтүүдийн утгуудаас эрэмбэлсэн кодын хүснэгт бүтээх"""
+        values = {}
+        for df in frames:
+            for col in df.columns:
+                if col in DOMAINS:
+                    values.setdefault(DOMAINS[col], set()).update(df[col].dropna().astype(str).unique())
+        return cls({domain: sorted(items) for domain, items in values.items()})
+
+    @classmethod
+    def read(cls, store_dir=STORE_DIR):
+        """codes.parquet-ийг унших (байхгүй бол хоосон - утгууд уншигдах явцад нэмэгдэнэ)"""
+        path = store_path(CODES, store_dir)
+        if not os.path.exists(path):
+            return cls()
+        df = pd.read_parquet(path).sort_values(['domain', 'code'], kind='stable')
+        return cls({domain: group['value'].tolist() for domain, group in df.groupby('domain', sort=False)})
+
+    def to_frame(self):
+        rows = [(domain, code, value) for domain, dtype in self._dtypes.items()
+                for code, value in enumerate(dtype.categories)]
+        return pd.DataFrame(rows, columns=['domain', 'code', 'value']).astype(
+            {'domain': 'category', 'code': 'int32', 'value': 'string'})
+
+    def update(self, df):
+        """DataFrame-ийн шинэ утгуудыг нэмэх; нэмэгдсэн эсэхийг буцаана"""
+        changed = False
+        for col in df.columns:
+            if col in DOMAINS:
+                dtype = self._dtypes.get(DOMAINS[col])
+                changed |= self.dtype(col, df[col]) is not dtype
+        return changed
+
+    def dtype(self, col, values=None):
+        """Баганын домэйны CategoricalDtype (values-ийн шинэ утгуудыг төгсгөлд нэмнэ)"""
+        domain = DOMAINS[col]
+        with self._lock:
+            dtype = self._dtypes.get(domain)
+            if values is not None:
+                known = dtype.categories if dtype is not None else pd.Index([], dtype=object)
+                # Ангиллын багана бол зөвхөн ангиллуудыг нь (цөөн) шалгана
+                seen = values.cat.categories if isinstance(values.dtype, pd.CategoricalDtype) \
+                    else pd.Index(values.dropna().unique())
+                new = seen.astype(str).difference(known, sort=False) if len(seen) else seen
+                if len(new):
+                    dtype = pd.CategoricalDtype(known.append(pd.Index(sorted(new))))
+                    self._dtypes[domain] = dtype
+            if dtype is None:
+                dtype = self._dtypes[domain] = pd.CategoricalDtype([])
+            return dtype
+
+
+def store_path(name, store_dir=STORE_DIR):
+    return os.path.join(store_dir, f"{name}.parquet")
+
+
+def race_id(year, race_name, racing_group):
+    """Хуваалтын түлхүүр: year=2025/race=.../racing_group=... (hive хэлбэр)"""
+    values = (year, race_name, racing_group)
+    return "/".join(f"{key}={quote(str(value), safe='')}" for key, value in zip(RACE_KEYS, values))
+
+
+def parse_race_id(value):
+    """race_id -> {'year': 2025, 'race_name': ..., 'racing_group': ...}"""
+    parts = dict(part.split('=', 1) for part in value.split('/'))
+    keys = {key: unquote(parts[key]) for key in RACE_KEYS}
+    keys['year'] = int(keys['year'])
+    return keys
+
+
+def partition_dir(name, race, store_dir=STORE_DIR):
+    return os.path.join(store_dir, name, *race.split('/'))
+
+
+def partition_path(name, race, store_dir=STORE_DIR, part=0):
+    return os.path.join(partition_dir(name, race, store_dir), f"part-{part}.parquet")
+
+
+def partition_parts(name, race, store_dir=STORE_DIR):
+    """Хуваалтын хэсгүүд бичигдсэн дарааллаар (part-0, part-1, ...)"""
+    parts = glob.glob(os.path.join(partition_dir(name, race, store_dir), "part-*.parquet"))
+    return sorted(parts, key=lambda path: int(os.path.basename(path)[5:-8]))
+
+
+def _race_ids(keys):
+    """Он/уралдаан/насны ангиллын DataFrame -> мөр бүрийн race_id (давтагдахгүй түлхүүрээр)"""
+    keys = keys[list(RACE_KEYS)].astype(str).reset_index(drop=True)
+    unique = keys.drop_duplicates()
+    ids = pd.Series([race_id(*row) for row in unique.itertuples(index=False)], index=unique.index)
+    return keys.merge(unique.assign(race_id=ids), how='left', on=list(RACE_KEYS))['race_id'].to_numpy()
+
+
+def assign_race_ids(record_df):
+    """Бичлэг бүрт он, уралдааны нэр, насны ангиллаас race_id оноох"""
+    keys = pd.DataFrame({'year': record_df['date'].astype(str).str[:4], 'race_name': record_df['race_name'],
+                         'racing_group': record_df['racing_group']})
+    return record_df.assign(race_id=_race_ids(keys))
+
+
+def latest_races(record_df):
+    """horse_id -> морины хамгийн сүүлийн уралдааны race_id"""
+    latest = record_df.sort_values('date', kind='stable').drop_duplicates('horse_id', keep='last')
+    return dict(zip(latest['horse_id'], latest['race_id']))
+
+
+def live_race_ids(record_df, live_df):
+    """Телеметрийн мөр бүрийн race_id (онох боломжгүй бол NA).
+
+    Телеметр уралдааны түлхүүртэй (race_id эсвэл он/уралдаан/насны ангилал) бол түүгээр,
+    түлхүүргүй мөрийг морины хамгийн сүүлийн уралдаанаар ононо. Бичлэггүй уралдаан NA.
+    """
+    if 'race_id' not in record_df.columns:
+        record_df = assign_race_ids(record_df)
+    ids = pd.Series(pd.NA, index=live_df.index, dtype='string')
+    if 'race_id' in live_df.columns:
+        ids = live_df['race_id'].astype('string')
+    if set(RACE_KEYS) <= set(live_df.columns):
+        complete = live_df[list(RACE_KEYS)].notna().all(axis=1).to_numpy()
+        keyed = pd.Series(pd.NA, index=live_df.index, dtype='string')
+        keyed[complete] = _race_ids(live_df.loc[complete, list(RACE_KEYS)])
+        ids = ids.fillna(keyed)
+    latest = live_df['horse_id'].astype(object).map(latest_races(record_df)).astype('string')
+    ids = ids.fillna(latest)
+    return ids.where(ids.isin(record_df['race_id'].unique()))
+
+
+def split_races(record_df, live_df):
+    """Бичлэг болон телеметрийг уралдаан бүрээр хуваах: (race_id, records, live) дараалал.
+
+    race_id баганагүй телеметрийг live_race_ids-ээр ононо; онох боломжгүй мөр орхигдох
+    тул ingest.place_live-аар урьдчилан оноож, үлдсэнийг нь хорионд бичнэ.
+    """
+    if 'race_id' not in record_df.columns:
+        record_df = assign_race_ids(record_df)
+    if 'race_id' not in live_df.columns:
+        live_df = live_df.assign(race_id=live_race_ids(record_df, live_df))
+    keys = [col for col in LIVE_RACE_COLUMNS if col in live_df.columns]
+
+    live_groups = {key: pos for key, pos in live_df.groupby('race_id', sort=False).indices.items()}
+    for race, pos in record_df.groupby('race_id', sort=False).indices.items():
+        records = record_df.take(pos).reset_index(drop=True)
+        live = live_df.take(live_groups.get(race, [])).drop(columns=keys).reset_index(drop=True)
+        yield race, records, live
+
+
+def summarize_race(race, record_df, live_rows=0, tracked_horses=0, duration_seconds=0):
+    """Нэг хуваалтын хураангуй мөр - уралдаан хоорондын харьцуулалт телеметр уншихгүй"""
+    keys = parse_race_id(race)
+    winner = record_df.loc[record_df['final_position'].idxmin()] if len(record_df) else None
+    return {
+        'race_id': race,
+        'year': keys['year'],
+        'date': str(record_df['date'].iloc[0]) if len(record_df) else '',
+        'race_name': keys['race_name'],
+        'racing_group': keys['racing_group'],
+        'distance_km': float(record_df['distance_km'].iloc[0]) if len(record_df) else 0.0,
+        'racers': len(record_df),
+        'winner_id': winner['horse_id'] if winner is not None else '',
+        'average_speed_kmh': float(record_df['average_speed_kmh'].mean()) if len(record_df) else 0.0,
+        'max_speed_kmh': float(record_df['max_speed_kmh'].max()) if len(record_df) else 0.0,
+        'prize_total': int(record_df['prize_money_tugrik'].sum()),
+        'tracked_horses': int(tracked_horses),
+        'live_rows': int(live_rows),
+        'duration_seconds': int(duration_seconds),
+    }
+
+
+def summarize_live(live_df):
+    """summarize_race-д өгөх телеметрийн тоон үзүүлэлтүүд"""
+    return {
+        'live_rows': len(live_df),
+        'tracked_horses': live_df['horse_id'].nunique(),
+        'duration_seconds': int(live_df['timestamp_seconds'].max()) if len(live_df) else 0,
+    }
+
+
+def content_hash(path, chunk_size=1 << 20):
+    """Файлын агуулгын SHA-256 хэш (өгөгдлийн хувилбарын түлхүүр)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def data_version(*tables):
+    """Хүснэгтүүдийн хувилбаруудыг нэгтгэсэн кэшийн түлхүүр"""
+    return "-".join(table.version[:16] for table in tables)
+
+
+class Table(abc.ABC):
+    """Хүснэгтийг багана баганаар нь ачаалж, уншсан баганаа санах суурь анги"""
+
+    def __init__(self, name, version, codes=None):
+        self.name = name
+        self.version = version
+        self.codes = codes
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    @abc.abstractmethod
+    def __len__(self):
+        """Мөрийн тоо (баганыг уншихгүйгээр)"""
+
+    @abc.abstractmethod
+    def _read(self, columns):
+        """Багануудыг схемийн dtype-тай DataFrame болгон унших"""
+
+    def column(self, name):
+        return self.select([name])[name]
+
+    def _load(self, columns):
+        missing = [col for col in dict.fromkeys(columns) if col not in self._cache]
+        if missing:
+            loaded = self._read(missing)
+            for col in missing:
+                self._cache[col] = loaded[col]
+
+    def select(self, columns=None):
+        """Зөвхөн хэрэгтэй багануудыг DataFrame болгон буцаах.
+
+        Баганууд бүх сесст хуваалцагдах тул хуулбар биш кэштэй санах ойгоо хуваалцсан
+        харагдац буцаана. Дуудагч өөрчлөх бол эхлээд .copy() хийнэ (pandas 3-ын
+        copy-on-write горимд өөрчлөлт кэшийг хэзээ ч хөндөхгүй).
+        """
+        if columns is None:
+            columns = self.columns
+        derived = {col: spec for col, spec in DERIVED.get(self.name, {}).items() if col not in self.columns}
+        absent = {col for col in OPTIONAL.get(self.name, ()) if col not in self.columns}
+        with self._lock:
+            self._load([col for col in columns if col not in derived and col not in absent])
+            for col in columns:
+                if col in derived:
+                    self._derive(col, derived)
+                elif col in absent and col not in self._cache:
+                    self._cache[col] = empty_column(self.name, col, len(self))
+            return pd.DataFrame({col: self._cache[col] for col in columns}, copy=False)
+
+    def _derive(self, col, derived):
+        """Уламжилсан баганыг эхүүдийнх нь хамт (шаардлагатай бол рекурсээр) тооцоолох"""
+        if col in self._cache:
+            return
+        sources, compute = derived[col]
+        for src in sources:
+            if src in derived:
+                self._derive(src, derived)
+        self._load([src for src in sources if src not in derived])
+        self._cache[col] = compute(pd.DataFrame({src: self._cache[src] for src in sources}))
+
+
+class ParquetTable(Table):
+    """Parquet файл (эсвэл хуваалтын хэсгүүд)-аас багана тус бүрийг хэрэгтэй үед нь уншина"""
+
+    def __init__(self, name, paths, version, codes=None):
+        super().__init__(name, version, codes)
+        self.paths = [paths] if isinstance(paths, str) else list(paths)
+        metadata = [pq.read_metadata(path) for path in self.paths]
+        self.columns = list(metadata[0].schema.to_arrow_schema().names)
+        self._num_rows = sum(meta.num_rows for meta in metadata)
+
+    def __len__(self):
+        return self._num_rows
+
+    def _read(self, columns, paths=None):
+        tables = [pq.read_table(path, columns=columns) for path in paths or self.paths]
+        return apply_schema(pa.concat_tables(tables).to_pandas(), self.name, self.codes)
+
+    def extend(self, path, version):
+        """Нэмэлт хэсэгтэй шинэ хүснэгт: аль хэдийн уншсан баганыг дахин уншихгүй,
+        зөвхөн шинэ хэсгийг уншиж залгана"""
+        table = ParquetTable(self.name, self.paths + [path], version, self.codes)
+        with self._lock:
+            cached = {col: values for col, values in self._cache.items() if col in self.columns}
+        if cached:
+            appended = self._read(list(cached), [path])
+            merged = pd.concat([pd.DataFrame(cached, copy=False), appended], ignore_index=True)
+            table._cache = dict(apply_schema(merged, self.name, self.codes).items())
+        return table
+
+
+class FrameTable(Table):
+    """Санах ой дахь DataFrame-ийг ижил интерфэйсээр ороох (үзүүлэлтийн өгөгдөлд)"""
+
+    def __init__(self, name, df, version=None, codes=None):
+        super().__init__(name, version or f"demo-{name}", codes)
+        self._df = apply_schema(df, name, codes)
+        self.columns = list(self._df.columns)
+
+    def __len__(self):
+        return len(self._df)
+
+    def _read(self, columns):
+        return self._df[columns]
+
+
+class ConcatTable(Table):
+    """Хэд хэдэн хуваалтыг нэг хүснэгт мэт уншина (уралдаан хоорондын харагдацад)"""
+
+    def __init__(self, name, tables, version, codes=None):
+        super().__init__(name, version, codes)
+        self.tables = list(tables)
+        # Хуваалт бүр өөр багануудтай байж болно (зөвхөн GPS-тэй уралдаан)
+        self.columns = (list(dict.fromkeys(col for table in self.tables for col in table.columns))
+                        if self.tables else list(SCHEMAS[name]))
+
+    def __len__(self):
+        return sum(len(table) for table in self.tables)
+
+    def _read(self, columns):
+        if not self.tables:
+            return apply_schema(pd.DataFrame(columns=columns), self.name, self.codes)
+        df = pd.concat([table.select(columns) for table in self.tables], ignore_index=True)
+        # Хуваалтууд нэг кодын хүснэгттэй бол concat ангиллыг хадгална; үгүй бол энд кодлоно
+        return apply_schema(df, self.name, self.codes)
+
+
+class RaceCatalog(abc.ABC):
+    """Уралдааны хуваалтуудын каталог: хураангуйг шууд өгч, хуваалтыг сонгосон үед нь нээнэ"""
+
+    def __init__(self, summaries, version, previous=None, codes=None):
+        self.codes = codes
+        # Шинэ уралдаан эхэнд, нэг өдрийнх дотроо оролцогч олонтой нь эхэнд
+        self.summaries = apply_schema(summaries, CATALOG).sort_values(
+            ['date', 'racers', 'racing_group'], ascending=[False, False, True],
+            kind='stable').reset_index(drop=True)
+        self.version = version
+        self._tables = {}
+        self._records = None
+        self._lock = threading.Lock()
+        if previous is not None:
+            self._adopt(previous)
+
+    def _adopt(self, previous):
+        """Хувилбар нь өөрчлөгдөөгүй хуваалтын хүснэгтийг (уншсан баганатай нь) өмнөх каталогоос авах"""
+        versions = {(row.race_id, name): getattr(row, f"{name}_version")
+                    for row in self.summaries.itertuples() for name in PARTITIONED}
+        for key, table in previous._tables.items():
+            if versions.get(key) == table.version:
+                self._tables[key] = table
+        if previous._records is not None and previous._records.version == self.records_version:
+            self._records = previous._records
+
+    def put(self, race, name, table):
+        with self._lock:
+            self._tables[(race, name)] = table
+
+    def __len__(self):
+        return len(self.summaries)
+
+    @property
+    def race_ids(self):
+        return self.summaries['race_id'].tolist()
+
+    def summary(self, race):
+        return self.summaries.loc[self.summaries['race_id'] == race].iloc[0]
+
+    def label(self, race):
+        row = self.summary(race)
+        return f"{row['race_name']} · {row['racing_group']} ({row['date']})"
+
+    @abc.abstractmethod
+    def _open(self, race, name):
+        """Уралдааны хуваалтын хүснэгтийг (records эсвэл live) нээх"""
+
+    def table(self, race, name):
+        with self._lock:
+            key = (race, name)
+            if key not in self._tables:
+                self._tables[key] = self._open(race, name)
+            return self._tables[key]
+
+    def race(self, race):
+        """Сонгосон уралдааны (records, live) хүснэгтүүд - зөвхөн тэр хуваалтыг уншина"""
+        return self.table(race, 'records'), self.table(race, 'live')
+
+    @property
+    def records_version(self):
+        """Бүх бичлэгийн хуваалтын хувилбар - телеметр нэмэгдэхэд өөрчлөгдөхгүй"""
+        versions = "".join(sorted(self.summaries['records_version']))
+        return hashlib.sha256(versions.encode()).hexdigest()
+
+    @property
+    def records(self):
+        """Бүх уралдааны бичлэг (телеметргүй)"""
+        if self._records is None:
+            self._records = ConcatTable('records', [self.table(race, 'records') for race in self.race_ids],
+                                        self.records_version, self.codes)
+        return self._records
+
+
+class ParquetCatalog(RaceCatalog):
+    """races.parquet каталог болон хуваалтын Parquet файлууд"""
+
+    def __init__(self, store_dir, version, previous=None, codes=None):
+        self.store_dir = store_dir
+        super().__init__(pd.read_parquet(store_path(CATALOG, store_dir)), version, previous, codes)
+
+    def _open(self, race, name):
+        version = self.summary(race)[f"{name}_version"]
+        return ParquetTable(name, partition_parts(name, race, self.store_dir), version, self.codes)
+
+
+class FrameCatalog(RaceCatalog):
+    """Санах ой дахь бичлэг, телеметрийг уралдаанаар хуваасан каталог (үзүүлэлтийн өгөгдөлд)"""
+
+    def __init__(self, record_df, live_df, codes=None):
+        self._frames = {}
+        rows = []
+        for race, records, live in split_races(record_df, live_df):
+            self._frames[race] = {'records': records, 'live': live}
+            digest = hashlib.sha256(race.encode()).hexdigest()
+            rows.append(dict(summarize_race(race, records, **summarize_live(live)),
+                             records_version=f"demo-{digest}", live_version=f"demo-{digest}"))
+        super().__init__(pd.DataFrame(rows), "demo-races",
+                         codes=codes if codes is not None else CodeBook.build([record_df, live_df]))
+
+    def _open(self, race, name):
+        return FrameTable(name, self._frames[race][name], self.summary(race)[f"{name}_version"], self.codes)
+
+
+def is_stale(name, data_dir=DATA_DIR, store_dir=STORE_DIR):
+    """Parquet файл байхгүй эсвэл эх CSV-ээс хуучин бол True"""
+    source = os.path.join(data_dir, SOURCES[name])
+    target = store_path(CATALOG if name in PARTITIONED else name, store_dir)
+    if not os.path.exists(target):
+        return True
+    return os.path.exists(source) and os.path.getmtime(source) > os.path.getmtime(target)
+
+
+def open_store(data_dir=DATA_DIR, store_dir=STORE_DIR):
+    """Хуучирсан хүснэгтийг дахин бүтээгээд бүртгэлүүд болон уралдааны каталогийг залхуу нээх"""
+    from ingest import ingest_races, ingest_table
+
+    for name in ('horses', 'trainers'):
+        if is_stale(name, data_dir, store_dir):
+            ingest_table(name, data_dir, store_dir)
+    if any(is_stale(name, data_dir, store_dir) for name in PARTITIONED):
+        ingest_races(data_dir, store_dir)
+
+    # Бүх хүснэгт нэг кодын хүснэгтийг хуваалцана
+    codes = CodeBook.read(store_dir)
+    tables = {}
+    for name in ('horses', 'trainers'):
+        # Хувилбарыг эх файлын агуулгаар тодорхойлно
+        source = os.path.join(data_dir, SOURCES[name])
+        path = store_path(name, store_dir)
+        version = content_hash(source if os.path.exists(source) else path)
+        tables[name] = ParquetTable(name, path, version, codes)
+    # Хуваалт бүрийн хувилбар каталогт хадгалагдсан тул зөвхөн каталогийг хэшлэнэ
+    races = ParquetCatalog(store_dir, content_hash(store_path(CATALOG, store_dir)), codes=codes)
+    return tables['horses'], tables['trainers'], races
+
+
+class DataStore:
+    """Эх CSV файлуудыг ажиглаж, өөрчлөгдсөн хүснэгтийг л дахин ачаалах өгөгдлийн менежер.
+
+    Файлын mtime/хэмжээг хямд шалгаад, өөрчлөгдсөн үед агуулгын хэшийг харьцуулна.
+    live.csv зөвхөн төгсгөлдөө нэмэгдсэн бол шинэ мөрүүдийг л уншиж, уралдаан бүрийн
+    хуваалтад нэмэлт хэсэг болгон бичнэ. Хувилбар нь өөрчлөгдөөгүй хүснэгтийн объект
+    (мөн түүнээс уламжилсан кэш, индекс) хэвээр үлдэнэ.
+
+    sql үнэн бол (анхдагчаар NAADAM_SQLITE) сонголтот SQLite хуулбарыг (sqlstore) мөн синк хийнэ.
+    """
+
+    # Нэмэлт гэж үзэхийн тулд өмнөх төгсгөлийн энэ хэмжээний байт өөрчлөгдөөгүй байх ёстой
+    FINGERPRINT_BYTES = 1 << 16
+
+    def __init__(self, data_dir=DATA_DIR, store_dir=STORE_DIR, interval=1.0, sql=None):
+        from sqlstore import SqlStore, enabled, sqlite_path
+
+        self.data_dir = data_dir
+        self.store_dir = store_dir
+        self.interval = interval
+        self.reloads = []
+        self._lock = threading.Lock()
+        self._checked = time.monotonic()
+        self.horses, self.trainers, self.races = open_store(data_dir, store_dir)
+        # Дахин ачаалсан хүснэгтүүд ч мөн адил кодыг авна (шинэ утга нь төгсгөлд нэмэгдэнэ)
+        self.codes = self.races.codes
+        self._stats = {name: self._stat(name) for name in SOURCES}
+        self._hashes = {name: self._hash(name) for name in ('horses', 'trainers', 'records')}
+        self._offset = self._stats['live'][1] if self._stats['live'] else 0
+        self._fingerprint = self._tail_hash(self._offset)
+        self.sql = None
+        if enabled() if sql is None else sql:
+            self.sql = SqlStore(sqlite_path(store_dir), self.codes)
+            self.sql.sync(*self.tables, store_dir=store_dir)
+
+    def _source(self, name):
+        return os.path.join(self.data_dir, SOURCES[name])
+
+    def _stat(self, name):
+        try:
+            stat = os.stat(self._source(name))
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _hash(self, name):
+        path = self._source(name)
+        return content_hash(path) if os.path.exists(path) else None
+
+    def _tail_hash(self, offset):
+        """live.csv-ийн offset хүртэлх сүүлийн хэсгийн хэш (өмнөх агуулга хадгалагдсаныг шалгах)"""
+        path = self._source('live')
+        if not os.path.exists(path):
+            return None
+        start = max(0, offset - self.FINGERPRINT_BYTES)
+        with open(path, 'rb') as f:
+            f.seek(start)
+            return hashlib.sha256(f.read(offset - start)).hexdigest()
+
+    @property
+    def tables(self):
+        return self.horses, self.trainers, self.races
+
+    def refresh(self, now=None):
+        """interval тутамд эх файлуудыг шалгаж, өөрчлөгдсөнийг нь л дахин ачаалах"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if now - self._checked < self.interval:
+                return self.tables
+            self._checked = now
+            for name in SOURCES:
+                stat = self._stat(name)
+                if stat is None or stat == self._stats[name]:
+                    continue
+                previous, self._stats[name] = self._stats[name], stat
+                try:
+                    if name == 'live':
+                        self._reload_live(previous, stat)
+                    else:
+                        self._reload(name)
+                except (OSError, ValueError) as error:
+                    # Хагас бичигдсэн файл: хуучин хүснэгтээр үргэлжлүүлж, дараагийн өөрчлөлтийг хүлээнэ
+                    self._log(name, f"алдаа: {error}")
+            return self.tables
+
+    def _log(self, name, detail):
+        self.reloads.append({'time': time.time(), 'table': name, 'detail': detail})
+        del self.reloads[:-20]
+
+    def _reload(self, name):
+        """Агуулга нь үнэхээр өөрчлөгдсөн бол тухайн хүснэгтийг л дахин бүтээх"""
+        from ingest import ingest_races, ingest_table
+
+        digest = self._hash(name) if name in self._hashes else None
+        if digest is not None and digest == self._hashes[name]:
+            return
+        if name in PARTITIONED:
+            ingest_races(self.data_dir, self.store_dir)
+            self._reopen_races()
+            self._offset = self._stats['live'][1] if self._stats['live'] else 0
+            self._fingerprint = self._tail_hash(self._offset)
+        else:
+            path = ingest_table(name, self.data_dir, self.store_dir)
+            setattr(self, name, ParquetTable(name, path, digest, self.codes))
+        if self.sql is not None:
+            self.sql.sync(*self.tables, store_dir=self.store_dir)
+        if name in self._hashes:
+            self._hashes[name] = digest
+        self._log(name, "дахин ачаалсан")
+
+    def _reopen_races(self):
+        path = store_path(CATALOG, self.store_dir)
+        self.races = ParquetCatalog(self.store_dir, content_hash(path), previous=self.races, codes=self.codes)
+
+    def _reload_live(self, previous, stat):
+        """Зөвхөн төгсгөлд нэмэгдсэн бол шинэ мөрүүдийг хуваалтад залгах, үгүй бол бүрэн дахин ачаалах"""
+        appended = (previous is not None and stat[1] >= self._offset
+                    and self._tail_hash(self._offset) == self._fingerprint)
+        if not appended:
+            self._reload('live')
+            return
+        self._append_live()
+
+    def _append_live(self):
+        from ingest import place_live, read_appended, update_codes, write_catalog, write_part, write_quarantine
+
+        live_df, offset = read_appended('live', self._offset, self.data_dir, self.store_dir)
+        self._offset = offset
+        self._fingerprint = self._tail_hash(offset)
+        if live_df.empty:
+            return
+        # Уралдаанд онох боломжгүй мөрүүд алгасагдсан offset-оос хойш хорионд үлдэнэ
+        live_df, unplaced = place_live(self.races.records.select(['horse_id', 'race_id', 'date']), live_df)
+        write_quarantine(unplaced, 'live', self.store_dir, append=True)
+        update_codes([live_df], self.store_dir)
+
+        # Каталогийн хураангуй бусад сесст хуваалцагдана - өөрчлөхийн өмнө хуулна
+        summaries = self.races.summaries.set_index('race_id').copy()
+        extended, appended = {}, {}
+        for race, pos in live_df.groupby('race_id', sort=False).indices.items():
+            rows = live_df.take(pos).drop(columns=list(LIVE_RACE_COLUMNS), errors='ignore').reset_index(drop=True)
+            # Хүснэгтийг шинэ хэсэг бичихээс өмнө нээнэ, эс тэгвээс хэсэг давхар уншигдана
+            base = self.races.table(race, 'live')
+            path = write_part(rows, 'live', race, self.store_dir)
+            version = hashlib.sha256(
+                (summaries.at[race, 'live_version'] + content_hash(path)).encode()).hexdigest()
+            table = base.extend(path, version)
+            extended[race] = table
+            appended[race] = rows
+            summaries.loc[race, ['live_rows', 'tracked_horses', 'duration_seconds', 'live_version']] = [
+                len(table), table.column('horse_id').nunique(),
+                max(int(summaries.at[race, 'duration_seconds']), int(rows['timestamp_seconds'].max())),
+                version,
+            ]
+
+        if extended:
+            write_catalog(summaries.reset_index().to_dict('records'), self.store_dir)
+            self._reopen_races()
+        for race, table in extended.items():
+            self.races.put(race, 'live', table)
+            if self.sql is not None:
+                self.sql.append_live(race, appended[race], table, table.version)
+        detail = f"{len(live_df)} мөр нэмэгдсэн"
+        self._log('live', detail + (f" · хорио {len(unplaced)}" if len(unplaced) else ""))
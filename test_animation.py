@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from animation import build_replay_figure, replay_times
+from live_index import LiveIndex
+
+
+def test_replay_times_always_end_at_finish():
+    assert replay_times(90, 30).tolist() == [0, 30, 60, 90]
+    assert replay_times(100, 30).tolist() == [0, 30, 60, 90, 100]
+    assert replay_times(0, 30).tolist() == [0]
+
+
+def test_frames_carry_latest_state_per_step():
+    index = LiveIndex(pd.DataFrame({
+        'horse_id': ['A', 'B', 'A', 'A', 'B'],
+        'timestamp_seconds': [0, 10, 20, 40, 40],
+        'distance_covered_km': [0.0, 0.1, 0.2, 0.4, 0.35],
+        'current_speed_kmh': [30.0, 31.0, 32.0, 33.0, 34.0],
+        'heart_rate': [100, 110, 120, 130, 140],
+        'position': [1, 1, 1, 1, 2],
+        'latitude': [47.90, 47.91, 47.92, 47.94, 47.93],
+        'longitude': [106.90, 106.91, 106.92, 106.94, 106.93],
+    }))
+    fig = build_replay_figure(index, go.Scattermapbox(lat=[], lon=[]), step=20)
+    assert [frame.name for frame in fig.frames] == ['0', '20', '40']
+    # Фрэйм бүр зөвхөн баганан диаграм, газрын зургийн тэмдэгтийг шинэчилнэ
+    assert all(list(frame.traces) == [0, 1] for frame in fig.frames)
+    distances = [list(frame.data[0].y) for frame in fig.frames]
+    # B 10-д эхэлсэн тул 0-д өгөгдөлгүй
+    assert distances[0][0] == 0.0 and np.isnan(distances[0][1])
+    assert distances[1:] == [[0.2, 0.1], [0.4, 0.35]]
+    assert [step['label'] for step in fig.layout.sliders[0].steps] == ['0', '20', '40']
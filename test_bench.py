@@ -0,0 +1,25 @@
+import pytest
+
+import bench
+
+
+@pytest.fixture(scope='module')
+def fixture_scale(tmp_path_factory):
+    """Бага хэмжээний 1x өгөгдөл (тусдаа процесст үүсгэнэ)"""
+    bench_dir = str(tmp_path_factory.mktemp('bench'))
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(bench, 'BENCH_DIR', bench_dir)
+        bench.ensure_fixture(1, 600, 1 / 60)
+        yield 1
+
+
+@pytest.mark.parametrize('name', list(bench.DASHBOARDS))
+def test_run_dashboard_records_each_render(fixture_scale, name):
+    results = []
+    bench.run_dashboard(name, fixture_scale, 2, results)
+    assert [row['cold'] for row in results] == [True, False]
+    assert results[0]['rows']['horses'] == bench.BASE_SIZE['n_horses']
+    for row in results:
+        assert row['wall_seconds'] > 0 and row['peak_rss_mb'] > 0
+        # Диаграм бүрийн JSON хэмжээг хэмжилтийн хугацаанаас хасаж тоолно
+        assert (row['figures'] > 0) == (row['figure_bytes'] > 0)
@@ -0,0 +1,62 @@
+import pandas as pd
+import pytest
+
+from store import FrameCatalog, RaceCatalog, Table, parse_race_id, race_id
+
+
+def test_race_id_round_trip_quotes_separators():
+    race = race_id(2025, 'Naadam / Төв', 'Даага')
+    assert race.count('/') == 2
+    assert parse_race_id(race) == {'year': 2025, 'race_name': 'Naadam / Төв', 'racing_group': 'Даага'}
+
+
+def test_bases_are_abstract():
+    with pytest.raises(TypeError):
+        Table('live', 'v1')
+    with pytest.raises(TypeError):
+        RaceCatalog(pd.DataFrame({'race_id': []}), 'v1')
+
+    class Partial(Table):
+        def __len__(self):
+            return 0
+
+    # _read-гүй дэд анги ч үүсэхгүй
+    with pytest.raises(TypeError):
+        Partial('live', 'v1')
+
+
+def race_records():
+    return pd.DataFrame({
+        'horse_id': ['М001', 'М002', 'М001'],
+        'racing_group': ['Даага', 'Даага', 'Шүдлэн'],
+        'race_name': ['Naadam'] * 3,
+        'date': ['2024-07-11', '2024-07-11', '2025-07-11'],
+        'final_position': [2, 1, 1],
+        'average_speed_kmh': [30.0, 31.0, 32.0],
+        'max_speed_kmh': [40.0, 41.0, 42.0],
+        'distance_km': [12.0, 12.0, 15.0],
+        'prize_money_tugrik': [50, 100, 200],
+    })
+
+
+def test_frame_catalog_places_unkeyed_live_in_latest_race():
+    live = pd.DataFrame({'horse_id': ['М001', 'М002', 'М001'], 'timestamp_seconds': [0, 0, 10]})
+    catalog = FrameCatalog(race_records(), live)
+    old, new = race_id(2024, 'Naadam', 'Даага'), race_id(2025, 'Naadam', 'Шүдлэн')
+    assert sorted(catalog.race_ids) == sorted([old, new])
+    assert catalog.summary(old)['winner_id'] == 'М002'
+    # М001-ийн түлхүүргүй мөр хамгийн сүүлийн (2025) уралдаанд
+    assert catalog.summary(old)['live_rows'] == 1 and catalog.summary(new)['live_rows'] == 2
+    assert catalog.table(new, 'live').select(['timestamp_seconds'])['timestamp_seconds'].tolist() == [0, 10]
+
+
+def test_frame_catalog_splits_records_and_live_by_race():
+    live = pd.DataFrame({'horse_id': ['М001', 'М002', 'М001'], 'timestamp_seconds': [0, 0, 10],
+                         'year': [2024, 2024, 2025], 'race_name': ['Naadam'] * 3,
+                         'racing_group': ['Даага', 'Даага', 'Шүдлэн']})
+    catalog = FrameCatalog(race_records(), live)
+    old, new = race_id(2024, 'Naadam', 'Даага'), race_id(2025, 'Naadam', 'Шүдлэн')
+    assert sorted(catalog.race_ids) == sorted([old, new])
+    assert catalog.summary(old)['winner_id'] == 'М002'
+    assert catalog.summary(old)['live_rows'] == 2 and catalog.summary(new)['live_rows'] == 1
+    assert catalog.table(new, 'live').columns == ['horse_id', 'timestamp_seconds']
@@ -0,0 +1,40 @@
+import pandas as pd
+import plotly.graph_objects as go
+import pytest
+
+from charts import LABELS, WEBGL_POINTS, chart, figure, trace
+
+
+def speeds(rows):
+    return pd.DataFrame({'timestamp_seconds': range(rows), 'current_speed_kmh': [30.0] * rows,
+                         'horse_id': ['М001'] * rows})
+
+
+@pytest.mark.parametrize('rows, gl', [(WEBGL_POINTS, False), (WEBGL_POINTS + 1, True)])
+def test_chart_switches_to_webgl_above_threshold(rows, gl):
+    fig = chart('live_speed', speeds(rows), x='timestamp_seconds', y='current_speed_kmh', color='horse_id')
+    assert isinstance(fig.data[0], go.Scattergl) == gl
+
+
+def test_chart_shares_labels_and_title():
+    fig = chart('live_speed', speeds(3), x='timestamp_seconds', y='current_speed_kmh',
+                labels={'current_speed_kmh': 'Хурд'})
+    assert fig.layout.title.text == "🚀 Цаг Хугацаагаар Хурд"
+    assert fig.layout.xaxis.title.text == LABELS['timestamp_seconds']
+    # Дуудагчийн labels нь нийтлэг шошгыг дарна
+    assert fig.layout.yaxis.title.text == 'Хурд'
+
+
+def test_chart_respects_explicit_render_mode():
+    fig = chart('live_speed', speeds(WEBGL_POINTS + 1), x='timestamp_seconds', y='current_speed_kmh',
+                render_mode='svg')
+    assert not isinstance(fig.data[0], go.Scattergl)
+
+
+def test_trace_uses_total_points():
+    assert isinstance(trace([0, 1], [0, 1]), go.Scatter)
+    # Бусад trace-тэй нийлээд босго давбал бүгд WebGL-ээр зурагдана
+    assert isinstance(trace([0, 1], [0, 1], points=WEBGL_POINTS + 1), go.Scattergl)
+    fig = figure('heart_rate', [trace([1, 2], [120, 130])])
+    assert fig.layout.xaxis.title.text == 'Эцсийн Байрлал'
+    assert fig.layout.yaxis.title.text == 'Зүрхний Цохилт (мин-д)'
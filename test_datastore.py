@@ -0,0 +1,84 @@
+import os
+import shutil
+
+import pandas as pd
+
+from ingest import ingest, quarantine_path
+from store import DataStore
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def open_data(tmp_path):
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    for name in ('horse.csv', 'trainer.csv', 'record.csv', 'live.csv'):
+        shutil.copy(os.path.join(HERE, 'data', name), data_dir / name)
+    store_dir = str(data_dir / 'store')
+    ingest(str(data_dir), store_dir)
+    return data_dir, DataStore(str(data_dir), store_dir, interval=0)
+
+
+def touch(path):
+    # mtime нь өөрчлөгдөөгүй мэт харагдахаас сэргийлнэ
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))
+
+
+def test_append_extends_race_without_reloading_other_tables(tmp_path):
+    data_dir, store = open_data(tmp_path)
+    horses, race = store.horses, store.races.race_ids[0]
+    before = store.races.table(race, 'live')
+    cached = before.select(['horse_id', 'timestamp_seconds'])
+
+    with open(data_dir / 'live.csv', 'a', encoding='utf-8') as f:
+        f.write("59,720,М021,25.0,38.0,160,1,0,720,47.97,106.97,1383,2.8,35,steady\n")
+    touch(data_dir / 'live.csv')
+    store.refresh()
+
+    live = store.races.table(race, 'live')
+    assert len(live) == len(before) + 1
+    assert store.races.summary(race)['live_rows'] == len(live)
+    # Өмнө уншсан баганууд шинэ хэсгээр л өргөтгөгдөнө
+    assert {'horse_id', 'timestamp_seconds'} <= set(live._cache)
+    assert live.select(['timestamp_seconds'])['timestamp_seconds'].tolist() == (
+        cached['timestamp_seconds'].tolist() + [720])
+    assert store.horses is horses
+    assert store.reloads[-1]['detail'] == "1 мөр нэмэгдсэн"
+
+
+def test_reload_only_when_content_changes(tmp_path):
+    data_dir, store = open_data(tmp_path)
+    trainers = store.trainers
+    touch(data_dir / 'trainer.csv')
+    store.refresh()
+    assert store.trainers is trainers and store.reloads == []
+
+    text = (data_dir / 'trainer.csv').read_text(encoding='utf-8')
+    (data_dir / 'trainer.csv').write_text(text.replace("Очир пүрэв", "Очир Пүрэв"), encoding='utf-8')
+    touch(data_dir / 'trainer.csv')
+    store.refresh()
+    assert store.trainers is not trainers
+    assert "Очир Пүрэв" in store.trainers.column('trainer_name').tolist()
+    assert [(row['table'], row['detail']) for row in store.reloads] == [('trainers', "дахин ачаалсан")]
+
+
+def test_append_quarantines_telemetry_without_race(tmp_path):
+    data_dir, store = open_data(tmp_path)
+    race = store.races.race_ids[0]
+    before = len(store.races.table(race, 'live'))
+
+    # М021 бичлэгтэй, М051 бүртгэлтэй ч бичлэггүй
+    with open(data_dir / 'live.csv', 'a', encoding='utf-8') as f:
+        f.write("59,720,М021,25.0,38.0,160,1,0,720,47.97,106.97,1383,2.8,35,steady\n"
+                "60,720,М051,24.0,37.0,170,2,20,740,47.96,106.96,1382,2.6,30,steady\n")
+    touch(data_dir / 'live.csv')
+    store.refresh()
+
+    live = store.races.table(race, 'live')
+    assert len(live) == before + 1
+    assert store.races.summary(race)['live_rows'] == before + 1
+    assert live.select(['horse_id'])['horse_id'].astype(str).tolist()[-1] == 'М021'
+    quarantine = pd.read_csv(quarantine_path('live', store.store_dir))
+    assert quarantine['horse_id'].tolist() == ['М051']
+    assert quarantine['_reason'].tolist() == ['race:unassigned']
+    assert store.reloads[-1]['detail'] == "1 мөр нэмэгдсэн · хорио 1"
@@ -0,0 +1,118 @@
+import io
+import json
+import os
+import shutil
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from export import export, export_frame, iter_batches, iter_race, paced
+from ingest import ingest
+from live_index import LiveIndex
+from store import DERIVED, open_store, partition_parts
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+GPS = ['timestamp_seconds', 'horse_id', 'latitude', 'longitude']
+
+
+@pytest.fixture(scope='module')
+def parts(tmp_path_factory):
+    """Жишээ өгөгдлийн эхний уралдааны live хуваалтын хэсгүүд"""
+    data_dir = tmp_path_factory.mktemp('parts') / 'data'
+    data_dir.mkdir()
+    for name in ('horse.csv', 'trainer.csv', 'record.csv', 'live.csv'):
+        shutil.copy(os.path.join(HERE, 'data', name), data_dir / name)
+    store_dir = str(data_dir / 'store')
+    ingest(str(data_dir), store_dir)
+    _, _, races = open_store(str(data_dir), store_dir)
+    return partition_parts('live', races.race_ids[0], store_dir)
+
+
+@pytest.fixture(scope='module', params=['full', 'gps'])
+def live(request, tmp_path_factory):
+    """Бүрэн телеметртэй болон зөвхөн GPS-тэй уралдааны live хүснэгт"""
+    data_dir = tmp_path_factory.mktemp(request.param) / 'data'
+    data_dir.mkdir()
+    for name in ('horse.csv', 'trainer.csv', 'record.csv'):
+        shutil.copy(os.path.join(HERE, 'data', name), data_dir / name)
+    df = pd.read_csv(os.path.join(HERE, 'data', 'live.csv'))
+    (df if request.param == 'full' else df[GPS]).to_csv(data_dir / 'live.csv', index=False)
+    ingest(str(data_dir), str(data_dir / 'store'), workers=1)
+    _, _, races = open_store(str(data_dir), str(data_dir / 'store'))
+    return races.table(races.race_ids[0], 'live')
+
+
+def view(table, columns, horses, start, end):
+    """Самбарын LiveIndex-ээр шүүсэн харагдац"""
+    index = LiveIndex(table.select(list(dict.fromkeys(['horse_id', 'timestamp_seconds'] + columns))))
+    df = index.history_until(end, horses)
+    return df[df['timestamp_seconds'] >= start][columns]
+
+
+def normalized(df):
+    df = df.astype({col: str for col in df.columns if not pd.api.types.is_numeric_dtype(df[col])})
+    return df.sort_values(['timestamp_seconds', 'horse_id']).reset_index(drop=True)
+
+
+@pytest.mark.parametrize('fmt', ['ndjson', 'arrow', 'csv'])
+def test_export_round_trip_matches_parquet_filter(parts, fmt):
+    columns = ['timestamp_seconds', 'horse_id', 'distance_covered_km']
+    sink = io.BytesIO()
+    rows = export(iter_batches(parts, columns, horses=['М021', 'М019'], start=120, end=600, batch_size=4),
+                  sink, fmt)
+    data = sink.getvalue()
+    if fmt == 'ndjson':
+        got = pd.DataFrame([json.loads(line) for line in data.decode('utf-8').splitlines()])
+    elif fmt == 'arrow':
+        got = pa.ipc.open_stream(data).read_all().to_pandas()
+    else:
+        got = pd.read_csv(io.BytesIO(data))
+    stored = pd.concat([pd.read_parquet(path, columns=columns) for path in parts], ignore_index=True)
+    stored = stored[stored['horse_id'].astype(str).isin(['М021', 'М019'])
+                    & stored['timestamp_seconds'].between(120, 600)]
+    assert rows == len(got) == len(stored) > 0
+    assert got['horse_id'].tolist() == stored['horse_id'].astype(str).tolist()
+    assert got['distance_covered_km'].tolist() == pytest.approx(stored['distance_covered_km'].tolist())
+
+
+@pytest.mark.parametrize('fmt', ['ndjson', 'arrow', 'csv'])
+def test_export_round_trip_matches_dashboard_view(live, fmt):
+    sink = io.BytesIO()
+    rows = export(iter_race(live, horses=['М021', 'М019'], start=120, end=600, batch_size=4), sink, fmt)
+    data = sink.getvalue()
+    if fmt == 'ndjson':
+        got = pd.DataFrame([json.loads(line) for line in data.decode('utf-8').splitlines()])
+    elif fmt == 'arrow':
+        got = pa.ipc.open_stream(data).read_all().to_pandas()
+    else:
+        got = pd.read_csv(io.BytesIO(data))
+    # Уламжилсан баганууд (зөвхөн GPS-тэй үед ч) экспортод орно
+    assert set(DERIVED['live']) <= set(got.columns)
+    expected = view(live, list(got.columns), ['М021', 'М019'], 120, 600)
+    assert rows == len(got) == len(expected) > 0
+    pd.testing.assert_frame_equal(normalized(got), normalized(expected), check_dtype=False)
+    assert got['timestamp_seconds'].is_monotonic_increasing
+
+
+def test_export_frame_round_trip():
+    df = pd.DataFrame({'timestamp_seconds': [10, 0, 10], 'horse_id': pd.Categorical(['A', 'B', 'B']),
+                       'position': [1, 1, 2], 'gap_to_leader_seconds': [0.0, 0.0, 3.5]})
+    got = pa.ipc.open_stream(export_frame(df, 'arrow')).read_all().to_pandas()
+    assert got['timestamp_seconds'].tolist() == [0, 10, 10]
+    assert got['horse_id'].tolist() == ['B', 'A', 'B']
+    assert got['gap_to_leader_seconds'].tolist() == [0.0, 0.0, 3.5]
+    assert export_frame(df.iloc[0:0], 'csv') == b''
+
+
+def test_paced_waits_by_race_time():
+    batches = [pa.RecordBatch.from_pydict({'timestamp_seconds': [0, 0, 30, 60]})]
+    now, slept = [0.0], []
+
+    def sleep(delay):
+        slept.append(delay)
+        now[0] += delay
+
+    out = list(paced(batches, speed=30, clock=lambda: now[0], sleep=sleep))
+    assert [batch.num_rows for batch in out] == [2, 1, 1]
+    assert slept == [1.0, 1.0]
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from generate import BASE_SPEED_KMH, finish_seconds, generate, iter_live_chunks
+
+
+@pytest.fixture(scope='module')
+def generated():
+    _, _, records, live = generate(n_racers=20, n_tracked=3, sample_rate_hz=1, groups=('Даага', 'Их нас'))
+    return records, live
+
+
+def test_same_seed_generates_same_tables():
+    first, second = generate(n_racers=10, seed=7), generate(n_racers=10, seed=7)
+    for a, b in zip(first, second):
+        pd.testing.assert_frame_equal(a, b)
+
+
+def test_live_chunks_are_bounded_and_contiguous():
+    rng = np.random.default_rng(0)
+    chunks = list(iter_live_chunks(rng, ['H1', 'H2', 'H3'], duration_s=100, sample_rate_hz=1,
+                                   distance_km=2.0, chunk_rows=30))
+    # Хэсэг бүр бүтэн цагийн агшнуудтай (30 // 3 = 10 агшин)
+    assert [len(chunk) for chunk in chunks] == [30] * 10
+    live = pd.concat(chunks, ignore_index=True)
+    assert live['id'].tolist() == list(range(300))
+    assert live['timestamp_seconds'].is_monotonic_increasing
+    assert live['distance_covered_km'].between(0, 2.0).all()
+
+
+def test_finish_seconds_integrates_speed_model():
+    # 31 км/ц үндсэн хурд дээр дунджаар 10/π км/ц нэмэгдэнэ
+    assert finish_seconds(31.0, 15.0) == pytest.approx(15 / (31 + 10 / np.pi) * 3600)
+
+
+def test_finish_times_follow_race_distance(generated):
+    records, _ = generated
+    for distance, race in records.groupby('distance_km'):
+        total = race['finish_time_minutes'] * 60 + race['finish_time_seconds']
+        fastest, slowest = finish_seconds(np.array(BASE_SPEED_KMH[::-1], dtype=float), distance)
+        assert total.is_monotonic_increasing
+        assert fastest - 1 <= total.min() and total.max() <= slowest + 1
+        assert race['average_speed_kmh'].to_numpy() == pytest.approx(distance / (total.to_numpy() / 3600))
+
+
+def test_tracked_horses_reach_finish_at_their_record_time(generated):
+    records, live = generated
+    for _, record in records.groupby('race_id', observed=True).head(3).iterrows():
+        track = live[(live['race_id'] == record['race_id']) & (live['horse_id'] == record['horse_id'])]
+        finish = record['finish_time_minutes'] * 60 + record['finish_time_seconds']
+        # Зайн хэмжилтийн ±50 м-ийн шуугианаас бусдаар бичлэгийн барианы цагт зайгаа туулна
+        reached = track.loc[track['distance_covered_km'] >= record['distance_km'] - 0.05, 'timestamp_seconds']
+        assert finish - 15 <= reached.min() <= finish
+        assert track['distance_covered_km'].max() == record['distance_km']
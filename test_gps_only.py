@@ -0,0 +1,55 @@
+import os
+import shutil
+
+import pandas as pd
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from ingest import ingest
+from store import OPTIONAL, open_store
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+GPS = ['timestamp_seconds', 'horse_id', 'latitude', 'longitude']
+LIVE_MODES = ["📼 Бичлэг", "🎞️ Хөдөлгөөнт Бичлэг", "📡 Шууд Дамжуулал"]
+
+
+@pytest.fixture(scope='module')
+def gps_data(tmp_path_factory):
+    """Бүртгэлүүд бүтэн, телеметр нь зөвхөн цаг, морь, өргөрөг, уртрагтай сан"""
+    root = tmp_path_factory.mktemp('gps')
+    data_dir = root / 'data'
+    data_dir.mkdir()
+    for name in ('horse.csv', 'trainer.csv', 'record.csv'):
+        shutil.copy(os.path.join(HERE, 'data', name), data_dir / name)
+    live = pd.read_csv(os.path.join(HERE, 'data', 'live.csv'))
+    live[GPS].to_csv(data_dir / 'live.csv', index=False)
+    ingest(str(data_dir), str(data_dir / 'store'), workers=1)
+    return root
+
+
+def test_stored_live_has_only_gps(gps_data):
+    _, _, races = open_store(str(gps_data / 'data'), str(gps_data / 'data' / 'store'))
+    live = races.table(races.race_ids[0], 'live')
+    assert set(live.columns) == set(GPS)
+    df = live.select(['position', 'gap_to_leader_seconds', *OPTIONAL['live']])
+    assert df['position'].notna().all()
+    assert df['heart_rate'].isna().all() and df['rider_commands'].isna().all()
+
+
+def test_all_live_modes_render(gps_data, monkeypatch):
+    monkeypatch.chdir(gps_data)
+    at = AppTest.from_file(os.path.join(HERE, 'dash.py'), default_timeout=120).run()
+    at.sidebar.selectbox[0].set_value("📡 Шууд Дүрслэл").run()
+    for mode in LIVE_MODES:
+        at.radio[0].set_value(mode).run()
+        assert not at.exception, (mode, [e.value for e in at.exception])
+        assert at.get('plotly_chart'), mode
+    snapshot = at.session_state.live_feed.snapshot()
+    assert snapshot['position'].notna().all()
+    assert snapshot['heart_rate'].isna().all()
+
+    at.sidebar.selectbox[0].set_value("🗺️ Газарзүйн").run()
+    for mode in at.radio[0].options:
+        at.radio[0].set_value(mode).run()
+        assert not at.exception, (mode, [e.value for e in at.exception])
+        assert at.get('plotly_chart'), mode
@@ -0,0 +1,117 @@
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from ingest import ingest, quarantine_path
+from store import open_store, parse_race_id, race_id
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+OLD = ('2024', 'Naadam 2024', 'Даага')
+NEW = ('2025', 'Naadam 2025', 'Шүдлэн')
+
+
+def copy_sources(tmp_path):
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    for name in ('horse.csv', 'trainer.csv', 'record.csv', 'live.csv'):
+        shutil.copy(os.path.join(HERE, 'data', name), data_dir / name)
+    return data_dir
+
+
+def write_sources(data_dir, live):
+    """Нэг морь (М001) хоёр уралдаанд оролцсон жижиг эх өгөгдөл"""
+    data_dir.mkdir(exist_ok=True)
+    pd.DataFrame({'trainer_id': ['Т001']}).to_csv(data_dir / 'trainer.csv', index=False)
+    pd.DataFrame({'horse_id': ['М001', 'М002', 'М003'], 'trainer_id': ['Т001'] * 3}).to_csv(
+        data_dir / 'horse.csv', index=False)
+    pd.DataFrame({
+        'horse_id': ['М001', 'М002', 'М001'],
+        'racing_group': [OLD[2], OLD[2], NEW[2]],
+        'race_name': [OLD[1], OLD[1], NEW[1]],
+        'date': ['2024-07-11', '2024-07-11', '2025-07-11'],
+        'final_position': [1, 2, 1],
+        'average_speed_kmh': [30.0, 29.0, 31.0],
+        'max_speed_kmh': [40.0, 39.0, 41.0],
+        'distance_km': [12.0, 12.0, 15.0],
+        'prize_money_tugrik': [100, 50, 200],
+    }).to_csv(data_dir / 'record.csv', index=False)
+    pd.DataFrame(live).to_csv(data_dir / 'live.csv', index=False)
+
+
+def gps(horses, times):
+    return {'horse_id': horses, 'timestamp_seconds': times, 'latitude': [47.9] * len(horses),
+            'longitude': [106.9] * len(horses)}
+
+
+def stored_live(data_dir):
+    _, _, races = open_store(str(data_dir), str(data_dir / 'store'))
+    return {race: races.table(race, 'live').select(['horse_id', 'timestamp_seconds'])
+            for race in races.race_ids}
+
+
+def test_partitions_cover_every_source_row(tmp_path):
+    data_dir = copy_sources(tmp_path)
+    rejected = {}
+    ingest(str(data_dir), str(data_dir / 'store'),
+           log=lambda name, rows, quarantined, repairs: rejected.update({name: quarantined}))
+    _, _, races = open_store(str(data_dir), str(data_dir / 'store'))
+    # Шалгалтад тэнцээгүй мөр хорионд, бусад нь хуваалтад
+    assert sum(len(races.table(race, 'records')) for race in races.race_ids) == len(
+        pd.read_csv(data_dir / 'record.csv')) - rejected['records']
+    for race in races.race_ids:
+        assert races.summary(race)['live_rows'] == len(races.table(race, 'live'))
+        records = races.table(race, 'records').select(['racing_group', 'race_name'])
+        key = parse_race_id(race)
+        # Хуваалт бүр зөвхөн өөрийн уралдааны мөртэй
+        assert set(records['racing_group'].astype(str)) == {key['racing_group']}
+        assert set(records['race_name'].astype(str)) == {key['race_name']}
+
+
+def test_real_data_accounts_for_every_live_row(tmp_path):
+    data_dir = copy_sources(tmp_path)
+    counts = {}
+    ingest(str(data_dir), str(data_dir / 'store'), workers=1,
+           log=lambda name, rows, rejected, repairs: counts.update({name: (rows, rejected)}))
+    source = len(pd.read_csv(data_dir / 'live.csv'))
+    stored = sum(len(live) for live in stored_live(data_dir).values())
+    assert counts['live'][0] == stored
+    assert stored + counts['live'][1] == source
+
+
+def test_keyed_telemetry_goes_to_its_own_race(tmp_path):
+    data_dir = tmp_path / 'data'
+    live = gps(['М001', 'М001', 'М002', 'М001'], [0, 10, 0, 0])
+    live.update({'year': [OLD[0], OLD[0], OLD[0], NEW[0]], 'race_name': [OLD[1], OLD[1], OLD[1], NEW[1]],
+                 # Насны ангиллын латин үсэг засагдаж бичлэгийнхтэй таарна
+                 'racing_group': [OLD[2], OLD[2], 'Даaga', NEW[2]]})
+    write_sources(data_dir, live)
+    ingest(str(data_dir), str(data_dir / 'store'), workers=1)
+    stored = stored_live(data_dir)
+    # М001-ийн 2024 оны телеметр сүүлийн (2025) уралдаанд биш, өөрийн уралдаанд хадгалагдана
+    old = stored[race_id(*OLD)]
+    assert sorted(zip(old['horse_id'].astype(str), old['timestamp_seconds'])) == [
+        ('М001', 0), ('М001', 10), ('М002', 0)]
+    assert stored[race_id(*NEW)]['horse_id'].astype(str).tolist() == ['М001']
+    assert not {'race_id', 'year', 'race_name', 'racing_group'} & set(
+        open_store(str(data_dir), str(data_dir / 'store'))[2].table(race_id(*OLD), 'live').columns)
+
+
+@pytest.mark.parametrize('live', [
+    # Морь нь бүртгэлтэй ч бичлэггүй
+    gps(['М001', 'М003'], [0, 0]),
+    # Бичлэггүй уралдааны түлхүүртэй
+    dict(gps(['М001', 'М001'], [0, 0]), race_id=[None, race_id('2023', 'Naadam 2023', 'Даага')]),
+])
+def test_unplaced_telemetry_is_quarantined(tmp_path, live):
+    data_dir = tmp_path / 'data'
+    write_sources(data_dir, live)
+    ingest(str(data_dir), str(data_dir / 'store'), workers=1)
+    stored = stored_live(data_dir)
+    # Түлхүүргүй мөр морины хамгийн сүүлийн уралдаанд онооно
+    assert stored[race_id(*NEW)]['horse_id'].astype(str).tolist() == ['М001']
+    assert len(stored[race_id(*OLD)]) == 0
+    quarantine = pd.read_csv(quarantine_path('live', str(data_dir / 'store')))
+    assert quarantine['_reason'].tolist() == ['race:unassigned']
+    assert quarantine['horse_id'].tolist() == [live['horse_id'][1]]
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+
+from live_feed import LIVE_SCHEMA, FileTailSource, HorseBuffer, LiveFeed, QueueSource
+from store import apply_schema
+
+
+def live_rows(horses=('H1', 'H2'), duration_s=120):
+    """Секунд тутмын (цаг x морь) телеметр, үүсгэгчээс хамааралгүй гараар бэлдсэн"""
+    ts = np.repeat(np.arange(duration_s), len(horses))
+    n = len(ts)
+    return apply_schema(pd.DataFrame({
+        'id': np.arange(n),
+        'timestamp_seconds': ts,
+        'horse_id': np.tile(horses, duration_s),
+        'distance_covered_km': ts * 0.009,
+        'current_speed_kmh': np.full(n, 32.5),
+        'heart_rate': 100 + ts % 50,
+        'position': np.tile(np.arange(1, len(horses) + 1), duration_s),
+        'gap_to_leader_seconds': np.tile(np.arange(len(horses)) * 2, duration_s),
+        'cumulative_time_seconds': ts,
+        'latitude': 47.9 + ts * 1e-5,
+        'longitude': 106.9 + ts * 1e-5,
+        'elevation_m': np.full(n, 1350),
+        'stride_frequency': np.full(n, 2.2),
+        'energy_level': 100 - ts % 60,
+        'rider_commands': np.where(ts % 2, 'Түлхэх', 'Тогтвортой'),
+    }), 'live')
+
+
+def test_buffer_keeps_narrow_numeric_dtypes():
+    buf = HorseBuffer(8)
+    rows = live_rows(('H1',), 4)
+    buf.append(rows)
+    for col, dtype in LIVE_SCHEMA.items():
+        expected = object if dtype == 'category' else np.dtype(dtype)
+        assert buf.data[col].dtype == expected, col
+    assert buf.frame()['heart_rate'].dtype == np.int16
+
+
+def test_buffer_widens_values_that_do_not_fit():
+    buf = HorseBuffer(4)
+    rows = live_rows(('H1',), 2).astype({'elevation_m': 'int64'})
+    rows.loc[1, 'elevation_m'] = 40_000
+    buf.append(rows)
+    assert buf.frame()['elevation_m'].tolist()[-1] == 40_000
+
+
+def test_feed_poll_preserves_dtypes():
+    source = QueueSource()
+    feed = LiveFeed(source)
+    source.queue.put(live_rows())
+    feed.poll()
+    history = feed.history()
+    assert history['energy_level'].dtype == np.int8
+    assert history['position'].dtype == np.int32
+    assert history['current_speed_kmh'].dtype == np.float64
+
+
+def numbered(start, stop):
+    return live_rows(('H1',), 20).iloc[start:stop].reset_index(drop=True)
+
+
+def test_buffer_wraps_around_in_time_order():
+    buf = HorseBuffer(4)
+    buf.append(numbered(0, 3))
+    buf.append(numbered(3, 6))
+    assert len(buf) == 4 and buf.count == 6
+    assert buf.frame()['timestamp_seconds'].tolist() == [2, 3, 4, 5]
+    assert buf.latest()['timestamp_seconds'] == 5
+    buf.append(numbered(6, 7))
+    assert buf.frame()['timestamp_seconds'].tolist() == [3, 4, 5, 6]
+
+
+def test_buffer_append_larger_than_capacity():
+    buf = HorseBuffer(4)
+    buf.append(numbered(0, 1))
+    buf.append(numbered(1, 11))
+    assert buf.count == 11
+    assert buf.frame()['timestamp_seconds'].tolist() == [7, 8, 9, 10]
+
+
+def test_feed_snapshot_and_history_per_horse():
+    source = QueueSource()
+    feed = LiveFeed(source, capacity=5)
+    rows = live_rows(('H1', 'H2'), 20)
+    source.queue.put(rows.iloc[:10])
+    source.queue.put(rows.iloc[10:])
+    assert len(feed.poll()) == len(rows)
+    assert feed.poll().empty
+    snapshot = feed.snapshot()
+    assert snapshot['horse_id'].tolist() == ['H1', 'H2']
+    assert snapshot['timestamp_seconds'].tolist() == [19, 19]
+    history = feed.history(['H2'])
+    assert history['timestamp_seconds'].tolist() == [15, 16, 17, 18, 19]
+
+
+def test_file_tail_reads_only_complete_new_lines(tmp_path):
+    path = tmp_path / 'live.csv'
+    rows = live_rows(('H1',), 3)
+    text = rows.to_csv(index=False)
+    # Сүүлийн мөр дутуу бичигдсэн
+    path.write_text(text[:-5], encoding='utf-8')
+    source = FileTailSource(str(path))
+    assert source.read()['timestamp_seconds'].tolist() == [0, 1]
+    assert source.read() is None
+    path.write_text(text, encoding='utf-8')
+    assert source.read()['timestamp_seconds'].tolist() == [2]
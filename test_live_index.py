@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from live_index import LiveIndex
+
+
+@pytest.fixture
+def index():
+    # B нь 20-д эхэлж, 40-д мэдээлээгүй
+    return LiveIndex(pd.DataFrame({
+        'horse_id': ['A', 'B', 'A', 'A', 'B', 'A', 'B'],
+        'timestamp_seconds': [0, 20, 10, 20, 30, 40, 50],
+        'distance_covered_km': [0.0, 0.2, 0.1, 0.2, 0.3, 0.4, 0.5],
+    }))
+
+
+def test_index_orders_by_horse_and_time(index):
+    assert index.horse_ids == ['A', 'B']
+    assert index.starts.tolist() == [0, 4]
+    assert index.stops.tolist() == [4, 7]
+    assert index.max_time == 50
+
+
+def test_snapshot_at_exact_tick_only(index):
+    assert index.snapshot_at(20)['horse_id'].tolist() == ['A', 'B']
+    assert index.snapshot_at(30)['horse_id'].tolist() == ['B']
+    assert index.snapshot_at(15).empty
+    assert index.snapshot_at(-5).empty
+    assert index.snapshot_at(1000).empty
+
+
+def test_snapshot_at_filters_horses(index):
+    assert index.snapshot_at(20, ['B', 'unknown'])['horse_id'].tolist() == ['B']
+    assert index.snapshot_at(20, []).empty
+
+
+def test_latest_at_between_ticks(index):
+    assert index.latest_at(-1).empty
+    latest = index.latest_at(15)
+    assert list(zip(latest['horse_id'], latest['timestamp_seconds'])) == [('A', 10)]
+    latest = index.latest_at(45, ['B'])
+    assert list(zip(latest['horse_id'], latest['timestamp_seconds'])) == [('B', 30)]
+
+
+def test_latest_rows_asof(index):
+    rows = index.latest_rows([-1, 0, 15, 20, 45, 1000])
+    frame = index.frame
+    assert rows.shape == (6, 2)
+    assert rows[0].tolist() == [-1, -1]
+    assert rows[1, 1] == -1
+    assert frame['timestamp_seconds'].take(rows[2:, 0]).tolist() == [10, 20, 40, 40]
+    assert frame['timestamp_seconds'].take(rows[3:, 1]).tolist() == [20, 30, 50]
+
+
+def test_latest_at_matches_latest_rows(index):
+    for t in (0, 15, 25, 45, 60):
+        rows = index.latest_rows([t])[0]
+        assert index.latest_at(t).index.tolist() == rows[rows >= 0].tolist()
+
+
+def test_history_until_and_horse_path(index):
+    history = index.history_until(20)
+    assert list(zip(history['horse_id'], history['timestamp_seconds'])) == [
+        ('A', 0), ('A', 10), ('A', 20), ('B', 20)]
+    assert index.horse_path('B', 25)['timestamp_seconds'].tolist() == [20]
+    assert index.horse_path('unknown').empty
+    stops = index.history_stops(30)
+    assert index.history_from(stops).equals(index.history_until(30))
+
+
+def test_empty_frame():
+    index = LiveIndex(pd.DataFrame({'horse_id': [], 'timestamp_seconds': []}))
+    assert len(index) == 0 and index.horse_ids == [] and index.max_time == 0
+    assert len(index.starts) == len(index.stops) == 0
+    assert index.snapshot_at(0).empty
+    assert index.latest_at(10).empty
+    assert index.latest_rows([0, 10]).shape == (2, 0)
+    assert index.history_until(10).empty
+    assert index.history_from(index.history_stops(10)).empty
+    assert index.horses_frame(['A']).empty
+    assert np.asarray(index.times).size == 0
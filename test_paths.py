@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+from live_index import LiveIndex
+from paths import PathCache, combined_path_trace, rdp_mask, simplify_path, zoom_tolerance
+
+
+def test_rdp_keeps_short_paths():
+    for n in range(3):
+        assert rdp_mask(np.zeros(n), np.zeros(n), 1.0).tolist() == [True] * n
+
+
+def test_rdp_drops_collinear_points():
+    x = np.linspace(0, 10, 11)
+    assert rdp_mask(x, 2 * x, 1e-9).tolist() == [True] + [False] * 9 + [True]
+
+
+def test_rdp_keeps_corner_above_tolerance():
+    x = np.array([0.0, 1.0, 2.0, 3.0, 4.0])
+    y = np.array([0.0, 1.1, 2.0, 1.1, 0.0])
+    assert rdp_mask(x, y, 0.5).tolist() == [True, False, True, False, True]
+    # Хүлцэл их бол зөвхөн төгсгөлүүд
+    assert rdp_mask(x, y, 5.0).tolist() == [True, False, False, False, True]
+
+
+def test_rdp_closed_loop():
+    # Эхлэл, төгсгөл давхацвал цэг хүртэлх зайгаар хэмжинэ
+    x = np.array([0.0, 1.0, 1.0, 0.0, 0.0])
+    y = np.array([0.0, 0.0, 1.0, 1.0, 0.0])
+    keep = rdp_mask(x, y, 0.1)
+    assert keep[[0, 2, 4]].all() and keep.sum() >= 4
+
+
+def test_simplified_path_stays_within_tolerance():
+    rng = np.random.default_rng(1)
+    x = np.cumsum(rng.uniform(0, 1, 500))
+    y = np.cumsum(rng.normal(0, 1, 500))
+    tolerance = 2.0
+    keep = rdp_mask(x, y, tolerance)
+    kx, ky = x[keep], y[keep]
+    # Хасагдсан цэг бүр хадгалагдсан хоёр хөршийнхөө хэрчмээс tolerance дотор
+    segment = np.searchsorted(np.flatnonzero(keep), np.arange(len(x)), side='right') - 1
+    segment = np.clip(segment, 0, keep.sum() - 2)
+    x0, y0, x1, y1 = kx[segment], ky[segment], kx[segment + 1], ky[segment + 1]
+    dist = np.abs((x1 - x0) * (y - y0) - (y1 - y0) * (x - x0)) / np.hypot(x1 - x0, y1 - y0)
+    assert (dist <= tolerance + 1e-9).all()
+    assert keep.sum() < len(x) // 2
+
+
+def test_simplify_path_empty_and_latitude_scale():
+    lat, lon = simplify_path([], [], 0.1)
+    assert len(lat) == len(lon) == 0
+    lat, lon = simplify_path([60.0, 60.0, 60.0], [0.0, 1.0, 2.0], 0.01)
+    assert lat.tolist() == [60.0, 60.0] and lon.tolist() == [0.0, 2.0]
+
+
+def test_path_cache_and_combined_trace():
+    live = pd.DataFrame({
+        'horse_id': ['A'] * 5 + ['B'] * 2,
+        'timestamp_seconds': [0, 10, 20, 30, 40, 0, 10],
+        'latitude': [47.0, 47.1, 47.2, 47.3, 47.4, 47.0, 47.05],
+        'longitude': [106.0] * 5 + [106.1, 106.1],
+    })
+    cache = PathCache(LiveIndex(live))
+    tolerance = zoom_tolerance(10)
+    lat, _ = cache.get('A', 40, tolerance)
+    assert lat.tolist() == [47.0, 47.4]
+    assert cache.get('A', 40, tolerance) is cache.get('A', 40, tolerance)
+    trace = combined_path_trace(cache, ['A', 'B'], 20)
+    # Морь бүрийн зам None-оор тусгаарлагдана
+    assert list(trace.lat) == [47.0, 47.2, None, 47.0, 47.05]
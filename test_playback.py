@@ -0,0 +1,40 @@
+from playback import MIN_INTERVAL, PlaybackClock
+
+
+def test_tick_advances_by_elapsed_time_and_step():
+    clock = PlaybackClock(end=600, speed=30, step=60)
+    clock.start(now=0.0)
+    # 2 бодит сек x 30 = 60 уралдааны сек
+    assert clock.tick(now=2.0) == 60
+    # Алхамд хүрээгүй бол байрлал хэвээр
+    assert clock.tick(now=3.0) == 60
+    assert clock.tick(now=4.0) == 120 and clock.dropped == 0
+
+
+def test_slow_render_drops_frames_instead_of_lagging():
+    clock = PlaybackClock(end=600, speed=30, step=60)
+    clock.start(now=0.0)
+    assert clock.tick(now=8.0) == 240
+    assert clock.dropped == 3
+
+
+def test_finishes_at_end_and_restarts_from_zero():
+    clock = PlaybackClock(end=100, speed=30, step=60)
+    clock.start(now=0.0)
+    assert clock.tick(now=60.0) == 100
+    assert clock.finished and not clock.running
+    clock.start(now=61.0)
+    assert clock.position == 0 and clock.running
+
+
+def test_pause_and_seek():
+    clock = PlaybackClock(end=600, speed=30, step=60)
+    clock.start(now=0.0)
+    clock.pause()
+    assert clock.tick(now=100.0) == 0
+    clock.seek(1000)
+    assert clock.position == 600
+    clock.seek(-5)
+    assert clock.position == 0
+    assert PlaybackClock(speed=1000, step=1).interval == MIN_INTERVAL
+    assert PlaybackClock(speed=10, step=60).interval == 6
@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+import positions
+from positions import Course, PositionEngine, haversine_km, rank_ticks
+
+LAT = np.linspace(47.90, 48.00, 21)
+LON = np.full(21, 106.90)
+
+
+@pytest.fixture
+def course():
+    return Course(LAT, LON)
+
+
+def test_course_drops_repeated_vertices():
+    course = Course([47.9, 47.9, 48.0], [106.9, 106.9, 106.9])
+    assert len(course) == 1
+    with pytest.raises(ValueError):
+        Course([47.9, 47.9], [106.9, 106.9])
+
+
+def test_snap_projects_onto_course(course):
+    along, offset = course.snap([47.95, 47.95], [106.90, 106.901])
+    expected = haversine_km(47.90, 106.90, 47.95, 106.90)
+    assert along == pytest.approx([expected, expected], abs=1e-3)
+    assert offset[0] == pytest.approx(0, abs=1e-6)
+    assert offset[1] == pytest.approx(haversine_km(47.95, 106.90, 47.95, 106.901), rel=1e-2)
+    # Замаас гадуур: эхлэл, төгсгөлд хавчина
+    along, _ = course.snap([47.8, 48.1], [106.9, 106.9])
+    assert along == pytest.approx([0, course.length_km])
+
+
+def test_snap_min_km_keeps_out_and_back_on_return_leg():
+    lat = np.r_[LAT, LAT[-2::-1]]
+    lon = np.r_[LON, LON[-2::-1] + 1e-4]
+    course = Course(lat, lon)
+    point = ([47.95], [106.90005])
+    outbound, _ = course.snap(*point)
+    back, _ = course.snap(*point, min_km=[course.length_km * 0.9])
+    assert outbound[0] < course.length_km / 2 < back[0]
+
+
+def test_rank_ticks_positions_and_gaps():
+    ts = [0, 0, 10, 10, 20]
+    km = [0.0, 0.0, 1.0, 0.5, 1.0]
+    position, gap = rank_ticks(ts, km)
+    assert position.tolist() == [1, 2, 1, 2, 1]
+    # Тэргүүлэгч 0.5 км-т 5 секундэд хүрсэн; 20-д 1.0 км нь 10-д хүрсэн зай
+    assert gap.tolist() == pytest.approx([0, 0, 0, 5, 10])
+
+
+def test_rank_ticks_empty_and_nan():
+    position, gap = rank_ticks([], [])
+    assert len(position) == len(gap) == 0
+    position, _ = rank_ticks([0, 0], [np.nan, 0.2])
+    assert position.tolist() == [2, 1]
+
+
+def track(frac):
+    return np.interp(frac, [0, 1], [LAT[0], LAT[-1]]), np.full(len(frac), LON[0])
+
+
+def test_engine_ranks_against_horses_not_in_tick(course):
+    engine = PositionEngine(course)
+    engine.tick(0, ['A', 'B', 'C'], *track(np.array([0.3, 0.2, 0.1])))
+    # Зөвхөн C мэдээлсэн ч A, B-ийн сүүлийн зайг тооцно
+    _, position, _, _ = engine.tick(10, ['C'], *track(np.array([0.25])))
+    assert position.tolist() == [2]
+
+
+def test_engine_matches_rank_ticks(course):
+    engine = PositionEngine(course)
+    times = np.arange(0, 100, 10)
+    fracs = np.outer(times / 100, [1.0, 0.8, 0.6])
+    result = [engine.tick(t, ['A', 'B', 'C'], *track(frac)) for t, frac in zip(times, fracs)]
+    along = np.concatenate([r[0] for r in result])
+    position, gap = rank_ticks(np.repeat(times, 3), along)
+    assert np.concatenate([r[1] for r in result]).tolist() == position.tolist()
+    assert np.concatenate([r[2] for r in result]) == pytest.approx(gap)
+
+
+def test_engine_front_history_is_bounded(course, monkeypatch):
+    monkeypatch.setattr(positions, 'FRONT_CAPACITY', 8)
+    engine = PositionEngine(course)
+    for t in range(2000):
+        # B нь A-гаас 20 секунд хоцорно: зөрүүнд сүүлийн ~20 агшин л хэрэгтэй
+        _, _, gap, _ = engine.tick(t, ['A', 'B'], *track(np.array([t, max(t - 20, 0)]) / 2000))
+    assert len(engine._tick_times) <= 64
+    assert gap == pytest.approx([0, 20])
+
+
+def test_engine_front_history_is_capped(course, monkeypatch):
+    monkeypatch.setattr(positions, 'FRONT_CAPACITY', 8)
+    monkeypatch.setattr(positions, 'FRONT_TICKS', 32)
+    engine = PositionEngine(course)
+    for t in range(500):
+        engine.tick(t, ['A', 'B'], *track(np.array([t / 500, 0.0])))
+    assert len(engine._tick_times) == 32
+    assert engine._ticks <= 32
@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+import profiling
+from profiling import Metrics, profile_run, span, timed
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Гараар урагшлуулах perf_counter"""
+    now = [100.0]
+    monkeypatch.setattr(profiling.time, 'perf_counter', lambda: now[0])
+    return now
+
+
+def test_nested_span_timings(clock):
+    metrics = Metrics()
+    with profile_run('replay', metrics) as current:
+        clock[0] += 0.5
+        with span('load') as outer:
+            outer.rows = 10
+            clock[0] += 1.0
+            with span('filter', rows=4):
+                clock[0] += 0.25
+            clock[0] += 0.25
+        clock[0] += 0.5
+    assert [(item.name, item.depth, item.seconds) for item in current.spans] == [
+        ('load', 0, 1.5), ('filter', 1, 0.25)]
+    assert current.seconds == 2.5
+    assert current.frame()['span'].tolist() == ['load', '  filter']
+    summary = metrics.summary('replay').set_index('span')
+    assert summary.loc['∑', 'mean_ms'] == 2500
+    assert summary.loc['load', 'rows'] == 10
+
+
+def test_span_outside_profile_records_nothing(clock):
+    @timed()
+    def work():
+        clock[0] += 1.0
+        return 42
+
+    with span('idle') as item:
+        pass
+    assert work() == 42 and item.seconds == 0.0
+    assert profiling.active_profile() is None
+
+
+def test_inner_profile_run_becomes_span(clock):
+    metrics = Metrics()
+    with profile_run('main', metrics):
+        with profile_run('fragment', metrics):
+            clock[0] += 1.0
+    assert len(metrics.history) == 1
+    assert [item.name for item in metrics.history[0].spans] == ['fragment']
+
+
+def test_prometheus_exposition(clock, tmp_path):
+    prom, log = tmp_path / 'naadam.prom', tmp_path / 'metrics.ndjson'
+    metrics = Metrics(str(log), str(prom))
+    for seconds in (1.0, 3.0):
+        with profile_run('Уралдаан "A"', metrics):
+            with span('chart') as item:
+                item.rows, item.bytes = 5, 2048
+                clock[0] += seconds
+    text = prom.read_text(encoding='utf-8')
+    assert text == metrics.prometheus()
+    lines = text.splitlines()
+    labels = 'view="Уралдаан \\"A\\""'
+    assert f'naadam_render_seconds_sum{{{labels}}} 4.000000' in lines
+    assert f'naadam_render_seconds_count{{{labels}}} 2' in lines
+    assert f'naadam_span_seconds_sum{{{labels},span="chart"}} 4.000000' in lines
+    assert f'naadam_span_rows_total{{{labels},span="chart"}} 10' in lines
+    assert f'naadam_chart_bytes_total{{{labels},span="chart"}} 4096' in lines
+    # HELP/TYPE мөр нь тухайн хэмжүүрийн дээжүүдийн өмнө
+    for metric, kind in [('naadam_render_seconds', 'summary'), ('naadam_span_seconds', 'summary'),
+                         ('naadam_span_rows_total', 'counter'), ('naadam_chart_bytes_total', 'counter')]:
+        type_line = lines.index(f"# TYPE {metric} {kind}")
+        assert lines[type_line - 1].startswith(f"# HELP {metric} ")
+        assert min(i for i, line in enumerate(lines) if line.startswith(metric)) > type_line
+    assert text.endswith("\n") and not (tmp_path / 'naadam.prom.tmp').exists()
+    records = [json.loads(line) for line in log.read_text(encoding='utf-8').splitlines()]
+    assert [record['spans'][0]['seconds'] for record in records] == [1.0, 3.0]
@@ -0,0 +1,28 @@
+import pandas as pd
+
+from registry import EntityIndex
+
+
+def entity_index():
+    horses = pd.DataFrame({'horse_id': ['М001', 'М002', 'М003'], 'trainer_id': ['Т002', 'Т001', 'Т002']})
+    trainers = pd.DataFrame({'trainer_id': ['Т001', 'Т002'], 'trainer_name': ['Уяач_1', 'Уяач_2']})
+    records = pd.DataFrame({'horse_id': ['М003', 'М001', 'М003'], 'final_position': [1, 2, 5]})
+    return EntityIndex(horses, trainers, records)
+
+
+def test_lookups_by_id_and_name():
+    index = entity_index()
+    assert index.horse('М002')['trainer_id'] == 'Т001'
+    assert index.trainer('Т002')['trainer_name'] == 'Уяач_2'
+    assert index.trainer_id('Уяач_1') == 'Т001'
+    assert index.horse('М999') is None and index.trainer('Т999') is None
+    assert index.trainer_id('Байхгүй') is None
+
+
+def test_group_lookups_keep_row_order():
+    index = entity_index()
+    assert index.trainer_horses('Т002')['horse_id'].tolist() == ['М001', 'М003']
+    assert index.horse_records('М003')['final_position'].tolist() == [1, 5]
+    # Олдохгүй түлхүүр хоосон хүснэгт буцаана
+    assert index.trainer_horses('Т999').empty
+    assert list(index.horse_records('М002').columns) == ['horse_id', 'final_position']
@@ -0,0 +1,58 @@
+import pandas as pd
+
+from live_index import LiveIndex
+from replay_cache import FrameCache
+from rolling import RollingStats
+
+
+def live_index():
+    return LiveIndex(pd.DataFrame({
+        'horse_id': ['A', 'B'] * 4,
+        'timestamp_seconds': [0, 0, 10, 10, 20, 20, 30, 30],
+        'distance_covered_km': [0.0, 0.0, 0.1, 0.08, 0.2, 0.17, 0.3, 0.25],
+        'current_speed_kmh': [36.0, 30.0, 36.0, 29.0, 36.0, 32.0, 36.0, 30.0],
+        'heart_rate': [100, 110, 120, 125, 130, 140, 150, 145],
+    }))
+
+
+def test_get_builds_once_then_hits():
+    index = live_index()
+    cache = FrameCache(index, 'race-v1')
+    frame = cache.get(15)
+    assert frame.snapshot.equals(index.latest_at(15))
+    assert frame.stops.tolist() == index.history_stops(15).tolist()
+    assert cache.get(15) is frame
+    assert (cache.hits, cache.misses, len(cache)) == (1, 1, 1)
+
+
+def test_evicts_least_recently_used_within_byte_budget():
+    index = live_index()
+    size = FrameCache(index, 'race-v1').get(0).nbytes
+    cache = FrameCache(index, 'race-v1', max_bytes=2 * size)
+    first = cache.get(0)
+    cache.get(10)
+    cache.get(0)
+    cache.get(20)
+    # 10 нь хамгийн удаан ашиглаагүй тул гарна
+    assert [t for _, t in cache._frames] == [0, 20]
+    assert cache.get(0) is first
+    assert cache.nbytes <= cache.max_bytes
+
+
+def test_precompute_fills_every_step():
+    cache = FrameCache(live_index(), 'race-v1', figure_builder=lambda snapshot, t: pd.Series([t]))
+    cache.precompute(range(0, 40, 10)).join()
+    assert len(cache) == 4 and not cache.precomputing
+    assert cache.get(30).figure_json == pd.Series([30]).to_json()
+    assert cache.misses == 0
+
+
+def test_tracker_advances_forward_and_resets_on_seek_back():
+    index = live_index()
+    cache = FrameCache(index, 'race-v1', tracker=RollingStats(1.0))
+    for t in (0, 20, 10, 30):
+        fresh = RollingStats(1.0)
+        fresh.update(index.history_until(t).sort_values(['timestamp_seconds', 'horse_id']))
+        pd.testing.assert_frame_equal(cache.get(t).stats, fresh.snapshot())
+    # 0 -> 20 урагш, 10 нь ухарсан тул эхнээс, 30 нь урагш
+    assert cache.tracker.samples == len(index)
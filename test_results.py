@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+from results import ResultsQuery
+
+
+def results_query():
+    # Хоёр уралдаан: r1-д 12, r2-т 3 оролцогч
+    positions = list(range(1, 13)) + [1, 2, 3]
+    return ResultsQuery(pd.DataFrame({
+        'race_id': ['r1'] * 12 + ['r2'] * 3,
+        'horse_id': [f"М{i:03d}" for i in range(1, 16)],
+        'final_position': positions,
+        'average_speed_kmh': [40.0 - p for p in positions],
+        'weather': ['Нартай', 'Салхитай', 'Үүлэрхэг'] * 5,
+    }))
+
+
+def test_mask_combines_filters():
+    query = results_query()
+    assert query.mask().sum() == 15
+    assert query.mask("Эхний 10").sum() == 13
+    # Сүүлийн 10 нь уралдаан бүрийн оролцогчдын тоогоор: r1-ийн 3-12, r2-ийн бүгд
+    assert query.mask("Сүүлийн 10").sum() == 13
+    assert query.mask(min_speed=38.0).sum() == 4
+    both = query.mask("Эхний 20", min_speed=38.0, weather="Нартай")
+    assert query.df.loc[both, 'horse_id'].tolist() == ['М001', 'М013']
+
+
+def test_window_sorts_and_pages_hits():
+    query = results_query()
+    mask = query.mask(weather="Салхитай")
+    page, total = query.window(mask, 'average_speed_kmh', ascending=False, page=1, page_size=2)
+    assert total == 5
+    assert page['horse_id'].tolist() == ['М005', 'М008']
+    assert query.order('average_speed_kmh', False) is query.order('average_speed_kmh', False)
+    empty, total = query.window(np.zeros(len(query), dtype=bool))
+    assert empty.empty and total == 0
+
+
+def test_categorical_sort_follows_labels_not_codes():
+    # Кодын хүснэгтэд сүүлд нэмэгдсэн "Бороотой" нь код дарааллаар төгсгөлд
+    weather = pd.Categorical(['Нартай', None, 'Бороотой', 'Үүлэрхэг'],
+                             categories=['Нартай', 'Үүлэрхэг', 'Бороотой'])
+    query = ResultsQuery(pd.DataFrame({'final_position': [1, 2, 3, 4], 'average_speed_kmh': [30.0] * 4,
+                                       'weather': weather}))
+    page, _ = query.window(query.mask(), 'weather')
+    # SQL-ийн ORDER BY-тэй адил хоосон нь эхэнд
+    assert page['weather'].tolist()[1:] == ['Бороотой', 'Нартай', 'Үүлэрхэг']
+    assert pd.isna(page['weather'].tolist()[0])
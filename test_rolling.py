@@ -0,0 +1,68 @@
+import math
+
+import pandas as pd
+import pytest
+
+from rolling import HR_WINDOW, SPEED_HALFLIFE, HorseStats, RollingStats
+
+
+def test_ewma_weights_by_elapsed_time():
+    horse = HorseStats()
+    horse.update(0, 0.0, 30.0, math.nan)
+    assert horse.ewma_speed == 30.0
+    # Хагас задралын хугацаа өнгөрөхөд зөрүүний тал нь шингэнэ
+    horse.update(SPEED_HALFLIFE, 0.1, 40.0, math.nan)
+    assert horse.ewma_speed == pytest.approx(35.0)
+    # Хоёр дахин урт завсар: 1 - 0.25 = 0.75 жин
+    horse.update(3 * SPEED_HALFLIFE, 0.2, 15.0, math.nan)
+    assert horse.ewma_speed == pytest.approx(35.0 + 0.75 * (15.0 - 35.0))
+
+
+def test_heart_rate_max_evicts_outside_window():
+    horse = HorseStats()
+    maxima = []
+    for t, heart_rate in [(0, 120), (10, 150), (20, 130), (10 + HR_WINDOW, 125), (20 + HR_WINDOW, math.nan)]:
+        horse.update(t, 0.0, 30.0, heart_rate)
+        maxima.append(horse.heart_rate_max)
+    # 150 нь 10+HR_WINDOW-д, 130 нь 20+HR_WINDOW-д цонхноос гарна
+    assert maxima == [120, 150, 150, 130, 125]
+    assert [t for t, _ in horse._hr] == [10 + HR_WINDOW]
+
+
+def test_pace_over_last_km():
+    horse = HorseStats()
+    horse.update(0, 0.0, 20.0, math.nan)
+    horse.update(90, 0.5, 20.0, math.nan)
+    # 1 км хүрээгүй: туулсан 0.5 км-ээр хэмжинэ
+    assert horse.pace_last_km == pytest.approx(180.0)
+    horse.update(180, 1.0, 20.0, math.nan)
+    assert horse.pace_last_km == pytest.approx(180.0)
+    horse.update(270, 1.6, 20.0, math.nan)
+    # 0.6 км-ийг 90-180 сек хооронд интерполяцаар 108 сек-д давсан
+    assert horse.pace_last_km == pytest.approx(270 - 108)
+    assert [d for _, d in horse._km] == [0.5, 1.0, 1.6]
+
+
+def test_marks_interpolate_crossing_times():
+    horse = HorseStats()
+    horse.update(0, 0.0, 30.0, math.nan)
+    horse.update(10, 0.25, 30.0, math.nan)
+    assert horse.marks == pytest.approx([0.0, 4.0, 8.0])
+    assert horse.time_at(0.15) == pytest.approx(6.0)
+    assert math.isnan(horse.time_at(0.5))
+
+
+def test_snapshot_gap_from_leader_marks():
+    stats = RollingStats(race_km=1.0)
+    stats.update(pd.DataFrame({'horse_id': ['A', 'B', 'A', 'B'], 'timestamp_seconds': [0, 0, 10, 10],
+                               'distance_covered_km': [0.0, 0.0, 0.25, 0.15],
+                               'current_speed_kmh': [30.0, 30.0, 30.0, 30.0]}))
+    snapshot = stats.snapshot().set_index('horse_id')
+    assert snapshot.loc['A', 'gap_seconds'] == 0.0
+    # Тэргүүлэгч 0.15 км-ийг 6 сек-д давсан, B 10 сек-д хүрсэн
+    assert snapshot.loc['B', 'gap_seconds'] == pytest.approx(4.0)
+    assert snapshot.loc['B', 'gap_km'] == pytest.approx(0.1)
+    # B: 0.15 км/10 сек хурдацаар үлдсэн 0.85 км
+    assert snapshot.loc['B', 'projected_finish_seconds'] == pytest.approx(10 + 0.85 * 10 / 0.15)
+    assert math.isnan(snapshot.loc['B', 'heart_rate_max'])
+    assert stats.samples == 4 and len(stats) == 2
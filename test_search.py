@@ -0,0 +1,48 @@
+import pandas as pd
+import pytest
+
+from search import SearchIndex, documents, normalize
+
+
+def horse_index():
+    return SearchIndex(['М001', 'М002', 'М003'], [
+        ['М001', 'М002', 'М003'],
+        ['Унаач_1', 'Унаач_2', 'Унаач_12'],
+        ['Өвөрхангай', 'Төв', 'Сүхбаатар'],
+    ])
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('ӨВӨРХАНГАЙ', 'оворхангаи'),
+    ('Унаач_12', 'унаач 12'),
+    ('  Сүхбаатар / Төв ', 'сухбаатар тов'),
+    ('Хөвсгөлъ', 'ховсгол'),
+])
+def test_normalize_folds_case_and_letters(text, expected):
+    assert normalize(text) == expected
+
+
+def test_prefix_tokens_intersect():
+    index = horse_index()
+    assert index.match('').tolist() == [0, 1, 2]
+    # Үг бүр угтвараар: "1" нь Унаач_1, Унаач_12-ийн "1", "12" үгэнд тохирно
+    assert index.match('унаач 1').tolist() == [0, 2]
+    assert index.match('ТОВ').tolist() == [1]
+    assert index.match('овор м00').tolist() == [0]
+
+
+def test_substring_fallback_and_paging():
+    index = horse_index()
+    # Үгийн угтвар биш дэд мөр
+    assert index.match('хангаи').tolist() == [0]
+    assert index.match('zzz').tolist() == []
+    assert index.search('м00', page=1, page_size=2) == (['М003'], 3)
+
+
+def test_from_frame_uses_registry_fields():
+    df = pd.DataFrame({'trainer_id': ['Т001', 'Т002'], 'trainer_name': ['Уяач_1', 'Уяач_2'],
+                       'aimag': ['Төв', 'Архангай'], 'sum': ['Зүүн', 'Баруун']})
+    index = SearchIndex.from_frame(df, 'trainers')
+    assert index.keys == ['Т001', 'Т002']
+    assert index.page(index.match('архан')) == ['Т002']
+    assert documents(df, 'trainers') == ['уяач 1 т001 тов зуун', 'уяач 2 т002 архангаи баруун']
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from spatial import SQRT3, aggregate_cells, cells_geojson, hex_cells, hex_centers, hex_size
+
+
+def test_known_points_fall_in_expected_cells():
+    # size=1, scale=1: (q, r) нүдний төв нь x = √3·q + √3/2·r, y = 1.5·r
+    lat = [0.0, 1.5, 0.0, -1.5, 0.4]
+    lon = [0.0, SQRT3 / 2, SQRT3, -SQRT3 / 2, 0.3]
+    q, r = hex_cells(lat, lon, 1.0, 1.0)
+    assert list(zip(q.tolist(), r.tolist())) == [(0, 0), (0, 1), (1, 0), (0, -1), (0, 0)]
+
+
+def test_centers_round_trip_with_scale():
+    q, r = np.meshgrid(np.arange(-3, 4), np.arange(-3, 4))
+    q, r = q.ravel(), r.ravel()
+    size, scale = 0.01, np.cos(np.radians(47.9))
+    lat, lon = hex_centers(q, r, size, scale)
+    # Төвөөс бага зэрэг хазайсан цэг ч мөн тэр нүдэнд
+    got_q, got_r = hex_cells(lat + 0.3 * size, lon - 0.3 * size / scale, size, scale)
+    assert got_q.tolist() == q.tolist() and got_r.tolist() == r.tolist()
+
+
+def test_aggregate_counts_and_means():
+    scale = np.cos(np.radians(47.9))
+    size = hex_size(14, scale)
+    lat, lon = hex_centers(np.array([0, 0, 0, 2]), np.array([0, 0, 0, 1]), size, scale)
+    df = pd.DataFrame({
+        'latitude': lat + 47.9 - hex_centers(0, 0, size, scale)[0],
+        'longitude': lon + 106.9,
+        'current_speed_kmh': [30.0, 40.0, 50.0, 20.0],
+        'elevation_m': [1300, 1310, 1320, 1400],
+        'horse_id': ['М001', 'М001', 'М002', 'М003'],
+    })
+    cells, got_size = aggregate_cells(df, 14, scale)
+    assert got_size == size
+    cells = cells.sort_values('points', ascending=False).reset_index(drop=True)
+    assert cells['points'].tolist() == [3, 1]
+    assert cells['horses'].tolist() == [2, 1]
+    assert cells['mean_speed_kmh'].tolist() == [40.0, 20.0]
+    assert cells['mean_elevation_m'].tolist() == [1310.0, 1400.0]
+    assert cells['cell_id'].is_unique
+
+
+def test_geojson_has_closed_hexagon_per_cell():
+    cells = pd.DataFrame({'latitude': [47.9], 'longitude': [106.9], 'cell_id': ['0:0']})
+    geojson = cells_geojson(cells, 0.01, 1.0)
+    ring = geojson['features'][0]['geometry']['coordinates'][0]
+    assert geojson['features'][0]['id'] == '0:0'
+    assert len(ring) == 7 and ring[0] == ring[-1]
@@ -0,0 +1,124 @@
+import itertools
+
+import pandas as pd
+import pytest
+
+from generate import write_store
+from ingest import write_codes
+from live_index import LiveIndex
+from replay_cache import FrameCache
+from results import ALL, POSITION_FILTERS, ResultsQuery
+from rolling import RollingStats
+from search import SearchIndex
+from sqlstore import RESULT_SORTS, SqlLiveQuery, SqlStore, sqlite_path
+from store import AGE_GROUPS, CodeBook, open_store
+
+COLUMNS = ['race_id', 'horse_id', 'final_position', 'average_speed_kmh', 'max_speed_kmh',
+           'prize_money_tugrik', 'weather']
+
+
+def append_codes(store_dir):
+    """Морьдын тал хувийг сүүлд нэмэгдсэн мэт кодлох (код нь текстийн дараалалтай таарахгүй)"""
+    frame = CodeBook.read(store_dir).to_frame()
+    values = {domain: group['value'].tolist() for domain, group in frame.groupby('domain', observed=True)}
+    values['horse_id'] = values['horse_id'][::2] + values['horse_id'][1::2]
+    write_codes(CodeBook(values), store_dir)
+
+
+@pytest.fixture(scope='module', params=['built', 'appended'])
+def stores(request, tmp_path_factory):
+    store_dir = str(tmp_path_factory.mktemp('sql') / 'store')
+    write_store(store_dir, n_horses=150, n_trainers=10, n_racers=35, n_tracked=2, duration_s=600,
+                years=(2024, 2025), groups=(AGE_GROUPS[2], AGE_GROUPS[3]))
+    if request.param == 'appended':
+        append_codes(store_dir)
+    horses, trainers, races = open_store(store_dir, store_dir)
+    sql = SqlStore(sqlite_path(store_dir), races.codes)
+    sql.sync(horses, trainers, races, store_dir)
+    return races, sql, horses, trainers
+
+
+def page_keys(df):
+    return list(zip(df['race_id'].astype(str), df['horse_id'].astype(str), df['final_position']))
+
+
+@pytest.mark.parametrize('scope', ['all', 'race'])
+def test_paging_matches_results_query(stores, scope):
+    races, sql, *_ = stores
+    race = races.race_ids[0] if scope == 'race' else None
+    table = races.table(race, 'records') if race else races.records
+    frame = table.select(COLUMNS)
+    query, sql_query = ResultsQuery(frame), sql.results(race, COLUMNS)
+    assert len(sql_query) == len(query)
+    assert sql_query.weathers() == query.weathers()
+    assert sql_query.speed_range() == pytest.approx(query.speed_range())
+
+    low, high = query.speed_range()
+    weather = query.weathers()[0]
+    for position, min_speed, weather in itertools.product(
+            POSITION_FILTERS, [None, (low + high) / 2], [ALL, weather]):
+        mask, sql_mask = query.mask(position, min_speed, weather), sql_query.mask(position, min_speed, weather)
+        total = query.count(mask)
+        assert sql_query.count(sql_mask) == total
+        for sort_by, ascending in itertools.product(RESULT_SORTS, [True, False]):
+            for page in range(3):
+                expected, expected_total = query.window(mask, sort_by, ascending, page, 25)
+                actual, actual_total = sql_query.window(sql_mask, sort_by, ascending, page, 25)
+                assert actual_total == expected_total == total
+                assert page_keys(actual) == page_keys(expected), (position, min_speed, weather, sort_by,
+                                                                  ascending, page)
+
+
+def test_window_rejects_unknown_sort(stores):
+    sql = stores[1]
+    query = sql.results()
+    with pytest.raises(ValueError):
+        query.window(query.mask(), sort_by='weather; DROP TABLE records')
+
+
+def rows(df):
+    return sorted(zip(df['horse_id'].astype(str), df['timestamp_seconds'].tolist()))
+
+
+def test_live_queries_match_live_index(stores):
+    races, sql, *_ = stores
+    race = races.race_ids[-1]
+    index = LiveIndex(races.table(race, 'live').select(SqlLiveQuery.COLUMNS))
+    live = sql.live(race)
+    assert live.horse_ids == sorted(map(str, index.horse_ids))
+    assert live.max_time == index.max_time
+    horse = live.horse_ids[0]
+    for t in [-1, 0, 59, index.max_time // 2, index.max_time + 10]:
+        assert rows(live.latest_at(t)) == rows(index.latest_at(t))
+        assert rows(live.latest_at(t, [horse, 'unknown'])) == rows(index.latest_at(t, [horse]))
+        assert rows(live.history_until(t)) == rows(index.history_until(t))
+        assert rows(live.history_until(t, [horse])) == rows(index.history_until(t, [horse]))
+        assert rows(live.history_from(live.history_stops(t))) == rows(index.history_until(t))
+    between = live.rows_between(live.history_stops(60), live.history_stops(120))
+    assert rows(between) == rows(index.rows_between(index.history_stops(60), index.history_stops(120)))
+
+
+def test_frame_cache_over_sql_matches_live_index(stores):
+    races, sql, *_ = stores
+    race = races.race_ids[0]
+    index = LiveIndex(races.table(race, 'live').select(SqlLiveQuery.COLUMNS))
+    caches = [FrameCache(source, race, tracker=RollingStats(12.0)) for source in (index, sql.live(race))]
+    # Урагш, дараа нь ухарч (статистик эхнээс нь дахин тоологдоно)
+    for t in [30, 90, 300, 60]:
+        expected, actual = (cache.get(t) for cache in caches)
+        assert rows(actual.snapshot) == rows(expected.snapshot)
+        stats = [frame.stats.assign(horse_id=frame.stats['horse_id'].astype(str))
+                 .sort_values('horse_id').reset_index(drop=True) for frame in (expected, actual)]
+        pd.testing.assert_frame_equal(stats[1], stats[0], check_dtype=False)
+
+
+@pytest.mark.parametrize('query', ['', 'м00', 'М012', 'ТӨВ баруун', 'унаач_1', 'ач 1', 'zzz', '50%'])
+def test_search_matches_search_index(stores, query):
+    _, sql, horses, trainers = stores
+    expected = [SearchIndex.from_frame(horses.select(), 'horses'),
+                SearchIndex.from_frame(trainers.select(), 'trainers')]
+    for local, remote in zip(expected, sql.entities().search_indexes()):
+        found, sql_found = local.match(query), remote.match(query)
+        assert remote.count(sql_found) == local.count(found)
+        for page in range(2):
+            assert remote.page(sql_found, page, 20) == [str(key) for key in local.page(found, page, 20)]
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+from ingest import write_codes
+from store import CodeBook, apply_schema
+
+
+def test_build_sorts_values_per_domain():
+    codes = CodeBook.build([pd.DataFrame({'horse_id': ['М003', 'М001']}),
+                            pd.DataFrame({'horse_id': ['М002', None], 'aimag': ['Төв', 'Увс']})])
+    assert codes.dtype('horse_id').categories.tolist() == ['М001', 'М002', 'М003']
+    assert codes.dtype('aimag').categories.tolist() == ['Төв', 'Увс']
+    assert len(codes) == 5
+
+
+def test_update_appends_new_values_and_keeps_codes():
+    codes = CodeBook.build([pd.DataFrame({'horse_id': ['М002', 'М004']})])
+    before = apply_schema(pd.DataFrame({'horse_id': ['М004', 'М002']}), 'live', codes)
+    assert codes.update(pd.DataFrame({'horse_id': ['М003', 'М001', 'М004']}))
+    # Шинэ утгууд эрэмбэлэгдэн төгсгөлд нэмэгдэж, хуучин код хэвээр
+    assert codes.dtype('horse_id').categories.tolist() == ['М002', 'М004', 'М001', 'М003']
+    after = apply_schema(pd.DataFrame({'horse_id': ['М004', 'М001']}), 'live', codes)
+    assert before['horse_id'].cat.codes.tolist() == [1, 0]
+    assert after['horse_id'].cat.codes.tolist() == [1, 2]
+    # Хуучин багана шинэ dtype-тай нийлэхэд кодоороо тохирно
+    merged = pd.concat([before.astype({'horse_id': codes.dtype('horse_id')}), after], ignore_index=True)
+    assert isinstance(merged['horse_id'].dtype, pd.CategoricalDtype)
+    assert merged['horse_id'].astype(str).tolist() == ['М004', 'М002', 'М004', 'М001']
+
+
+def test_update_without_new_values_keeps_dtype():
+    codes = CodeBook.build([pd.DataFrame({'horse_id': ['М001']})])
+    dtype = codes.dtype('horse_id')
+    assert not codes.update(pd.DataFrame({'horse_id': pd.Categorical(['М001'])}))
+    assert codes.dtype('horse_id') is dtype
+
+
+def test_domains_share_codes_across_columns():
+    codes = CodeBook.build([pd.DataFrame({'trainer': ['Бат', 'Дорж']})])
+    df = apply_schema(pd.DataFrame({'trainer_name': ['Дорж', 'Сүх']}), 'trainers', codes)
+    assert df['trainer_name'].dtype == codes.dtype('trainer')
+
+
+def test_read_round_trip_preserves_code_order(tmp_path):
+    codes = CodeBook.build([pd.DataFrame({'horse_id': ['М002', 'М001']})])
+    codes.update(pd.DataFrame({'horse_id': ['М000'], 'color': ['Хээр']}))
+    write_codes(codes, str(tmp_path))
+    read = CodeBook.read(str(tmp_path))
+    assert read.dtype('horse_id').categories.tolist() == ['М001', 'М002', 'М000']
+    assert read.dtype('color').categories.tolist() == ['Хээр']
+    assert CodeBook.read(str(tmp_path / 'missing')).to_frame().empty
+
+
+def test_apply_schema_narrows_integers_with_fallback():
+    df = apply_schema(pd.DataFrame({'heart_rate': [60, 180], 'energy_level': [0, 300]}), 'live')
+    assert df['heart_rate'].dtype == np.int16
+    assert df['energy_level'].dtype == np.int64
+
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+from store import FrameTable, ParquetTable, content_hash, data_version
+
+
+def records_frame():
+    return pd.DataFrame({
+        'horse_id': ['М001', 'М002'], 'finish_time_minutes': [22, 23], 'finish_time_seconds': [30, 15]})
+
+
+def records_table():
+    return FrameTable('records', records_frame())
+
+
+def parquet_table(tmp_path):
+    path = tmp_path / 'records.parquet'
+    records_frame().to_parquet(path, index=False)
+    return ParquetTable('records', str(path), content_hash(path))
+
+
+def test_parquet_table_reads_columns_lazily(tmp_path):
+    table = parquet_table(tmp_path)
+    # Мөрийн тоо, баганын нэр Parquet-ийн мета өгөгдлөөс - багана уншихгүй
+    assert len(table) == 2 and table._cache == {}
+    assert table.columns == ['horse_id', 'finish_time_minutes', 'finish_time_seconds']
+    assert table.select(['finish_time_minutes'])['finish_time_minutes'].tolist() == [22, 23]
+    assert list(table._cache) == ['finish_time_minutes']
+
+
+def test_select_reads_only_missing_columns(tmp_path):
+    table = parquet_table(tmp_path)
+    reads = []
+    read = table._read
+    table._read = lambda columns: reads.append(columns) or read(columns)
+    table.select(['finish_time_minutes'])
+    df = table.select(['horse_id', 'finish_time_minutes'])
+    assert reads == [['finish_time_minutes'], ['horse_id']]
+    assert list(df.columns) == ['horse_id', 'finish_time_minutes']
+
+
+def test_frame_table_applies_schema():
+    table = records_table()
+    assert str(table.column('horse_id').dtype) == 'category'
+    assert table.select(['finish_time_seconds'])['finish_time_seconds'].tolist() == [30, 15]
+
+
+def test_version_follows_file_content(tmp_path):
+    first, second = tmp_path / 'first.csv', tmp_path / 'second.csv'
+    first.write_text("horse_id\nМ001\n", encoding='utf-8')
+    second.write_text("horse_id\nМ001\n", encoding='utf-8')
+    # Хувилбар нь mtime биш агуулгаас хамаарна
+    assert content_hash(first) == content_hash(second)
+    second.write_text("horse_id\nМ002\n", encoding='utf-8')
+    assert content_hash(first) != content_hash(second)
+
+
+def test_data_version_combines_tables(tmp_path):
+    records = parquet_table(tmp_path)
+    frame = records_table()
+    assert data_version(records, frame) == f"{records.version[:16]}-{frame.version[:16]}"
+    assert data_version(records, frame) != data_version(frame, records)
+
+
+def test_select_shares_cached_columns():
+    table = records_table()
+    first = table.select(['finish_time_minutes'])
+    second = table.select(['finish_time_minutes', 'horse_id'])
+    assert np.shares_memory(first['finish_time_minutes'].to_numpy(), second['finish_time_minutes'].to_numpy())
+
+
+def test_copy_before_mutation_keeps_cache():
+    table = records_table()
+    df = table.select(['finish_time_minutes']).copy()
+    df.loc[0, 'finish_time_minutes'] = 99
+    assert table.column('finish_time_minutes').tolist() == [22, 23]
+
+
+def test_derived_column_computed_once_from_sources():
+    table = records_table()
+    total = table.select(['total_time'])['total_time']
+    assert total.tolist() == [22.5, 23.25]
+    assert np.shares_memory(table.column('total_time').to_numpy(), total.to_numpy())
+    # Эх баганууд нь кэшлэгдсэн тул дахин уншихгүй
+    assert {'finish_time_minutes', 'finish_time_seconds'} <= set(table._cache)
@@ -0,0 +1,47 @@
+import pandas as pd
+
+from validate import repair, validate_chunk
+
+
+def records(**columns):
+    return pd.DataFrame(columns)
+
+
+def test_repair_total_seconds_written_as_seconds():
+    df = records(finish_time_minutes=[22, 22, 25], finish_time_seconds=[1352, 40, 75])
+    fixed, repairs = repair(df, 'records')
+    assert fixed['finish_time_minutes'].tolist() == [22, 22, 25]
+    assert fixed['finish_time_seconds'].tolist() == [32, 40, 75]
+    assert repairs == {'finish_time_seconds': 1}
+
+
+def test_repair_racing_group_homoglyphs_and_aliases():
+    df = records(racing_group=['Даaga', 'Азрага', 'Шүдлэн', 'Морь', None])
+    fixed, repairs = repair(df, 'records')
+    assert fixed['racing_group'].iloc[:4].tolist() == ['Даага', 'Азарга', 'Шүдлэн', 'Морь']
+    assert pd.isna(fixed['racing_group'].iloc[4])
+    assert repairs == {'racing_group': 2}
+
+
+def test_repair_leaves_other_tables_alone():
+    df = pd.DataFrame({'finish_time_minutes': [22], 'finish_time_seconds': [1352]})
+    fixed, repairs = repair(df.copy(), 'live')
+    assert fixed.equals(df) and repairs == {}
+
+
+def test_validate_chunk_quarantines_what_repair_cannot_fix():
+    raw = pd.DataFrame({
+        'horse_id': ['М001', 'М002', 'М003'],
+        'race_name': ['Naadam'] * 3,
+        'date': ['2025-07-11'] * 3,
+        'racing_group': ['Даaga', 'Даага', 'Морь'],
+        'finish_time_minutes': ['22', '22', '22'],
+        'finish_time_seconds': ['1352', '75', '10'],
+    })
+    clean, quarantine, repairs = validate_chunk(raw, 'records', source='record.csv')
+    assert clean['horse_id'].tolist() == ['М001']
+    assert clean['finish_time_seconds'].tolist() == [32]
+    assert clean['racing_group'].astype(str).tolist() == ['Даага']
+    assert quarantine['_reason'].tolist() == ['range:finish_time_seconds', 'value:racing_group']
+    assert quarantine['_row'].tolist() == [1, 2]
+    assert repairs == {'finish_time_seconds': 1, 'racing_group': 1}
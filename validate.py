@@ -0,0 +1,177 @@
+"""Эх өгөгдлийн векторжсон шалгалт - төрөл, муж, давхардал, гадаад түлхүүр
+
+Мөр бүрийг давталтаар биш, багана бүрийн boolean маскаар шалгана. Алдаатай мөр
+шалтгааныхаа хамт хорио (quarantine) руу явж, үлдсэн нь схемийн dtype-тай гарна.
+"""
+
+import numpy as np
+import pandas as pd
+
+from store import AGE_GROUPS, SCHEMAS, apply_schema
+
+INTEGER = ('int8', 'int16', 'int32', 'int64')
+NUMERIC = INTEGER + ('float64',)
+
+# Заавал байх баганууд (хоосон бол хорио)
+REQUIRED = {
+    'horses': ('horse_id',),
+    'trainers': ('trainer_id',),
+    'records': ('horse_id', 'race_name', 'date', 'racing_group'),
+    'live': ('horse_id', 'timestamp_seconds', 'latitude', 'longitude'),
+}
+
+# Зөвшөөрөгдөх муж (хоёр талдаа хамаарна)
+RANGES = {
+    'horses': {
+        'age': (1, 40), 'rider_age': (4, 90), 'aimgiin_airag': (0, 1000), 'ulsiin_airag': (0, 1000),
+        'aimgiin_turuu': (0, 1000), 'ulsiin_turuu': (0, 1000), 'total_achievement': (0, 10000),
+    },
+    'trainers': {
+        'national_achievement': (0, 10000), 'provincial__achievement': (0, 10000),
+        'total_trained_horses': (0, 100000),
+    },
+    'records': {
+        'final_position': (1, 10000), 'finish_time_minutes': (0, 600), 'finish_time_seconds': (0, 59),
+        'average_speed_kmh': (0, 100), 'max_speed_kmh': (0, 120), 'stride_length_m': (0, 15),
+        'heart_rate_start': (20, 260), 'heart_rate_end': (20, 260), 'weight_kg': (50, 1000),
+        'rider_weight_kg': (10, 150), 'distance_km': (0.5, 100), 'temperature_celsius': (-50, 50),
+        'wind_speed_kmh': (0, 200), 'humidity_percent': (0, 100), 'prize_money_tugrik': (0, 1e12),
+        'rider_experience_years': (0, 80),
+    },
+    'live': {
+        'timestamp_seconds': (0, 86400), 'distance_covered_km': (0, 100), 'current_speed_kmh': (0, 120),
+        'heart_rate': (20, 260), 'position': (1, 100000), 'gap_to_leader_seconds': (0, 86400),
+        'cumulative_time_seconds': (0, 86400), 'latitude': (-90, 90), 'longitude': (-180, 180),
+        'elevation_m': (-500, 9000), 'stride_frequency': (0, 10), 'energy_level': (0, 100),
+    },
+}
+
+# Давхардах ёсгүй түлхүүрүүд
+UNIQUE = {
+    'horses': ('horse_id',),
+    'trainers': ('trainer_id',),
+}
+
+# Гадаад түлхүүр: багана -> лавлах хүснэгт (түүний ижил нэртэй багана)
+FOREIGN_KEYS = {
+    'horses': {'trainer_id': 'trainers'},
+    'records': {'horse_id': 'horses'},
+    'live': {'horse_id': 'horses'},
+}
+
+# Зөвшөөрөгдөх утгын олонлог
+ALLOWED = {
+    'horses': {'racing_group': set(AGE_GROUPS.values())},
+    'records': {'racing_group': set(AGE_GROUPS.values())},
+    # Уралдааны түлхүүртэй телеметр (сонголтот багана)
+    'live': {'racing_group': set(AGE_GROUPS.values())},
+}
+
+# Зөвшөөрөгдөх утгын өөр бичлэгүүд -> стандарт утга
+ALIASES = {
+    'racing_group': {'Азрага': 'Азарга'},
+}
+
+# Кирилл үгэнд холилдсон латин үсгүүд (жишээ нь "Даaga" -> "Даага")
+HOMOGLYPHS = str.maketrans({
+    'a': 'а', 'b': 'б', 'g': 'г', 'd': 'д', 'e': 'е', 'z': 'з', 'i': 'и', 'k': 'к', 'l': 'л',
+    'm': 'м', 'n': 'н', 'o': 'о', 'p': 'п', 'r': 'р', 's': 'с', 't': 'т', 'u': 'у', 'f': 'ф',
+    'h': 'х', 'c': 'ц', 'y': 'ү', 'A': 'А', 'B': 'Б', 'E': 'Е', 'K': 'К', 'M': 'М', 'H': 'Н',
+    'O': 'О', 'P': 'Р', 'C': 'С', 'T': 'Т', 'X': 'Х',
+})
+
+def _reasons(index):
+    return pd.Series('', index=index, dtype=object)
+
+
+def _flag(reasons, mask, reason):
+    """Маскаар сонгогдсон мөрүүдийн шалтгаанд нэмэх (векторжсон)"""
+    mask = np.asarray(mask, dtype=bool)
+    if mask.any():
+        reasons[mask] = reasons[mask] + f"{reason};"
+
+
+def repair(df, name):
+    """Мэдэгдэж буй эх өгөгдлийн алдааг засах: (DataFrame, засварын тоо {шалтгаан: тоо})"""
+    repairs = {}
+    if name == 'records' and {'finish_time_minutes', 'finish_time_seconds'} <= set(df.columns):
+        minutes, seconds = df['finish_time_minutes'], df['finish_time_seconds']
+        # Нийт секундээр бичигдсэн (минут нь ойролцоо): 1352 сек = 22 мин 32 сек
+        total = (seconds >= 60) & ((seconds // 60 - minutes).abs() <= 1)
+        if total.any():
+            df.loc[total, 'finish_time_minutes'] = seconds[total] // 60
+            df.loc[total, 'finish_time_seconds'] = seconds[total] % 60
+            repairs['finish_time_seconds'] = int(total.sum())
+    for col, allowed in ALLOWED.get(name, {}).items():
+        if col not in df.columns:
+            continue
+        unknown = df[col].notna() & ~df[col].isin(allowed)
+        if unknown.any():
+            fixed = df.loc[unknown, col].str.translate(HOMOGLYPHS).replace(ALIASES.get(col, {}))
+            fixed = fixed[fixed.isin(allowed)]
+            df.loc[fixed.index, col] = fixed
+            if len(fixed):
+                repairs[col] = len(fixed)
+    return df, repairs
+
+
+def validate_chunk(raw, name, source='', first_row=0):
+    """Текстээр уншсан хэсгийг төрөл, муж, заавал байх баганаар шалгах.
+
+    Буцаах: (цэвэр DataFrame, хорионы DataFrame, засварын тоо)
+    """
+    schema = SCHEMAS[name]
+    df = raw.copy()
+    reasons = _reasons(df.index)
+    for col, dtype in schema.items():
+        if col not in df.columns:
+            continue
+        if dtype in NUMERIC:
+            text = df[col]
+            values = pd.to_numeric(text, errors='coerce')
+            _flag(reasons, values.isna() & text.notna(), f"type:{col}")
+            if dtype in INTEGER:
+                _flag(reasons, values.notna() & (values % 1 != 0), f"type:{col}")
+                _flag(reasons, values.isna() & text.isna(), f"missing:{col}")
+            df[col] = values
+        else:
+            df[col] = df[col].str.strip()
+
+    df, repairs = repair(df, name)
+    for col in REQUIRED.get(name, ()):
+        if col in df.columns:
+            _flag(reasons, df[col].isna() | (df[col] == ''), f"missing:{col}")
+    for col, (lo, hi) in RANGES.get(name, {}).items():
+        if col in df.columns:
+            _flag(reasons, (df[col] < lo) | (df[col] > hi), f"range:{col}")
+    for col, allowed in ALLOWED.get(name, {}).items():
+        if col in df.columns:
+            _flag(reasons, df[col].notna() & ~df[col].isin(allowed), f"value:{col}")
+
+    bad = (reasons != '').to_numpy()
+    rows = first_row + np.arange(len(df))
+    quarantine = raw[bad].assign(_source=source, _row=rows[bad], _reason=reasons[bad].str.rstrip(';'))
+    # Эх файл, мөрийн дугаарыг гадаад түлхүүрийн шалгалт хүртэл авч явна
+    clean = df[~bad].assign(_source=source, _row=rows[~bad])
+    for col, dtype in schema.items():
+        if dtype in INTEGER and col in clean.columns:
+            clean[col] = clean[col].astype('int64')
+    return apply_schema(clean, name), quarantine, repairs
+
+
+def check_keys(df, name, keys):
+    """Давхардал болон гадаад түлхүүрийг нэгтгэсэн хүснэгт дээр шалгах.
+
+    keys: {лавлах хүснэгт: түлхүүрийн утгууд}; байхгүй лавлахыг алгасна.
+    Буцаах: (_source/_row баганагүй цэвэр DataFrame, хорионы DataFrame)
+    """
+    df = df.reset_index(drop=True)
+    reasons = _reasons(df.index)
+    for col in UNIQUE.get(name, ()):
+        _flag(reasons, df[col].duplicated(keep='first'), f"duplicate:{col}")
+    for col, table in FOREIGN_KEYS.get(name, {}).items():
+        if col in df.columns and keys.get(table) is not None:
+            _flag(reasons, ~df[col].isin(keys[table]), f"fk:{col}->{table}")
+    bad = (reasons != '').to_numpy()
+    quarantine = df[bad].assign(_reason=reasons[bad].str.rstrip(';'))
+    return df[~bad].drop(columns=['_source', '_row']).reset_index(drop=True), quarantine